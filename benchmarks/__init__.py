@@ -0,0 +1,17 @@
+"""
+Benchmarks for DMS, run against a local stand-in of the Discord API.
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.compare before.json after.json
+"""
+
+import os
+import sys
+
+try:
+    import discord_message_shortcut  # noqa: F401
+except ImportError:
+    # Allow running from a plain checkout without installing the package
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+    )
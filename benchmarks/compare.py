@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Metrics where a larger number is an improvement; everything else is a cost.
+HIGHER_IS_BETTER = ("throughput_per_s",)
+
+
+def flatten(node: object, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+
+def compare(before: Dict[str, object], after: Dict[str, object]) -> List[str]:
+    old = dict(flatten(before.get("results", {})))
+    new = dict(flatten(after.get("results", {})))
+
+    lines = [f"{'metric':<60} {'before':>12} {'after':>12} {'change':>9}"]
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key], new[key]
+        if a == 0:
+            change = "n/a"
+        else:
+            delta = (b - a) / abs(a) * 100.0
+            better = delta > 0 if key.endswith(HIGHER_IS_BETTER) else delta < 0
+            change = f"{delta:+.1f}%{' ' if better or delta == 0 else '!'}"
+        lines.append(f"{key:<60} {a:>12.4g} {b:>12.4g} {change:>9}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    print("\n".join(compare(before, after)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
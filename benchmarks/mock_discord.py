@@ -0,0 +1,319 @@
+import json
+import os
+import re
+import socket
+import ssl
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:  # only needed to serve HTTP/2
+    h2 = None
+
+MESSAGES_PATH = re.compile(r"^/api/v\d+/channels/(?P<channel_id>[^/]+)/messages$")
+GATEWAY_PATH = re.compile(r"^/api/v\d+/gateway$")
+
+
+def make_self_signed_cert(directory: str) -> Tuple[str, str]:
+    """
+    Creates a throwaway certificate for 127.0.0.1/localhost with the openssl CLI.
+    Returns:
+        Tuple[str, str]: The certificate and key file paths.
+    """
+    cert_path = os.path.join(directory, "mock_discord_cert.pem")
+    key_path = os.path.join(directory, "mock_discord_key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key_path, "-out", cert_path, "-days", "1",
+            "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert_path, key_path
+
+
+class MockDiscordServer:
+    """
+    A local stand-in for POST /api/v*/channels/{id}/messages with configurable
+    latency, per-channel rate limits (all reported under one bucket hash, like
+    Discord does), 429 injection and keep-alive behavior.
+    With `http2`, it speaks HTTP/2 instead (h2c prior knowledge, or ALPN over
+    TLS) and answers the streams of a connection concurrently.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit: int = 5,
+        rate_window: float = 5.0,
+        inject_429_every: int = 0,
+        keep_alive: bool = True,
+        certfile: Optional[str] = None,
+        keyfile: Optional[str] = None,
+        http2: bool = False,
+    ) -> None:
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.inject_429_every = inject_429_every
+        self.keep_alive = keep_alive
+
+        self.requests = 0
+        self.connections = 0
+        self.responses_429 = 0
+        self.gateway_requests = 0
+        self._windows: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+        if http2:
+            self._httpd = _H2Server(self)
+        else:
+            self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+            self._httpd.daemon_threads = True
+        self.secure = certfile is not None
+        if self.secure:
+            ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            ctx.load_cert_chain(certfile, keyfile)
+            ctx.set_alpn_protocols(["h2"] if http2 else ["http/1.1"])
+            self._httpd.socket = ctx.wrap_socket(
+                self._httpd.socket, server_side=True, do_handshake_on_connect=False
+            )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    def start(self) -> "MockDiscordServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockDiscordServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # -------------------------
+    # Request handling
+    # -------------------------
+
+    def _respond(self, channel_id: str) -> Tuple[int, Dict[str, str], bytes]:
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+
+            window_start, used = self._windows.get(channel_id, (now, 0))
+            if now - window_start >= self.rate_window:
+                window_start, used = now, 0
+            reset_after = max(0.0, self.rate_window - (now - window_start))
+
+            injected = (
+                self.inject_429_every > 0 and self.requests % self.inject_429_every == 0
+            )
+            if used >= self.rate_limit or injected:
+                self.responses_429 += 1
+                retry_after = reset_after if used >= self.rate_limit else 0.05
+                body = {
+                    "message": "You are being rate limited.",
+                    "retry_after": retry_after,
+                    "global": False,
+                }
+                headers = {"Retry-After": f"{retry_after:.3f}"}
+                status = 429
+                remaining = max(0, self.rate_limit - used)
+            else:
+                used += 1
+                body = {"id": str(self.requests), "channel_id": channel_id}
+                headers = {}
+                status = 200
+                remaining = self.rate_limit - used
+            self._windows[channel_id] = (window_start, used)
+
+        headers.update(
+            {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                # Like Discord: one hash for every channel, each with its own budget
+                "X-RateLimit-Bucket": "mock-messages",
+            }
+        )
+        return status, headers, json.dumps(body).encode("utf-8")
+
+    def _handle_request(self, method: str, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        if method == "GET" and GATEWAY_PATH.match(path):
+            # What keep-warm pings hit: not rate limited, no latency
+            with self._lock:
+                self.gateway_requests += 1
+            return 200, {}, b'{"url": "wss://gateway.discord.gg"}'
+
+        match = MESSAGES_PATH.match(path) if method == "POST" else None
+        if match is None:
+            return 404, {}, b'{"message": "404: Not Found"}'
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(match.group("channel_id"))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                if server.secure:
+                    self.request.do_handshake()
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with server._lock:
+                    server.connections += 1
+                super().setup()
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("content-length") or 0)
+                self.rfile.read(length)
+
+                self._send(*server._handle_request("POST", self.path))
+
+            def do_GET(self) -> None:
+                self._send(*server._handle_request("GET", self.path))
+
+            def _send(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if not server.keep_alive:
+                    self.send_header("connection", "close")
+                    self.close_connection = True
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+
+class _H2Server:
+    """
+    Just enough of an HTTP/2 server for MockDiscordServer, with the interface
+    of the http.server one it replaces. Each stream is answered on its own
+    thread, so the server latency overlaps like on a real server.
+    """
+
+    def __init__(self, server: MockDiscordServer) -> None:
+        if h2 is None:
+            raise RuntimeError("Serving HTTP/2 needs the h2 package")
+        self._server = server
+        self.socket = socket.create_server(("127.0.0.1", 0))
+        self.server_address = self.socket.getsockname()
+        self._closed = False
+
+    def serve_forever(self) -> None:
+        while not self._closed:
+            try:
+                sock, _ = self.socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def shutdown(self) -> None:
+        self._closed = True
+        try:
+            # Wakes up the accept() in serve_forever
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def server_close(self) -> None:
+        self.socket.close()
+
+    def _serve(self, sock: socket.socket) -> None:
+        server = self._server
+        send_lock = threading.Lock()
+        try:
+            if server.secure:
+                sock.do_handshake()
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with server._lock:
+                server.connections += 1
+
+            conn = h2.connection.H2Connection(
+                config=h2.config.H2Configuration(client_side=False, header_encoding=None)
+            )
+            conn.initiate_connection()
+            sock.sendall(conn.data_to_send())
+
+            requests: Dict[int, Tuple[str, str]] = {}
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    return
+                with send_lock:
+                    for event in conn.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            headers = dict(event.headers)
+                            requests[event.stream_id] = (
+                                headers.get(b":method", b"").decode("ascii"),
+                                headers.get(b":path", b"").decode("ascii"),
+                            )
+                        elif isinstance(event, h2.events.DataReceived):
+                            conn.acknowledge_received_data(
+                                event.flow_controlled_length, event.stream_id
+                            )
+                        elif isinstance(event, h2.events.StreamEnded):
+                            method, path = requests.pop(event.stream_id, ("", ""))
+                            threading.Thread(
+                                target=self._answer,
+                                args=(conn, sock, send_lock, event.stream_id, method, path),
+                                daemon=True,
+                            ).start()
+                        elif isinstance(event, h2.events.ConnectionTerminated):
+                            return
+                    sock.sendall(conn.data_to_send())
+        except (OSError, ValueError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            # Not while an answer is being written
+            with send_lock:
+                sock.close()
+
+    def _answer(
+        self,
+        conn,
+        sock: socket.socket,
+        send_lock: threading.Lock,
+        stream_id: int,
+        method: str,
+        path: str,
+    ) -> None:
+        status, headers, body = self._server._handle_request(method, path)
+        response_headers = [
+            (":status", str(status)),
+            ("content-type", "application/json"),
+            ("content-length", str(len(body))),
+        ] + [(name.lower(), value) for name, value in headers.items()]
+        with send_lock:
+            try:
+                conn.send_headers(stream_id, response_headers)
+                conn.send_data(stream_id, body, end_stream=True)
+                sock.sendall(conn.data_to_send())
+            except (OSError, ValueError, h2.exceptions.ProtocolError):
+                pass
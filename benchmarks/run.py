@@ -0,0 +1,746 @@
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import benchmarks  # noqa: F401  (makes the src/ checkout importable)
+from benchmarks.mock_discord import MockDiscordServer, make_self_signed_cert
+
+from discord_message_shortcut.connection_pool import ConnectionPool
+from discord_message_shortcut.control import ControlClient, control_address, load_authkey
+from discord_message_shortcut.dms_manager import DMS_Manager
+from discord_message_shortcut.hotkey_backend import SyntheticBackend, SyntheticEvent
+from discord_message_shortcut.hotkeys import (
+    MODIFIER_BITS,
+    HotkeyRegistry,
+    canonical_key_name,
+    parse_hotkey,
+)
+from discord_message_shortcut.metrics import SendMetrics
+from discord_message_shortcut.rate_limit import RateLimiter, get_default_limiter, message_route
+from discord_message_shortcut.send_engine import SendEngine
+from discord_message_shortcut.send_message import (
+    prepare_message_request,
+    send_discord_message,
+    send_prepared_request,
+)
+from discord_message_shortcut.templates import CompiledTemplate
+from discord_message_shortcut.transport import (
+    TRANSPORT_H2,
+    TRANSPORT_HTTP1,
+    Transport,
+    make_transport,
+)
+from discord_message_shortcut.warmup import KEEP_WARM_HEADERS, KEEP_WARM_PATH
+
+# A rate limit high enough that throughput benchmarks never hit it
+UNLIMITED = 1_000_000
+
+
+@dataclass
+class BenchContext:
+    iterations: int
+    latency: float
+    certfile: Optional[str] = None
+    keyfile: Optional[str] = None
+
+    def server(self, **kwargs) -> MockDiscordServer:
+        kwargs.setdefault("latency", self.latency)
+        kwargs.setdefault("rate_limit", UNLIMITED)
+        return MockDiscordServer(certfile=self.certfile, keyfile=self.keyfile, **kwargs)
+
+    def pool(self) -> ConnectionPool:
+        if self.certfile is None:
+            return ConnectionPool(secure=False)
+        # Built like the default pool, with a context of its own; main() makes
+        # it trust the mock's certificate through SSL_CERT_FILE
+        return ConnectionPool()
+
+    def transport(self, name: str) -> Transport:
+        if self.certfile is None:
+            return make_transport(name, secure=False)
+        context = ssl.create_default_context(cafile=self.certfile)
+        if name == TRANSPORT_H2:
+            context.set_alpn_protocols(["h2"])
+        return make_transport(name, ssl_context=context)
+
+    def manager(self, server: MockDiscordServer, **kwargs) -> DMS_Manager:
+        env_dir = tempfile.mkdtemp(prefix="dms-bench-")
+        kwargs.setdefault("pool", self.pool())
+        manager = DMS_Manager(
+            env_path=os.path.join(env_dir, ".env"),
+            metrics=SendMetrics(),
+            api_host="127.0.0.1",
+            api_port=server.port,
+            **kwargs,
+        )
+        manager.save_to_env(
+            discord_token="bench-token",
+            discord_user_id="1",
+            server_id="2",
+            channel_id="3",
+        )
+        return manager
+
+
+BENCHMARKS: Dict[str, Callable[[BenchContext], Dict[str, object]]] = {}
+
+
+def benchmark(name: str):
+    def register(fn: Callable[[BenchContext], Dict[str, object]]):
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+def latency_stats(samples_ns: List[int]) -> Dict[str, float]:
+    ordered = sorted(samples_ns)
+    count = len(ordered)
+
+    def pct(p: float) -> float:
+        return ordered[min(count - 1, int(p / 100.0 * count))] / 1e6
+
+    return {
+        "count": count,
+        "mean_ms": sum(ordered) / count / 1e6,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] / 1e6,
+    }
+
+
+def _sequential_sends(
+    ctx: BenchContext, server: MockDiscordServer, reuse: bool = True
+) -> Dict[str, object]:
+    limiter = RateLimiter()
+    pool = ctx.pool()
+    samples: List[int] = []
+
+    started = time.perf_counter_ns()
+    for i in range(ctx.iterations):
+        t0 = time.perf_counter_ns()
+        send_discord_message(
+            message=f"bench {i}",
+            discord_token="bench-token",
+            discord_user_id="1",
+            server_id="2",
+            channel_id="3",
+            pool=pool,
+            host="127.0.0.1",
+            port=server.port,
+            limiter=limiter,
+        )
+        samples.append(time.perf_counter_ns() - t0)
+        if not reuse:
+            pool.close_all()
+            pool = ctx.pool()
+    elapsed = (time.perf_counter_ns() - started) / 1e9
+
+    result: Dict[str, object] = dict(latency_stats(samples))
+    result["throughput_per_s"] = ctx.iterations / elapsed
+    result["connections"] = server.connections
+    return result
+
+
+# -------------------------
+# send_discord_message
+# -------------------------
+
+
+@benchmark("send_keepalive")
+def bench_send_keepalive(ctx: BenchContext) -> Dict[str, object]:
+    """Sequential sends over one warm pool."""
+    with ctx.server() as server:
+        return _sequential_sends(ctx, server)
+
+
+@benchmark("send_new_connection")
+def bench_send_new_connection(ctx: BenchContext) -> Dict[str, object]:
+    """Sequential sends with a fresh connection each time (pre-pool behavior)."""
+    with ctx.server() as server:
+        return _sequential_sends(ctx, server, reuse=False)
+
+
+@benchmark("send_server_closes")
+def bench_send_server_closes(ctx: BenchContext) -> Dict[str, object]:
+    """Sequential sends against a server that refuses keep-alive."""
+    with ctx.server(keep_alive=False) as server:
+        return _sequential_sends(ctx, server)
+
+
+@benchmark("send_rate_limited")
+def bench_send_rate_limited(ctx: BenchContext) -> Dict[str, object]:
+    """Sends through a tight bucket (5 per 0.5 s) and some injected 429s."""
+    with ctx.server(rate_limit=5, rate_window=0.5, inject_429_every=17) as server:
+        result = _sequential_sends(ctx, server)
+        result["responses_429"] = server.responses_429
+        result["requests"] = server.requests
+        return result
+
+
+@benchmark("send_engine_concurrent")
+def bench_send_engine_concurrent(ctx: BenchContext) -> Dict[str, object]:
+    """Distinct messages submitted at once to a 4-wide send engine."""
+    engine = SendEngine(max_queue=ctx.iterations, concurrency=4)
+    try:
+        with ctx.server() as server:
+            manager = ctx.manager(server, engine=engine)
+            started = time.perf_counter_ns()
+            futures = [manager.send_message(f"bench {i}") for i in range(ctx.iterations)]
+            wait(futures)
+            elapsed = (time.perf_counter_ns() - started) / 1e9
+
+            summary = manager.metrics.summary()
+            return {
+                "throughput_per_s": ctx.iterations / elapsed,
+                "total": summary["spans"].get("total", {}),
+                "errors": summary["errors"],
+                "connections": server.connections,
+            }
+    finally:
+        engine.shutdown()
+
+
+@benchmark("first_send")
+def bench_first_send(ctx: BenchContext) -> Dict[str, object]:
+    """First send on a new pool (cold), after reconnecting with a cached TLS session, and after warming."""
+    with ctx.server() as server:
+        request = prepare_message_request(
+            message="bench",
+            discord_token="bench-token",
+            discord_user_id="1",
+            server_id="2",
+            channel_id="3",
+            host="127.0.0.1",
+            port=server.port,
+        )
+        limiter = RateLimiter()
+        pools = []
+        cold: List[int] = []
+        resumed: List[int] = []
+        warmed: List[int] = []
+        for _ in range(ctx.iterations):
+            pool = ctx.pool()
+            pools.append(pool)
+            t0 = time.perf_counter_ns()
+            send_prepared_request(request, pool=pool, limiter=limiter)
+            cold.append(time.perf_counter_ns() - t0)
+
+            # Connections gone, TLS session kept (like after a network blip)
+            pool.close_all()
+            t0 = time.perf_counter_ns()
+            send_prepared_request(request, pool=pool, limiter=limiter)
+            resumed.append(time.perf_counter_ns() - t0)
+            pool.close_all()
+
+            pool = ctx.pool()
+            pools.append(pool)
+            pool.warm("127.0.0.1", KEEP_WARM_PATH, KEEP_WARM_HEADERS, port=server.port)
+            t0 = time.perf_counter_ns()
+            send_prepared_request(request, pool=pool, limiter=limiter)
+            warmed.append(time.perf_counter_ns() - t0)
+            pool.close_all()
+
+        return {
+            "cold": latency_stats(cold),
+            "resumed_session": latency_stats(resumed),
+            "warmed": latency_stats(warmed),
+            "tls_handshakes": sum(p.handshakes for p in pools),
+            "tls_resumed": sum(p.resumed_handshakes for p in pools),
+        }
+
+
+@benchmark("send_fanout")
+def bench_send_fanout(ctx: BenchContext) -> Dict[str, object]:
+    """One press sent to 4 channels at once vs one after another, and with one channel out of its shared-bucket budget."""
+    channels = ["31", "32", "33", "34"]
+    engine = SendEngine()
+    try:
+        result = _fanout_vs_sequential(ctx, engine, channels)
+        result["shared_bucket"] = _fanout_one_throttled(ctx, engine, channels)
+        return result
+    finally:
+        engine.shutdown()
+
+
+def _fanout_vs_sequential(
+    ctx: BenchContext, engine: SendEngine, channels: List[str]
+) -> Dict[str, object]:
+    # Some server latency, otherwise there is nothing to overlap
+    with ctx.server(latency=max(ctx.latency, 0.02)) as server:
+        manager = ctx.manager(server, engine=engine)
+        manager.save_to_env(channel_id=", ".join(channels))
+        profile = manager.primary_profile
+        pool = manager.pool
+
+        fanout: List[int] = []
+        sequential: List[int] = []
+        for i in range(ctx.iterations):
+            t0 = time.perf_counter_ns()
+            manager.send_message(f"bench {i}").result()
+            fanout.append(time.perf_counter_ns() - t0)
+
+            requests = [r.with_message(f"seq {i}") for r in manager.prepared_requests_for(profile)]
+            t0 = time.perf_counter_ns()
+            for request in requests:
+                send_prepared_request(request, pool=pool)
+            sequential.append(time.perf_counter_ns() - t0)
+        manager.flush()
+
+        return {
+            "channels": len(channels),
+            "fanout": latency_stats(fanout),
+            "sequential": latency_stats(sequential),
+            "connections": server.connections,
+        }
+
+
+def _fanout_one_throttled(
+    ctx: BenchContext, engine: SendEngine, channels: List[str]
+) -> Dict[str, object]:
+    # Every channel reports the same bucket hash with 1 send per window. The
+    # first channel uses up its budget right before each fan-out: only it has
+    # to wait (about one window), the others go out at once. If the channels
+    # shared one budget, the fan-out would take a window per channel.
+    window = 0.1
+    with ctx.server(rate_limit=1, rate_window=window) as server:
+        manager = ctx.manager(server, engine=engine)
+        manager.save_to_env(channel_id=", ".join(channels))
+        pool = manager.pool
+        limiter = get_default_limiter()
+        first = manager.prepared_requests_for(manager.primary_profile)[0]
+
+        fanout: List[int] = []
+        throttled: List[str] = []
+        for i in range(min(ctx.iterations, 10)):
+            # Every window rolls over, then the first channel's budget goes
+            time.sleep(window)
+            send_prepared_request(first.with_message(f"hold {i}"), pool=pool)
+
+            throttled = [
+                channel for channel in channels
+                if limiter.delay_for(message_route(channel)) > 0
+            ]
+            t0 = time.perf_counter_ns()
+            manager.send_message(f"shared {i}").result()
+            fanout.append(time.perf_counter_ns() - t0)
+        manager.flush()
+
+        return {
+            "window_ms": window * 1e3,
+            "throttled_channels": throttled,
+            "fanout": latency_stats(fanout),
+            "responses_429": server.responses_429,
+        }
+
+
+@benchmark("transport_throughput")
+def bench_transport_throughput(ctx: BenchContext) -> Dict[str, object]:
+    """Concurrent sends from an 8-wide engine over HTTP/1.1 (a connection each) vs one multiplexed HTTP/2 connection."""
+    results: Dict[str, object] = {}
+    for name in (TRANSPORT_HTTP1, TRANSPORT_H2):
+        engine = SendEngine(max_queue=ctx.iterations, concurrency=8)
+        transport = ctx.transport(name)
+        try:
+            # Some server latency, otherwise there is nothing to overlap
+            with ctx.server(latency=max(ctx.latency, 0.02), http2=name == TRANSPORT_H2) as server:
+                manager = ctx.manager(server, engine=engine, pool=transport)
+                started = time.perf_counter_ns()
+                futures = [manager.send_message(f"bench {i}") for i in range(ctx.iterations)]
+                wait(futures)
+                elapsed = (time.perf_counter_ns() - started) / 1e9
+                manager.flush()
+
+                summary = manager.metrics.summary()
+                results[name] = {
+                    "throughput_per_s": ctx.iterations / elapsed,
+                    "total": summary["spans"].get("total", {}),
+                    "errors": summary["errors"],
+                    "connections": server.connections,
+                }
+        finally:
+            engine.shutdown()
+            transport.close_all()
+    return results
+
+
+# -------------------------
+# DMS_Manager config
+# -------------------------
+
+
+@benchmark("config_save_reload")
+def bench_config_save_reload(ctx: BenchContext) -> Dict[str, object]:
+    """Cost of DMS_Manager.save_to_env (caller side), the coalesced write, and reload_from_env."""
+    with ctx.server() as server:
+        manager = ctx.manager(server)
+        manager.flush()
+        writes_before = manager._persister.writes
+
+        save: List[int] = []
+        for i in range(ctx.iterations):
+            t0 = time.perf_counter_ns()
+            manager.save_to_env(latest_message=f"bench {i}")
+            save.append(time.perf_counter_ns() - t0)
+
+        t0 = time.perf_counter_ns()
+        manager.flush()
+        flush_ns = time.perf_counter_ns() - t0
+
+        reload: List[int] = []
+        for _ in range(ctx.iterations):
+            t0 = time.perf_counter_ns()
+            manager.reload_from_env()
+            reload.append(time.perf_counter_ns() - t0)
+
+        return {
+            "save_to_env": latency_stats(save),
+            "flush_ms": flush_ns / 1e6,
+            "file_writes": manager._persister.writes - writes_before,
+            "reload_from_env": latency_stats(reload),
+        }
+
+
+# -------------------------
+# Message templates
+# -------------------------
+
+BENCH_TEMPLATE = "[{time}] ping #{counter}: {clipboard} {random:ok|go|now}"
+
+
+@benchmark("message_template")
+def bench_message_template(ctx: BenchContext) -> Dict[str, object]:
+    """Rendering a compiled template vs parsing it with str.format on every press."""
+    clipboard = lambda: "clipboard text"  # noqa: E731
+    template = CompiledTemplate(BENCH_TEMPLATE, clipboard)
+    pick = re.compile(r"\{random:([^{}]*)\}")
+
+    naive_counter = 0
+
+    def naive() -> str:
+        # What a per-press implementation would do: resolve every placeholder
+        # the syntax supports, then let str.format parse the text
+        nonlocal naive_counter
+        naive_counter += 1
+        text = pick.sub(lambda m: random.choice(m.group(1).split("|")), BENCH_TEMPLATE)
+        return text.format(
+            time=time.strftime("%H:%M"),
+            date=time.strftime("%Y-%m-%d"),
+            counter=naive_counter,
+            clipboard=clipboard(),
+        )
+
+    compiled: List[int] = []
+    formatted: List[int] = []
+    for _ in range(ctx.iterations):
+        t0 = time.perf_counter_ns()
+        template.render()
+        compiled.append(time.perf_counter_ns() - t0)
+
+        t0 = time.perf_counter_ns()
+        naive()
+        formatted.append(time.perf_counter_ns() - t0)
+
+    with ctx.server() as server:
+        manager = ctx.manager(server)
+        manager.save_to_env(latest_message=BENCH_TEMPLATE)
+        profile = manager.primary_profile
+        prepared = manager.prepared_request_for(profile)
+
+        with_message: List[int] = []
+        full_prepare: List[int] = []
+        for _ in range(ctx.iterations):
+            message = template.render()
+            t0 = time.perf_counter_ns()
+            prepared.with_message(message)
+            with_message.append(time.perf_counter_ns() - t0)
+
+            t0 = time.perf_counter_ns()
+            manager._prepare(message, manager.targets_for(profile)[0])
+            full_prepare.append(time.perf_counter_ns() - t0)
+        manager.flush()
+
+    return {
+        "render_compiled": latency_stats(compiled),
+        "render_str_format": latency_stats(formatted),
+        "request_with_message": latency_stats(with_message),
+        "request_full_prepare": latency_stats(full_prepare),
+    }
+
+
+# -------------------------
+# Control socket
+# -------------------------
+
+
+@benchmark("ipc_roundtrip")
+def bench_ipc_roundtrip(ctx: BenchContext) -> Dict[str, object]:
+    """Client-to-queued-send round trip over the control socket vs a new Python process per send."""
+    with ctx.server() as server:
+        manager = ctx.manager(server)
+        manager.start_control()
+        config_dir = os.path.dirname(manager.env_path)
+        address, authkey = control_address(config_dir), load_authkey(config_dir)
+
+        try:
+            connect: List[int] = []
+            for _ in range(min(ctx.iterations, 20)):
+                t0 = time.perf_counter_ns()
+                ControlClient(address, authkey).close()
+                connect.append(time.perf_counter_ns() - t0)
+
+            roundtrip: List[int] = []
+            with ControlClient(address, authkey) as client:
+                for i in range(ctx.iterations):
+                    t0 = time.perf_counter_ns()
+                    client.send(message=f"bench {i}")
+                    roundtrip.append(time.perf_counter_ns() - t0)
+
+            # What a script pays without the socket: a fresh interpreter that
+            # imports the sender (before it even connects to Discord)
+            spawn: List[int] = []
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+            for _ in range(min(ctx.iterations, 5)):
+                t0 = time.perf_counter_ns()
+                subprocess.run(
+                    [sys.executable, "-c", "import discord_message_shortcut.send_message"],
+                    check=True,
+                    env=env,
+                )
+                spawn.append(time.perf_counter_ns() - t0)
+        finally:
+            manager.stop_control()
+            manager.flush()
+
+        return {
+            "connect": latency_stats(connect),
+            "send_roundtrip": latency_stats(roundtrip),
+            "spawn_process": latency_stats(spawn),
+        }
+
+
+# -------------------------
+# Hotkey filter
+# -------------------------
+
+FILTER_HOTKEYS = ("º", "ctrl+shift+k", "alt+1", "f9")
+
+
+def _typing_events(backend: SyntheticBackend, keystrokes: int) -> List[SyntheticEvent]:
+    """
+    Someone typing text, with a capital now and then and a bound hotkey
+    every 100 keystrokes.
+    """
+    rng = random.Random(1)
+    keys = list("abcdefghijklmnopqrstuvwxyz0123456789,.") + ["space", "space", "backspace"]
+    events: List[SyntheticEvent] = []
+    for i in range(1, keystrokes + 1):
+        if i % 100 == 0:
+            events.extend(backend.combo_events(FILTER_HOTKEYS[i // 100 % len(FILTER_HOTKEYS)]))
+        elif rng.random() < 0.05:
+            events.extend(backend.combo_events(f"shift+{rng.choice(keys[:26])}"))
+        else:
+            events.extend(backend.combo_events(rng.choice(keys)))
+    return events
+
+
+class _NameMatcher:
+    """
+    The previous per-event work, for reference: canonicalize the key name,
+    then look up (modifier mask, name).
+    """
+
+    def __init__(self, table: Dict[tuple, Callable[[], None]]) -> None:
+        self._table = table
+        self._mask = 0
+
+    def handle_event(self, event) -> None:
+        name = event.name
+        if not name:
+            return
+        name = canonical_key_name(name)
+        bit = MODIFIER_BITS.get(name, 0)
+        if event.event_type == "up":
+            self._mask &= ~bit
+            return
+        callback = self._table.get((self._mask, name))
+        self._mask |= bit
+        if callback is not None:
+            callback()
+
+
+@benchmark("hotkey_filter")
+def bench_hotkey_filter(ctx: BenchContext) -> Dict[str, object]:
+    """Per-keystroke cost of the scan code filter on synthetic typing, vs matching key names."""
+    backend = SyntheticBackend()
+    events = _typing_events(backend, ctx.iterations * 100)
+    fired = {"scan_code": 0, "name": 0}
+
+    def counter(kind: str) -> Callable[[], None]:
+        def callback() -> None:
+            fired[kind] += 1
+
+        return callback
+
+    registry = HotkeyRegistry(backend)
+    registry.apply([(key, key) for key in FILTER_HOTKEYS], lambda _: counter("scan_code"))
+    matcher = _NameMatcher({parse_hotkey(key): counter("name") for key in FILTER_HOTKEYS})
+
+    def per_event_ns(run: Callable[[], object], runs: int = 5) -> float:
+        best = None
+        for _ in range(runs):
+            t0 = time.perf_counter_ns()
+            run()
+            elapsed = time.perf_counter_ns() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        return best / len(events)
+
+    def loop(handle: Callable[[object], None]) -> Callable[[], None]:
+        def run() -> None:
+            for event in events:
+                handle(event)
+
+        return run
+
+    # One pass each first, to check that both see the same presses
+    backend.feed(events)
+    loop(matcher.handle_event)()
+    result: Dict[str, object] = {
+        "events": len(events),
+        "hotkeys_fired": fired["scan_code"],
+        "hotkeys_fired_by_name": fired["name"],
+        "call_overhead_ns": per_event_ns(loop(lambda event: None)),
+        "scan_code_filter_ns": per_event_ns(loop(registry.dispatcher.handle_event)),
+        "name_matching_ns": per_event_ns(loop(matcher.handle_event)),
+        # As the hook is really called, through the backend
+        "through_backend_ns": per_event_ns(lambda: backend.feed(events)),
+    }
+    registry.close()
+    return result
+
+
+# -------------------------
+# DmsUI hotkey dispatch
+# -------------------------
+
+
+@benchmark("hotkey_dispatch")
+def bench_hotkey_dispatch(ctx: BenchContext) -> Dict[str, object]:
+    """Time spent in the hotkey callback, and threads created, under a key storm."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from discord_message_shortcut.ui import DmsUI
+    except ImportError as e:
+        return {"skipped": f"UI not importable: {e}"}
+
+    engine = SendEngine()
+    try:
+        with ctx.server(latency=max(ctx.latency, 0.05)) as server:
+            manager = ctx.manager(server, engine=engine)
+            ui = DmsUI(manager=manager)
+
+            threads_before = threading.active_count()
+            samples: List[int] = []
+            for _ in range(ctx.iterations):
+                t0 = time.perf_counter_ns()
+                ui._send_current_message_safely()
+                samples.append(time.perf_counter_ns() - t0)
+            threads_after = threading.active_count()
+
+            result: Dict[str, object] = dict(latency_stats(samples))
+            result["threads_before"] = threads_before
+            result["threads_after"] = threads_after
+            result["engine"] = engine.stats().__dict__
+            return result
+    finally:
+        engine.shutdown(wait=False)
+
+
+@benchmark("menu_refresh")
+def bench_menu_refresh(ctx: BenchContext) -> Dict[str, object]:
+    """Cost of a configChanged refresh after a status toggle and after a field edit."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from discord_message_shortcut.ui import DmsUI
+    except ImportError as e:
+        return {"skipped": f"UI not importable: {e}"}
+
+    with ctx.server() as server:
+        manager = ctx.manager(server)
+        ui = DmsUI(manager=manager)
+
+        toggle: List[int] = []
+        edit: List[int] = []
+        for i in range(ctx.iterations):
+            # A toggle flips the status without changing any field
+            ui.active = not ui.active
+            t0 = time.perf_counter_ns()
+            ui.configChanged.emit()
+            toggle.append(time.perf_counter_ns() - t0)
+
+            manager.save_to_env(latest_message=f"bench {i}")
+            t0 = time.perf_counter_ns()
+            ui.fieldsChanged.emit(["latest_message"])
+            ui.configChanged.emit()
+            edit.append(time.perf_counter_ns() - t0)
+
+        ui.active = False
+        manager.stop_watching()
+        return {"toggle": latency_stats(toggle), "field_edit": latency_stats(edit)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the DMS benchmarks.")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="Server latency in seconds")
+    parser.add_argument("--tls", action="store_true", help="Serve the mock API over TLS")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Benchmarks to run")
+    args = parser.parse_args(argv)
+
+    ctx = BenchContext(iterations=args.iterations, latency=args.latency)
+    if args.tls:
+        ctx.certfile, ctx.keyfile = make_self_signed_cert(tempfile.mkdtemp(prefix="dms-bench-"))
+        os.environ["SSL_CERT_FILE"] = ctx.certfile
+
+    results: Dict[str, object] = {}
+    for name in args.only or BENCHMARKS:
+        print(f"running {name}...", file=sys.stderr)
+        results[name] = BENCHMARKS[name](ctx)
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "latency": args.latency,
+            "tls": args.tls,
+        },
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
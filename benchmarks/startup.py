@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+import benchmarks  # noqa: F401  (makes the src/ checkout importable)
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Cold-start stages, each measured in a fresh interpreter:
+# name -> (modules to import, modules that must NOT end up imported)
+STAGES: Dict[str, tuple] = {
+    "supervisor": (
+        ["discord_message_shortcut.main"],
+        ["PySide6", "selenium", "rich", "keyboard"],
+    ),
+    "app_entry": (
+        ["discord_message_shortcut.main", "discord_message_shortcut.ui"],
+        ["selenium", "rich"],
+    ),
+    # The headless daemon must stay free of Qt
+    "daemon": (
+        ["discord_message_shortcut.daemon", "keyboard"],
+        ["PySide6", "selenium", "rich"],
+    ),
+}
+
+# Import-time budgets in milliseconds (median of the runs)
+BUDGETS_MS: Dict[str, float] = {
+    "supervisor": 60.0,
+    "app_entry": 600.0,
+    "daemon": 150.0,
+}
+
+# Peak resident memory budgets in MB once the imports are done, where
+# measurable (not on Windows)
+RSS_BUDGETS_MB: Dict[str, float] = {
+    "daemon": 40.0,
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = (time.perf_counter() - start) * 1000
+forbidden = [m for m in {forbidden!r} if m in sys.modules]
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+except ImportError:
+    rss_mb = None
+print(json.dumps({{"ms": elapsed, "forbidden": forbidden, "rss_mb": rss_mb}}))
+"""
+
+
+def measure_stage(name: str, runs: int) -> Dict[str, object]:
+    modules, forbidden = STAGES[name]
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    samples: List[float] = []
+    rss: List[float] = []
+    loaded: List[str] = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(modules=modules, forbidden=forbidden)],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        if proc.returncode != 0:
+            return {"skipped": proc.stderr.strip().splitlines()[-1:]}
+        data = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(data["ms"])
+        if data["rss_mb"] is not None:
+            rss.append(data["rss_mb"])
+        loaded = data["forbidden"]
+
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "budget_ms": BUDGETS_MS[name],
+        "rss_mb": statistics.median(rss) if rss else None,
+        "rss_budget_mb": RSS_BUDGETS_MB.get(name),
+        "eagerly_imported": loaded,
+    }
+
+
+def check(results: Dict[str, Dict[str, object]]) -> List[str]:
+    """
+    Returns the budget violations found in `results`.
+    """
+    failures = []
+    for name, result in results.items():
+        if "skipped" in result:
+            continue
+        if result["median_ms"] > result["budget_ms"]:
+            failures.append(
+                f"{name}: {result['median_ms']:.1f} ms exceeds budget of {result['budget_ms']:.0f} ms"
+            )
+        rss, rss_budget = result["rss_mb"], result["rss_budget_mb"]
+        if rss is not None and rss_budget is not None and rss > rss_budget:
+            failures.append(f"{name}: {rss:.1f} MB resident exceeds budget of {rss_budget:.0f} MB")
+        if result["eagerly_imported"]:
+            failures.append(f"{name}: imports {', '.join(result['eagerly_imported'])} at startup")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure DMS cold-start import time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="Exit with 1 if a budget is exceeded")
+    args = parser.parse_args(argv)
+
+    results = {name: measure_stage(name, args.runs) for name in STAGES}
+    print(json.dumps(results, indent=2))
+
+    failures = check(results)
+    for failure in failures:
+        print(f"BUDGET EXCEEDED: {failure}", file=sys.stderr)
+    return 1 if args.check and failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
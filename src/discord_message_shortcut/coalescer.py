@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from discord_message_shortcut.metrics import SendTrace
+
+Schedule = Callable[[float, Callable[[], None]], None]
+
+# Called with the message, its trace and the suffix counting merged presses
+# (" (x3)", or "" for a single press), added after the message is rendered.
+Send = Callable[[str, SendTrace, str], None]
+
+
+def _thread_timer(delay: float, fn: Callable[[], None]) -> None:
+    timer = threading.Timer(delay, fn)
+    timer.daemon = True
+    timer.start()
+
+
+class HotkeyCoalescer:
+    """
+    Debounces hotkey presses before they reach the sender.
+
+    By default the first press is sent right away (leading edge) and further
+    presses are suppressed until `window` seconds pass without a press, so key
+    auto-repeat and double taps send once. With `merge` enabled the presses
+    of one burst are instead collected and sent as a single message with a
+    counter once the burst ends.
+    """
+
+    def __init__(
+        self,
+        send: Send,
+        window: float = 0.25,
+        merge: bool = False,
+        schedule: Optional[Schedule] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._send = send
+        self.window = max(0.0, window)
+        self.merge = merge
+        self._schedule = schedule or _thread_timer
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._window_end = 0.0
+        self._count = 0
+        self._message = ""
+        self._trace: Optional[SendTrace] = None
+        self.suppressed = 0
+
+    def press(self, message: str, trace: SendTrace) -> None:
+        if self.window <= 0:
+            self._send(message, trace, "")
+            return
+
+        now = self._clock()
+        with self._lock:
+            in_burst = now < self._window_end
+            self._window_end = now + self.window
+
+            if in_burst:
+                self.suppressed += 1
+                self._count += 1
+                return
+
+            self._count = 1
+            if self.merge:
+                # Trailing edge: wait for the burst to end before sending
+                self._message = message
+                self._trace = trace
+                self._schedule(self.window, self._flush)
+                return
+
+        self._send(message, trace, "")
+
+    def _flush(self) -> None:
+        with self._lock:
+            remaining = self._window_end - self._clock()
+            if remaining > 0:
+                # More presses arrived: the burst is still going on
+                self._schedule(remaining, self._flush)
+                return
+
+            count, message, trace = self._count, self._message, self._trace
+            self._count = 0
+            self._trace = None
+
+        if trace is None:
+            return
+        self._send(message, trace, f" (x{count})" if count > 1 else "")
+
+
+class RecentPayloads:
+    """
+    A small LRU of recently sent payload keys, used to drop duplicate sends
+    within a time window before they hit the network.
+    """
+
+    def __init__(
+        self,
+        window: float = 0.0,
+        capacity: int = 32,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.capacity = capacity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seen: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def seen(self, key: Hashable) -> bool:
+        """
+        Returns True if `key` was recorded within the window, otherwise records it.
+        """
+        if self.window <= 0:
+            return False
+
+        now = self._clock()
+        with self._lock:
+            # Entries are kept oldest first, so expired ones sit at the front
+            while self._seen:
+                oldest_key, sent_at = next(iter(self._seen.items()))
+                if now - sent_at < self.window:
+                    break
+                del self._seen[oldest_key]
+
+            if key in self._seen:
+                return True
+
+            self._seen[key] = now
+            if len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+            return False
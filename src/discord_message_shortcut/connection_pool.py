@@ -0,0 +1,358 @@
+import select
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPException, HTTPSConnection, RemoteDisconnected
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from discord_message_shortcut.metrics import (
+    MARK_CONNECTED,
+    MARK_FIRST_BYTE,
+    MARK_WRITTEN,
+    SendTrace,
+)
+
+# Errors raised when a reused keep-alive socket was closed by the server
+# while it was sitting idle in the pool. Only safe to retry while the request
+# has not been written: afterwards the server may already have acted on it.
+_STALE_CONNECTION_ERRORS = (
+    RemoteDisconnected,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+_PoolKey = Tuple[str, int]
+
+# Header name/value pairs already encoded for the wire. They must include
+# `host` and `content-length`, which are then not added by http.client.
+EncodedHeaders = Sequence[Tuple[bytes, bytes]]
+
+
+class ResponseLost(ConnectionError):
+    """
+    The request was written but no complete response came back (the
+    connection dropped or timed out). The server may have acted on it, so it
+    must not be sent again automatically.
+    """
+
+
+@dataclass(frozen=True)
+class PooledResponse:
+    status: int
+    reason: str
+    headers: Dict[str, str]
+    body: bytes
+
+
+class _ResumingHTTPSConnection(HTTPSConnection):
+    """
+    An HTTPSConnection that offers a previous TLS session to the server, which
+    turns the handshake into an abbreviated one if the server still knows it.
+    """
+
+    def __init__(self, *args, session: Optional[ssl.SSLSession] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.session = session
+
+    def connect(self) -> None:
+        HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=server_hostname, session=self.session
+        )
+
+
+def encode_headers(headers: Mapping[str, str]) -> Tuple[Tuple[bytes, bytes], ...]:
+    """
+    Encodes a header mapping once so it can be replayed on every request.
+    """
+    return tuple(
+        (name.encode("ascii"), value.encode("latin-1"))
+        for name, value in headers.items()
+    )
+
+
+class ConnectionPool:
+    """
+    Keeps warm keep-alive HTTP(S) connections per host so that repeated
+    requests skip the DNS lookup, TCP handshake and TLS handshake. New
+    connections resume the host's last TLS session when the server allows it.
+    """
+
+    def __init__(
+        self,
+        max_idle_per_host: int = 4,
+        idle_timeout: float = 60.0,
+        timeout: float = 10.0,
+        secure: bool = True,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.secure = secure
+        if secure and ssl_context is None:
+            # One for every connection: a TLS session only resumes with the
+            # context that created it (wrap_socket raises otherwise)
+            ssl_context = ssl.create_default_context()
+        self.ssl_context = ssl_context
+
+        self._lock = threading.Lock()
+        self._idle: Dict[_PoolKey, List[Tuple[HTTPConnection, float]]] = {}
+        # Kept across close_all, so reconnecting after it stays cheap
+        self._sessions: Dict[_PoolKey, ssl.SSLSession] = {}
+
+        self.handshakes = 0
+        self.resumed_handshakes = 0
+
+    def request(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        body: Optional[Union[bytes, str]] = None,
+        headers: Optional[Union[Mapping[str, str], EncodedHeaders]] = None,
+        port: int = 443,
+        trace: Optional[SendTrace] = None,
+    ) -> PooledResponse:
+        """
+        Sends a request over a pooled connection and fully drains the response.
+        A reused connection that turns out to be stale is replaced once, as
+        long as the request could not be written on it. A connection lost
+        while waiting for the response raises ResponseLost instead: resending
+        could post the message twice.
+        Args:
+            method (str): The HTTP method.
+            host (str): The host to connect to.
+            path (str): The request path.
+            body (bytes | str | None): The request body.
+            headers (Mapping[str, str] | EncodedHeaders | None): The request
+                headers, either as a mapping or as pre-encoded pairs.
+            port (int): The port to connect to.
+            trace (SendTrace | None): Receives connect, write and first byte marks.
+        Returns:
+            PooledResponse: The status, headers and body of the response.
+        """
+        key = (host, port)
+        conn, reused = self._acquire(key)
+
+        try:
+            self._write(conn, method, path, body, headers, trace)
+        except _STALE_CONNECTION_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+            # The idle socket was closed on the other side: retry on a fresh one.
+            conn = self._new_connection(key)
+            try:
+                self._write(conn, method, path, body, headers, trace)
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        try:
+            return self._read(key, conn, trace)
+        except (OSError, HTTPException) as e:
+            conn.close()
+            raise ResponseLost(f"No response to the request sent to {host}: {e}") from e
+        except BaseException:
+            conn.close()
+            raise
+
+    def warm(
+        self,
+        host: str,
+        path: str,
+        headers: Optional[Mapping[str, str]] = None,
+        port: int = 443,
+        count: int = 1,
+    ) -> int:
+        """
+        Makes sure `count` connections to the host are open and fresh by
+        sending a cheap request on each: idle ones are reused (which also
+        keeps the server from closing them), missing ones are opened. Errors
+        are not raised; the connection is just not counted.
+        Args:
+            host (str): The host to connect to.
+            path (str): A path that is cheap to GET.
+            headers (Mapping[str, str] | None): The request headers.
+            port (int): The port to connect to.
+            count (int): How many connections to warm, at most `max_idle_per_host`.
+        Returns:
+            int: How many connections are warm.
+        """
+        key = (host, port)
+        # Check them all out first, so each request gets a different one
+        conns = [self._acquire(key) for _ in range(max(1, min(count, self.max_idle_per_host)))]
+        warmed = 0
+        for conn, reused in conns:
+            for attempt in range(2 if reused else 1):
+                if attempt:
+                    conn = self._new_connection(key)
+                try:
+                    self._send(key, conn, "GET", path, None, headers, None)
+                except Exception:
+                    conn.close()
+                    continue
+                warmed += 1
+                break
+        return warmed
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+    def idle_count(self, host: str, port: int = 443) -> int:
+        with self._lock:
+            return len(self._idle.get((host, port), []))
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _send(
+        self,
+        key: _PoolKey,
+        conn: HTTPConnection,
+        method: str,
+        path: str,
+        body: Optional[Union[bytes, str]],
+        headers: Optional[Union[Mapping[str, str], EncodedHeaders]],
+        trace: Optional[SendTrace],
+    ) -> PooledResponse:
+        self._write(conn, method, path, body, headers, trace)
+        return self._read(key, conn, trace)
+
+    def _write(
+        self,
+        conn: HTTPConnection,
+        method: str,
+        path: str,
+        body: Optional[Union[bytes, str]],
+        headers: Optional[Union[Mapping[str, str], EncodedHeaders]],
+        trace: Optional[SendTrace],
+    ) -> None:
+        if conn.sock is None:
+            conn.connect()
+            if isinstance(conn.sock, ssl.SSLSocket):
+                with self._lock:
+                    self.handshakes += 1
+                    self.resumed_handshakes += conn.sock.session_reused
+        if trace is not None:
+            trace.mark(MARK_CONNECTED)
+
+        if headers is None or isinstance(headers, Mapping):
+            conn.request(method, path, body, dict(headers or {}))
+        else:
+            conn.putrequest(method, path, skip_host=True, skip_accept_encoding=True)
+            for name, value in headers:
+                conn.putheader(name, value)
+            conn.endheaders(body)
+        if trace is not None:
+            trace.mark(MARK_WRITTEN)
+
+    def _read(
+        self, key: _PoolKey, conn: HTTPConnection, trace: Optional[SendTrace]
+    ) -> PooledResponse:
+        resp = conn.getresponse()
+        if trace is not None:
+            trace.mark(MARK_FIRST_BYTE)
+            trace.status = resp.status
+
+        # Drain the body so the connection can carry the next request.
+        data = resp.read()
+        result = PooledResponse(
+            status=resp.status,
+            reason=resp.reason,
+            headers={k.lower(): v for k, v in resp.getheaders()},
+            body=data,
+        )
+
+        if isinstance(conn.sock, ssl.SSLSocket):
+            # Only now: TLS 1.3 sends the session ticket after the handshake
+            session = conn.sock.session
+            if session is not None:
+                self._sessions[key] = session
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return result
+
+    def _acquire(self, key: _PoolKey) -> Tuple[HTTPConnection, bool]:
+        now = time.monotonic()
+        expired: List[HTTPConnection] = []
+        found: Optional[HTTPConnection] = None
+
+        with self._lock:
+            conns = self._idle.get(key, [])
+            while conns:
+                conn, last_used = conns.pop()
+                if now - last_used <= self.idle_timeout and not _is_dropped(conn):
+                    found = conn
+                    break
+                expired.append(conn)
+
+        for conn in expired:
+            conn.close()
+
+        if found is not None:
+            return found, True
+        return self._new_connection(key), False
+
+    def _release(self, key: _PoolKey, conn: HTTPConnection) -> None:
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_idle_per_host:
+                conns.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def _new_connection(self, key: _PoolKey) -> HTTPConnection:
+        host, port = key
+        if self.secure:
+            return _ResumingHTTPSConnection(
+                host,
+                port,
+                timeout=self.timeout,
+                context=self.ssl_context,
+                session=self._sessions.get(key),
+            )
+        return HTTPConnection(host, port, timeout=self.timeout)
+
+
+def _is_dropped(conn: HTTPConnection) -> bool:
+    # An idle connection has nothing to read: if its socket is readable, the
+    # server closed it (or sent something unexpected), so it can't be reused.
+    # Catches most stale connections before a request is written on them.
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+_default_pool: Optional[ConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool shared by every sender.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
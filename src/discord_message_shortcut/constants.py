@@ -0,0 +1,3 @@
+# Exit code a child process uses to ask the supervisor in main.main for a restart.
+# Kept in its own module so the supervisor can read it without importing Qt.
+REQUEST_RESTART_EXIT_CODE = 9988
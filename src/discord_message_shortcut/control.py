@@ -0,0 +1,401 @@
+import argparse
+import errno
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (
+    Client,
+    Connection,
+    Listener,
+    answer_challenge,
+    deliver_challenge,
+)
+from typing import Callable, Dict, List, Optional, Tuple
+
+from discord_message_shortcut.env_persister import write_atomic
+from discord_message_shortcut.metrics import SendTrace
+
+# Frames are length-prefixed by multiprocessing.connection (never pickled):
+# one opcode byte followed by a JSON payload. Replies start with a status byte.
+OP_PING = 0x01
+OP_SEND = 0x02
+OP_BATCH = 0x03
+OP_PROFILES = 0x04
+
+STATUS_OK = 0x00
+STATUS_ERROR = 0x01
+
+CONTROL_SOCKET_FILENAME = "control.sock"
+CONTROL_KEY_FILENAME = "control.key"
+
+# How long a `wait` send may take before the reply gives up on it (seconds)
+SEND_WAIT_TIMEOUT = 30.0
+# How long a connecting client may take to prove it knows the key (seconds)
+HANDSHAKE_TIMEOUT = 5.0
+MAX_BATCH = 64
+
+
+class ControlError(Exception):
+    """
+    Raised by the client when the running instance rejected a request.
+    """
+
+
+def control_address(config_dir: str) -> str:
+    """
+    A Unix domain socket in the config directory, or a per-user named pipe
+    on Windows.
+    """
+    if sys.platform == "win32":
+        user = os.environ.get("USERNAME", "user")
+        return rf"\\.\pipe\dms-control-{user}"
+    return os.path.join(config_dir, CONTROL_SOCKET_FILENAME)
+
+
+def load_authkey(config_dir: str, create: bool = False) -> bytes:
+    """
+    The shared secret clients prove they know when connecting, kept in a file
+    only the current user can read.
+    """
+    path = os.path.join(config_dir, CONTROL_KEY_FILENAME)
+    try:
+        with open(path, "r", encoding="ascii") as f:
+            return bytes.fromhex(f.read().strip())
+    except (OSError, ValueError):
+        if not create:
+            raise
+    key = secrets.token_bytes(32)
+    write_atomic(path, key.hex())
+    return key
+
+
+def _encode(code: int, payload: object) -> bytes:
+    return bytes((code,)) + json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(frame: bytes) -> Tuple[int, object]:
+    if not frame:
+        raise ValueError("empty frame")
+    return frame[0], json.loads(frame[1:] or b"null")
+
+
+# The request handler: (opcode, payload) -> reply payload; raises to reply an error
+Handler = Callable[[int, object], object]
+
+
+class _TimedConnection:
+    """
+    A connection whose reads fail once `deadline` (time.monotonic) passed
+    without data. Only used for the handshake.
+    """
+
+    def __init__(self, conn: Connection, deadline: float) -> None:
+        self._conn = conn
+        self._deadline = deadline
+
+    def send_bytes(self, buf: bytes) -> None:
+        self._conn.send_bytes(buf)
+
+    def recv_bytes(self, maxlength: Optional[int] = None) -> bytes:
+        if not self._conn.poll(max(0.0, self._deadline - time.monotonic())):
+            raise AuthenticationError("The client did not complete the handshake in time")
+        return self._conn.recv_bytes(maxlength)
+
+
+def _handshake(conn: Connection, authkey: bytes) -> None:
+    # What Listener.accept does with an authkey, but with a deadline
+    timed = _TimedConnection(conn, time.monotonic() + HANDSHAKE_TIMEOUT)
+    deliver_challenge(timed, authkey)
+    answer_challenge(timed, authkey)
+
+
+def _in_use(address: str) -> bool:
+    try:
+        conn = Client(address)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+    conn.close()
+    return True
+
+
+class ControlServer:
+    """
+    Accepts local connections and answers framed requests with `handler`,
+    one thread per connection. Requests are handled in the order received.
+    """
+
+    def __init__(self, address: str, authkey: bytes, handler: Handler) -> None:
+        """
+        Raises:
+            OSError: If another instance is serving `address`, or the socket
+                could not be created.
+        """
+        self.address = address
+        self._authkey = authkey
+        self._handler = handler
+
+        if _in_use(address):
+            raise OSError(errno.EADDRINUSE, "Another DMS instance is serving it", address)
+        if sys.platform != "win32" and os.path.exists(address):
+            # Nothing listens on it: left behind by an instance that didn't
+            # shut down cleanly
+            os.remove(address)
+        # The handshake is done per connection, see `_serve`
+        self._listener = Listener(address)
+        if sys.platform != "win32":
+            os.chmod(address, 0o600)
+
+        self._closed = False
+        self._connections: List[Connection] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._accept, name="dms-control", daemon=True)
+
+    def start(self) -> "ControlServer":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._closed = True
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except (EOFError, ConnectionError):
+                # A client that gave up while connecting
+                continue
+            except OSError:
+                # The listener was closed
+                return
+            with self._lock:
+                self._connections.append(conn)
+            threading.Thread(
+                target=self._serve, args=(conn,), name="dms-control-conn", daemon=True
+            ).start()
+
+    def _serve(self, conn: Connection) -> None:
+        try:
+            # Here rather than on the accept thread: a client stalling the
+            # handshake holds up nobody else
+            _handshake(conn, self._authkey)
+            while True:
+                frame = conn.recv_bytes()
+                try:
+                    op, payload = _decode(frame)
+                    reply = _encode(STATUS_OK, self._handler(op, payload))
+                except Exception as e:
+                    reply = _encode(STATUS_ERROR, str(e))
+                conn.send_bytes(reply)
+        except (AuthenticationError, EOFError, OSError):
+            pass
+        finally:
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            conn.close()
+
+
+class ControlClient:
+    """
+    Talks to a running DMS instance. Keep one open to avoid paying the
+    connection handshake per request.
+    """
+
+    def __init__(self, address: str, authkey: bytes) -> None:
+        self._conn = Client(address, authkey=authkey)
+
+    def __enter__(self) -> "ControlClient":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def request(self, op: int, payload: object = None) -> object:
+        self._conn.send_bytes(_encode(op, payload))
+        status, reply = _decode(self._conn.recv_bytes())
+        if status != STATUS_OK:
+            raise ControlError(reply)
+        return reply
+
+    def ping(self) -> object:
+        return self.request(OP_PING)
+
+    def send(
+        self,
+        profile: Optional[object] = None,
+        message: Optional[str] = None,
+        wait: bool = False,
+    ) -> Dict[str, object]:
+        """
+        Queues a send on the running instance.
+        Args:
+            profile: The profile index (0 is the primary one) or its shortcut;
+                the primary profile if None.
+            message: The message (or template) to send instead of the profile's.
+            wait: Reply once the message was sent instead of once it is queued.
+        Returns:
+            Dict[str, object]: {"queued": True}, plus "status"/"error" with `wait`.
+        """
+        return self.request(OP_SEND, _send_payload(profile, message, wait))
+
+    def batch(self, sends: List[Dict[str, object]]) -> List[Dict[str, object]]:
+        """
+        Queues several sends (dicts with the `send` arguments) in one round trip.
+        """
+        return self.request(OP_BATCH, sends)
+
+    def profiles(self) -> List[Dict[str, str]]:
+        return self.request(OP_PROFILES)
+
+
+def _send_payload(profile: Optional[object], message: Optional[str], wait: bool) -> Dict[str, object]:
+    payload: Dict[str, object] = {}
+    if profile is not None:
+        payload["profile"] = profile
+    if message is not None:
+        payload["message"] = message
+    if wait:
+        payload["wait"] = True
+    return payload
+
+
+class ManagerHandler:
+    """
+    Serves control requests from a DMS_Manager: sends go through the same
+    send engine, connection pool and outbox as hotkey presses.
+    Runs on the connection threads, so profiles are resolved and sent under
+    the manager's lock rather than while the owner thread edits them.
+    """
+
+    def __init__(self, manager) -> None:
+        self.manager = manager
+
+    def __call__(self, op: int, payload: object) -> object:
+        if op == OP_PING:
+            return "pong"
+        if op == OP_SEND:
+            return self._send(payload or {})
+        if op == OP_BATCH:
+            if not isinstance(payload, list) or len(payload) > MAX_BATCH:
+                raise ValueError(f"A batch is a list of at most {MAX_BATCH} sends")
+            items = [{} if item is None else item for item in payload]
+            with self.manager.lock:
+                # All of them are checked before any is queued, so a bad item
+                # does not leave the ones before it sent
+                sends = [self._prepare(item) for item in items]
+                futures = [self._submit(message, profile) for message, profile in sends]
+            return [self._reply(future, item) for future, item in zip(futures, items)]
+        if op == OP_PROFILES:
+            return [
+                {"index": i, "shortcut": p.shortcut, "channel_id": p.channel_id, "message": p.message}
+                for i, p in enumerate(self.manager.all_profiles())
+            ]
+        raise ValueError(f"Unknown opcode: {op:#04x}")
+
+    def _send(self, payload: Dict[str, object]) -> Dict[str, object]:
+        with self.manager.lock:
+            future = self._submit(*self._prepare(payload))
+        return self._reply(future, payload)
+
+    def _prepare(self, payload: object) -> Tuple[str, object]:
+        if not isinstance(payload, dict):
+            raise ValueError(f"A send is a dict of profile/message/wait, not {type(payload).__name__}")
+        profile = self._profile(payload.get("profile"))
+        message = payload.get("message")
+        return (profile.message if message is None else str(message)), profile
+
+    def _submit(self, message: str, profile) -> Future:
+        return self.manager.send_message(message, SendTrace(), profile)
+
+    def _reply(self, future: Future, payload: Dict[str, object]) -> Dict[str, object]:
+        if not payload.get("wait"):
+            return {"queued": not future.cancelled()}
+        if future.cancelled():
+            return {"queued": False}
+        try:
+            result = future.result(timeout=SEND_WAIT_TIMEOUT)
+        except Exception as e:
+            return {"queued": True, "error": str(e)}
+        return {"queued": True, "status": getattr(result, "status", None)}
+
+    def _profile(self, selector: object):
+        profiles = self.manager.all_profiles()
+        if selector is None:
+            return profiles[0]
+        if isinstance(selector, int) and not isinstance(selector, bool):
+            if 0 <= selector < len(profiles):
+                return profiles[selector]
+            raise ValueError(f"No profile {selector}")
+        for profile in profiles:
+            if profile.shortcut == selector:
+                return profile
+        raise ValueError(f"No profile with shortcut {selector!r}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from platformdirs import user_config_dir
+
+    parser = argparse.ArgumentParser(description="Trigger sends on the running DMS instance.")
+    parser.add_argument(
+        "--config-dir",
+        default=user_config_dir(appname="DMS", roaming=True),
+        help="DMS config directory (where the .env lives)",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    send = sub.add_parser("send", help="Send a profile's message (or another one)")
+    send.add_argument("message", nargs="?", help="Message to send instead of the profile's")
+    send.add_argument("-p", "--profile", help="Profile index or shortcut (default: primary)")
+    send.add_argument("-w", "--wait", action="store_true", help="Wait until it was sent")
+
+    sub.add_parser("profiles", help="List the profiles")
+    sub.add_parser("ping", help="Check that DMS is running")
+    args = parser.parse_args(argv)
+
+    try:
+        authkey = load_authkey(args.config_dir)
+        client = ControlClient(control_address(args.config_dir), authkey)
+    except (OSError, ValueError) as e:
+        print(f"DMS is not running (or not reachable): {e}", file=sys.stderr)
+        return 2
+
+    with client:
+        try:
+            if args.command == "send":
+                profile = args.profile
+                if profile is not None and profile.isdigit():
+                    profile = int(profile)
+                reply = client.send(profile, args.message, args.wait)
+            elif args.command == "profiles":
+                reply = client.profiles()
+            else:
+                reply = client.ping()
+        except ControlError as e:
+            print(f"DMS: {e}", file=sys.stderr)
+            return 1
+
+    print(json.dumps(reply))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import argparse
+import queue
+import signal
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from discord_message_shortcut.coalescer import HotkeyCoalescer
+from discord_message_shortcut.dms_manager import DMS_Manager, ShortcutProfile
+from discord_message_shortcut.hotkey_backend import HotkeyBackend, KeyboardBackend
+from discord_message_shortcut.hotkeys import HotkeyRegistry
+from discord_message_shortcut.metrics import SendTrace
+from discord_message_shortcut.outbox import SendDeferred
+
+# How often config edits and the metrics export are looked at (seconds)
+WATCH_INTERVAL = 1.0
+METRICS_EXPORT_INTERVAL = 10.0
+
+
+def _stderr(text: str) -> None:
+    print(text, file=sys.stderr, flush=True)
+
+
+class DmsDaemon:
+    """
+    The hotkey-to-message path of DMS without the tray: no Qt is imported.
+
+    Every profile with a shortcut and a channel is bound as soon as the daemon
+    runs. Config comes from the same .env as the tray app, and edits to it
+    (e.g. made from the tray app on another session) are picked up live.
+    Errors are printed to stderr.
+    """
+
+    def __init__(
+        self,
+        manager: Optional[DMS_Manager] = None,
+        backend: Optional[HotkeyBackend] = None,
+        log: Callable[[str], None] = _stderr,
+    ) -> None:
+        self.manager = manager or DMS_Manager(app_name="DMS")
+        self._hotkeys = HotkeyRegistry(backend or KeyboardBackend())
+        self._log = log
+        self.manager.on_persist_error = lambda e: self._log(f"DMS: failed to save settings: {e}")
+
+        # Work for the thread in `run`: config edits seen by the watcher, or None to stop
+        self._events: "queue.Queue[Optional[Dict[str, Optional[str]]]]" = queue.Queue()
+        self._exported_metrics_version = -1
+
+    def bind(self) -> int:
+        """
+        (Re)binds the hotkeys of every usable profile. Returns how many are bound.
+        """
+        try:
+            self._hotkeys.apply(self._bindings(), self._callback)
+        except ValueError as e:
+            self._log(f"DMS: failed to register hotkeys: {e}")
+        return len(self._hotkeys)
+
+    def run(self, watch: bool = True) -> None:
+        """
+        Binds the hotkeys and blocks until `stop` is called (or SIGINT/SIGTERM).
+        """
+        self.manager.start_replay()
+        try:
+            self.manager.start_control()
+        except OSError as e:
+            self._log(f"DMS: control socket unavailable: {e}")
+        if watch:
+            self.manager.start_watching(self._events.put, WATCH_INTERVAL)
+
+        bound = self.bind()
+        self._log(f"DMS: listening for {bound} shortcut(s)")
+        self.manager.start_warming()
+
+        try:
+            while True:
+                try:
+                    data = self._events.get(timeout=METRICS_EXPORT_INTERVAL)
+                except queue.Empty:
+                    self._export_metrics()
+                    continue
+                if data is None:
+                    break
+                # Applied here, on the thread that owns the manager
+                if self.manager.apply_external(data):
+                    self.bind()
+        finally:
+            self._hotkeys.close()
+            self.manager.stop_watching()
+            self.manager.stop_replay()
+            self.manager.stop_warming()
+            self.manager.stop_control()
+            self.manager.engine.shutdown(wait=False)
+            self.manager.flush()
+            self._export_metrics()
+
+    def stop(self) -> None:
+        """
+        Makes `run` return. Safe to call from any thread or a signal handler.
+        """
+        self._events.put(None)
+
+    # -------------------------
+    # Hotkeys
+    # -------------------------
+
+    def _bindings(self) -> List[Tuple[str, Hashable]]:
+        tuning = (self.manager.debounce_seconds, self.manager.merge_presses_enabled)
+        return [
+            (profile.shortcut, (profile, tuning))
+            for profile in self.manager.all_profiles()
+            if profile.shortcut and profile.channel_id
+        ]
+
+    def _callback(self, target: Hashable) -> Callable[[], None]:
+        profile, _ = target
+        coalescer = HotkeyCoalescer(
+            send=lambda message, trace, suffix: self._submit(message, trace, profile, suffix),
+            window=self.manager.debounce_seconds,
+            merge=self.manager.merge_presses_enabled,
+            schedule=self.manager.engine.call_later,
+        )
+        # Runs on the keyboard hook thread: only enqueue, never block here.
+        return lambda: coalescer.press(profile.message, SendTrace())
+
+    def _submit(
+        self, message: str, trace: SendTrace, profile: ShortcutProfile, suffix: str = ""
+    ) -> None:
+        try:
+            future = self.manager.send_message(message, trace, profile, suffix)
+        except Exception as e:
+            self._log(f"DMS: failed to send message: {e}")
+            return
+        future.add_done_callback(self._on_send_done)
+
+    def _on_send_done(self, future: Future) -> None:
+        if future.cancelled():
+            return
+        e = future.exception()
+        if isinstance(e, SendDeferred):
+            self._log(f"DMS: message not sent yet: {e}")
+        elif e is not None:
+            self._log(f"DMS: failed to send message: {e}")
+
+    def _export_metrics(self) -> None:
+        path = (self.manager.metrics_export_path or "").strip()
+        metrics = self.manager.metrics
+        if not path or metrics.version == self._exported_metrics_version:
+            return
+        try:
+            metrics.export(path)
+        except OSError as e:
+            self._log(f"DMS: failed to export metrics to {path}: {e}")
+            return
+        self._exported_metrics_version = metrics.version
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run DMS without the tray: only the hotkeys and the sender."
+    )
+    parser.add_argument(
+        "--env", help="Path of the .env config (defaults to the tray app's one)"
+    )
+    parser.add_argument(
+        "--no-watch", action="store_true", help="Don't reload the config when the file changes"
+    )
+    args = parser.parse_args(argv)
+
+    manager = DMS_Manager(app_name="DMS", env_path=args.env)
+    daemon = DmsDaemon(manager)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+
+    if not any(p.shortcut and p.channel_id for p in manager.all_profiles()):
+        _stderr(f"DMS: no shortcut configured in {manager.env_path}")
+        return 1
+
+    # Signal handlers only run on the main thread between waits, so it
+    # only polls while the daemon runs on its own thread
+    runner = threading.Thread(target=daemon.run, args=(not args.no_watch,), name="dms-daemon")
+    runner.start()
+    while runner.is_alive():
+        runner.join(0.5)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
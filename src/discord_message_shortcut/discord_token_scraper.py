@@ -1,41 +1,215 @@
-from selenium import webdriver
+import json
+import os
 import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from platformdirs import user_config_dir
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from discord_message_shortcut.env_persister import write_atomic
+
+LOGIN_URL = "https://discord.com/login"
+
+# How long the user has to log in, and how long the token may take to show
+# up in localStorage afterwards (seconds)
+LOGIN_TIMEOUT = 600.0
+TOKEN_TIMEOUT = 15.0
+POLL_INTERVAL = 0.1
+
+# With a saved session Discord leaves the login page on its own; if a
+# headless browser is still there after this, the session is gone
+HEADLESS_LOGIN_TIMEOUT = 20.0
+
+# A cached token younger than this is returned without opening a browser
+TOKEN_CACHE_MAX_AGE = 7 * 24 * 3600.0
+
+BROWSER_PROFILE_DIRNAME = "browser-profile"
+TOKEN_CACHE_FILENAME = "token_cache.json"
+
+TOKEN_SCRIPT = """
+try {
+    const iframe = document.createElement('iframe');
+    document.body.appendChild(iframe);
+    const token = JSON.parse(iframe.contentWindow.localStorage.token);
+    iframe.remove();
+    return token;
+} catch (e) {
+    return null;
+}
+"""
+
+Progress = Callable[[str], None]
+# (profile directory or None for a throwaway profile, headless) -> WebDriver
+DriverFactory = Callable[[Optional[str], bool], object]
+
+
+def default_data_dir(app_name: str = "DMS") -> str:
+    return user_config_dir(appname=app_name, roaming=True)
+
+
+def edge_driver(profile_dir: Optional[str], headless: bool):
+    options = webdriver.EdgeOptions()
+    if profile_dir is not None:
+        # App-owned profile: keeps the Discord session between runs
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument(f"--user-data-dir={profile_dir}")
+    if headless:
+        options.add_argument("--headless=new")
+    return webdriver.Edge(options=options)
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    token: str
+    obtained_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.obtained_at
+
 
+class TokenCache:
+    """
+    The last obtained token and when it was obtained, as a small JSON file.
+    """
 
-def get_discord_token():
-    driver = webdriver.Edge()
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def load(self) -> Optional[CachedToken]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return CachedToken(str(data["token"]), float(data["obtained_at"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, token: str) -> None:
+        # write_atomic creates the file readable by the current user only
+        write_atomic(self.path, json.dumps({"token": token, "obtained_at": time.time()}))
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _left_login_page(driver) -> bool:
+    return "login" not in driver.current_url
+
+
+def _read_token(driver) -> Optional[str]:
+    return driver.execute_script(TOKEN_SCRIPT) or None
+
+
+def _token_from_browser(
+    driver_factory: DriverFactory,
+    profile_dir: Optional[str],
+    headless: bool,
+    login_url: str,
+    login_timeout: float,
+    token_timeout: float,
+) -> str:
+    driver = driver_factory(profile_dir, headless)
     token = ""
 
     try:
-        driver.get("https://discord.com/login")
+        driver.get(login_url)
 
         # Wait until the user is no longer on the login page
-        while "login" in driver.current_url:
-            time.sleep(1)
-
-        # Small buffer to ensure storage is populated
-        time.sleep(2)
-
-        script_js = """
-        try {
-            const iframe = document.createElement('iframe');
-            document.body.appendChild(iframe);
-            const token = JSON.parse(iframe.contentWindow.localStorage.token);
-            iframe.remove();
-            return token;
-        } catch (e) {
-            return null;
-        }
-        """
-
-        token = driver.execute_script(script_js)
+        WebDriverWait(driver, login_timeout, poll_frequency=POLL_INTERVAL).until(
+            _left_login_page
+        )
+
+        # ...and until the app has put the token in localStorage
+        try:
+            token = WebDriverWait(driver, token_timeout, poll_frequency=POLL_INTERVAL).until(
+                _read_token
+            )
+        except TimeoutException:
+            token = ""
     finally:
         driver.quit()
 
     return str(token) if token else ""
 
+
+def get_discord_token(
+    driver_factory: DriverFactory = edge_driver,
+    login_url: str = LOGIN_URL,
+    login_timeout: float = LOGIN_TIMEOUT,
+    token_timeout: float = TOKEN_TIMEOUT,
+    progress: Optional[Progress] = None,
+    data_dir: Optional[str] = None,
+    use_cache: bool = True,
+    max_cache_age: float = TOKEN_CACHE_MAX_AGE,
+    stale_token: Optional[str] = None,
+) -> str:
+    """
+    Returns the Discord token, taking the cheapest route that works:
+    a recent cached token, then a headless browser reusing the saved
+    session, then a visible browser where the user logs in.
+    Blocks until done, so call it off the GUI thread.
+    Args:
+        driver_factory: Creates the WebDriver for a profile dir and headless
+            flag. Anything with `get`, `current_url`, `execute_script` and
+            `quit` works, e.g. a fake driver for tests.
+        login_url: Page to open, e.g. a local page for tests.
+        progress: Called with a short description of each step.
+        data_dir: Where the browser profile and token cache live; None
+            keeps neither (fresh profile, no cache).
+        use_cache: Return a cached token younger than `max_cache_age`.
+        stale_token: A token the caller already has (and presumably asks
+            again because it stopped working); never returned from the cache.
+    Returns:
+        str: The token, or "" if none was found in time.
+    """
+    report = progress or (lambda _: None)
+
+    profile_dir = cache = None
+    if data_dir is not None:
+        profile_dir = os.path.join(data_dir, BROWSER_PROFILE_DIRNAME)
+        cache = TokenCache(os.path.join(data_dir, TOKEN_CACHE_FILENAME))
+
+    if cache is not None and use_cache:
+        cached = cache.load()
+        if (
+            cached is not None
+            and cached.age < max_cache_age
+            and cached.token != stale_token
+        ):
+            report("Using cached token...")
+            return cached.token
+
+    token = ""
+    if profile_dir is not None and os.path.isdir(profile_dir):
+        report("Reusing saved browser session...")
+        try:
+            token = _token_from_browser(
+                driver_factory, profile_dir, True,
+                login_url, HEADLESS_LOGIN_TIMEOUT, token_timeout,
+            )
+        except WebDriverException:
+            # Still on the login page (the saved session expired), or the
+            # browser can't run headless here: fall back to a visible login
+            token = ""
+
+    if not token:
+        report("Waiting for login...")
+        token = _token_from_browser(
+            driver_factory, profile_dir, False, login_url, login_timeout, token_timeout
+        )
+
+    if token and cache is not None:
+        cache.save(token)
+    return token
+
 if __name__ == "__main__":
-    token = get_discord_token()
+    token = get_discord_token(progress=print, data_dir=default_data_dir())
     if token:
         print(f"Discord Token: {token}")
     else:
@@ -1,11 +1,56 @@
 import os
-from dataclasses import dataclass
-from typing import Optional, Dict
+import sqlite3
+import sys
+import threading
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional, Dict, List, Mapping, Tuple
 
 from dotenv import dotenv_values
 from platformdirs import user_config_dir
 
-from discord_message_shortcut.send_message import send_discord_message
+from discord_message_shortcut.coalescer import RecentPayloads
+from discord_message_shortcut.connection_pool import PooledResponse, get_default_pool
+from discord_message_shortcut.env_persister import EnvPersister
+from discord_message_shortcut.env_watcher import EnvFileWatcher
+from discord_message_shortcut.fanout import SendTarget, gather_fanout, parse_targets
+from discord_message_shortcut.metrics import (
+    MARK_ENQUEUED,
+    MARK_STARTED,
+    SPAN_CONFIG_PERSIST,
+    SPAN_KEEP_WARM,
+    SendMetrics,
+    SendTrace,
+    get_default_metrics,
+)
+from discord_message_shortcut.rate_limit import get_default_limiter
+from discord_message_shortcut.outbox import (
+    OUTBOX_FILENAME,
+    Outbox,
+    OutboxReplayer,
+    SendDeferred,
+    is_retryable,
+)
+from discord_message_shortcut.send_engine import QueueFullError, SendEngine, get_default_engine
+from discord_message_shortcut.send_message import (
+    DISCORD_API_HOST,
+    DISCORD_API_PORT,
+    PreparedMessageRequest,
+    prepare_message_request,
+    send_prepared_request,
+)
+from discord_message_shortcut.templates import ClipboardReader, TemplateCache
+from discord_message_shortcut.transport import (
+    DEFAULT_TRANSPORT,
+    Transport,
+    get_default_transport,
+    transport_names,
+)
+from discord_message_shortcut.warmup import (
+    KEEP_WARM_HEADERS,
+    KEEP_WARM_PATH,
+    ConnectionWarmer,
+)
 
 
 @dataclass(frozen=True)
@@ -16,11 +61,60 @@ class DmsEnvKeys:
     latest_channel_id: str = "DMS_LATEST_CHANNEL_ID"
     latest_shortcut: str = "DMS_LATEST_SHORTCUT"
     latest_message: str = "DMS_LATEST_MESSAGE"
+    metrics_export_path: str = "DMS_METRICS_EXPORT_PATH"
+    debounce_ms: str = "DMS_DEBOUNCE_MS"
+    merge_presses: str = "DMS_MERGE_PRESSES"
+    dedup_window_ms: str = "DMS_DEDUP_WINDOW_MS"
+    transport: str = "DMS_TRANSPORT"
+
+
+# Extra shortcut profiles are stored as DMS_PROFILE_<n>_<FIELD>, n starting at 1
+PROFILE_KEY_PREFIX = "DMS_PROFILE_"
+PROFILE_FIELDS = ("shortcut", "server_id", "channel_id", "message")
+
+
+@dataclass(frozen=True)
+class ShortcutProfile:
+    """
+    A hotkey mapped to the message it sends and the channel it goes to.
+    """
+
+    shortcut: str
+    server_id: str
+    channel_id: str
+    message: str
+
+
+def profile_env_key(index: int, field: str) -> str:
+    return f"{PROFILE_KEY_PREFIX}{index}_{field.upper()}"
+
+
+# Field name reported in change notifications for any DMS_PROFILE_* key
+PROFILES_FIELD = "profiles"
+
+
+DEFAULT_DEBOUNCE_MS = "250"
+DEFAULT_MERGE_PRESSES = "off"
+DEFAULT_DEDUP_WINDOW_MS = "0"
+
+_TRUTHY = ("1", "true", "yes", "on")
+
+
+def _ms_to_seconds(value: str) -> float:
+    try:
+        return max(0.0, float(value) / 1000.0)
+    except ValueError:
+        return 0.0
 
 
 class DMS_Manager:
     """
     Reads and writes a stable .env file from a per-user config directory.
+
+    The fields and profiles belong to the thread that edits them (the Qt
+    thread in the tray app, the main thread in the daemon). Other threads
+    (control connections, the keep-warm loop) read them while sending, so
+    every change and every read of more than one field holds `lock`.
     """
 
     def __init__(
@@ -28,8 +122,37 @@ class DMS_Manager:
         app_name: str = "DMS",
         env_filename: str = ".env",
         env_path: Optional[str] = None,
+        pool: Optional[Transport] = None,
+        engine: Optional[SendEngine] = None,
+        metrics: Optional[SendMetrics] = None,
+        api_host: str = DISCORD_API_HOST,
+        api_port: int = DISCORD_API_PORT,
     ) -> None:
         self._keys = DmsEnvKeys()
+        self._field_names = {key: field for field, key in asdict(self._keys).items()}
+        self.api_host = api_host
+        self.api_port = api_port
+        # An explicit pool wins over the DMS_TRANSPORT setting
+        self._explicit_pool = pool
+        self.pool: Transport = pool or get_default_pool()
+        self.engine = engine or get_default_engine()
+        self.metrics = metrics or get_default_metrics()
+        # Reentrant: sends may run while the caller already holds it
+        self.lock = threading.RLock()
+
+        # Ready-to-send requests (one per target channel) for every profile's
+        # message. Entries are kept across reloads and only rebuilt for
+        # profiles (or credentials) that change.
+        self._prepared: Dict[ShortcutProfile, Tuple[PreparedMessageRequest, ...]] = {}
+        self._prepared_credentials: Optional[Tuple[str, str, str]] = None
+        self.profiles: List[ShortcutProfile] = []
+
+        # Every profile's message compiled as a template, so a press only
+        # fills in the placeholders instead of parsing the text again
+        self._templates = TemplateCache()
+
+        # Payloads sent recently, to drop duplicates within dedup_window_ms
+        self._recent_payloads = RecentPayloads()
 
         if env_path is None:
             config_dir = user_config_dir(appname=app_name, roaming=True)
@@ -37,11 +160,39 @@ class DMS_Manager:
             env_path = os.path.join(config_dir, env_filename)
 
         self.env_path = env_path
+
+        # The in-memory fields are authoritative: edits are applied here and
+        # written to the file in the background.
+        self._persister = EnvPersister(
+            env_path, on_written=self._record_persisted, on_error=self._persist_failed
+        )
+        # Told when the .env file could not be written (the edits stay
+        # pending and are retried with the next one); on any thread
+        self.on_persist_error: Optional[Callable[[OSError], None]] = None
+        self._watcher: Optional[EnvFileWatcher] = None
+
+        # Every send is journaled here first, so none is lost to a network
+        # outage or a restart; the replayer retries them in the background.
+        outbox_dir = os.path.dirname(os.path.abspath(env_path))
+        self.outbox = Outbox(os.path.join(outbox_dir, OUTBOX_FILENAME))
+        self._replayer: Optional[OutboxReplayer] = None
+        self._warmer: Optional[ConnectionWarmer] = None
+        self._control = None
+
         self.reload_from_env()
 
     def reload_from_env(self) -> None:
+        # Pending edits are newer than the file, so write them out first
+        self._persister.flush()
         data = dotenv_values(self.env_path) if os.path.exists(self.env_path) else {}
+        with self.lock:
+            self._apply_values(data)
 
+    def _apply_values(self, data: Mapping[str, Optional[str]]) -> None:
+        """
+        Sets every field from `data` (env key -> value), normalized and with
+        defaults. The caller holds `lock`.
+        """
         self.discord_token = str(data.get(self._keys.discord_token) or "").strip()
         self.discord_user_id = str(data.get(self._keys.discord_user_id) or "").strip()
         self.latest_server_id = str(data.get(self._keys.latest_server_id) or "").strip()
@@ -53,24 +204,408 @@ class DMS_Manager:
         self.latest_message = str(data.get(self._keys.latest_message) or "Hello World from DMS!")
         self.latest_message = self.latest_message.strip() or "Hello World from DMS!"
 
-    def send_message(self, message: str) -> None:
-        send_discord_message(
+        self.metrics_export_path = str(
+            data.get(self._keys.metrics_export_path) or ""
+        ).strip()
+
+        self.debounce_ms = str(data.get(self._keys.debounce_ms) or DEFAULT_DEBOUNCE_MS)
+        self.debounce_ms = self.debounce_ms.strip() or DEFAULT_DEBOUNCE_MS
+        self.merge_presses = str(data.get(self._keys.merge_presses) or DEFAULT_MERGE_PRESSES)
+        self.merge_presses = self.merge_presses.strip() or DEFAULT_MERGE_PRESSES
+        self.dedup_window_ms = str(data.get(self._keys.dedup_window_ms) or DEFAULT_DEDUP_WINDOW_MS)
+        self.dedup_window_ms = self.dedup_window_ms.strip() or DEFAULT_DEDUP_WINDOW_MS
+        self._recent_payloads.window = self.dedup_window_seconds
+
+        self.transport = str(data.get(self._keys.transport) or DEFAULT_TRANSPORT).strip().lower()
+        if self.transport not in transport_names():
+            self.transport = DEFAULT_TRANSPORT
+        self._select_transport()
+
+        self.profiles = self._read_profiles(data)
+        self._compile_requests()
+
+    def start_watching(
+        self,
+        on_change: Callable[[Dict[str, Optional[str]]], None],
+        interval: float = 1.0,
+    ) -> None:
+        """
+        Watches the .env file for edits made outside DMS. `on_change` is called
+        from the watcher thread with the parsed file; pass it to
+        `apply_external` on the thread that owns the manager.
+        """
+        if self._watcher is not None:
+            return
+
+        def _changed() -> None:
+            on_change(dotenv_values(self.env_path))
+
+        self._watcher = EnvFileWatcher(self.env_path, _changed, interval).start()
+
+    def start_replay(self) -> None:
+        """
+        Starts resending outbox entries left undelivered, by this process or a
+        previous one. If another process is already replaying the outbox,
+        this one waits and takes over once that process exits.
+        """
+        if self._replayer is not None:
+            return
+        # self.pool is read per send: the transport may be switched meanwhile
+        self._replayer = OutboxReplayer(
+            self.outbox, lambda request: send_prepared_request(request, pool=self.pool)
+        ).start()
+
+    def stop_replay(self) -> None:
+        if self._replayer is not None:
+            self._replayer.stop()
+            self._replayer = None
+
+    def start_warming(self) -> None:
+        """
+        Opens connections to the API in the background and keeps them warm
+        until `stop_warming`, so that not even the first press pays for the
+        DNS lookup and the TCP and TLS handshakes. Call it when the hotkeys
+        go live.
+        """
+        if self._warmer is not None:
+            return
+        self._warmer = ConnectionWarmer(
+            self._warm_connections, on_warmed=self._record_warmed
+        ).start()
+
+    def stop_warming(self) -> None:
+        if self._warmer is not None:
+            self._warmer.stop()
+            self._warmer = None
+
+    def start_control(self) -> None:
+        """
+        Opens the local control socket through which other processes trigger
+        sends (see `control.ControlClient`). Only the process that sends
+        should open it.
+        Raises:
+            OSError: If the socket could not be created.
+        """
+        if self._control is not None:
+            return
+        # multiprocessing.connection is only worth importing once it is used
+        from discord_message_shortcut.control import (
+            ControlServer,
+            ManagerHandler,
+            control_address,
+            load_authkey,
+        )
+
+        config_dir = os.path.dirname(os.path.abspath(self.env_path))
+        self._control = ControlServer(
+            control_address(config_dir),
+            load_authkey(config_dir, create=True),
+            ManagerHandler(self),
+        ).start()
+
+    def stop_control(self) -> None:
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def apply_external(self, data: Mapping[str, Optional[str]]) -> List[str]:
+        """
+        Applies values parsed from an external edit of the .env file.
+        Returns:
+            List[str]: The names of the fields that changed, with every
+                profile key reported as PROFILES_FIELD.
+        """
+        if self._persister.pending:
+            # Our own edit is about to overwrite the file; keep it
+            return []
+
+        with self.lock:
+            before = self.get_env_vars()
+            self._apply_values(data)
+            after = self.get_env_vars()
+
+        changed: List[str] = []
+        for key in list(before) + [k for k in after if k not in before]:
+            if before.get(key) == after.get(key):
+                continue
+            field = self._field_names.get(key, PROFILES_FIELD)
+            if field not in changed:
+                changed.append(field)
+        return changed
+
+    def _read_profiles(self, data: Mapping[str, Optional[str]]) -> List[ShortcutProfile]:
+        profiles: List[ShortcutProfile] = []
+        index = 1
+        while any(profile_env_key(index, f) in data for f in PROFILE_FIELDS):
+            values = {
+                f: str(data.get(profile_env_key(index, f)) or "").strip()
+                for f in PROFILE_FIELDS
+            }
+            profiles.append(ShortcutProfile(**values))
+            index += 1
+        return profiles
+
+    @property
+    def primary_profile(self) -> ShortcutProfile:
+        """
+        The profile made of the latest_* fields, always bound first.
+        """
+        return ShortcutProfile(
+            shortcut=self.latest_shortcut,
+            server_id=self.latest_server_id,
+            channel_id=self.latest_channel_id,
+            message=self.latest_message,
+        )
+
+    def all_profiles(self) -> List[ShortcutProfile]:
+        with self.lock:
+            return [self.primary_profile] + self.profiles
+
+    @property
+    def prepared_request(self) -> PreparedMessageRequest:
+        return self.prepared_request_for(self.primary_profile)
+
+    def prepared_request_for(self, profile: ShortcutProfile) -> PreparedMessageRequest:
+        return self.prepared_requests_for(profile)[0]
+
+    def prepared_requests_for(
+        self, profile: ShortcutProfile
+    ) -> Tuple[PreparedMessageRequest, ...]:
+        requests = self._prepared.get(profile)
+        if requests is None:
+            requests = self._prepare_profile(profile)
+        return requests
+
+    def targets_for(self, profile: ShortcutProfile) -> List[SendTarget]:
+        """
+        The channels a profile sends to: its channel field may list several.
+        """
+        # Profiles without their own server share the primary one
+        server_id = profile.server_id or self.latest_server_id
+        return parse_targets(profile.channel_id, server_id) or [
+            SendTarget(server_id, profile.channel_id)
+        ]
+
+    def set_clipboard_reader(self, reader: ClipboardReader) -> None:
+        """
+        Sets where {clipboard} placeholders read from. `reader` is called on
+        the thread that sends, so it must not touch GUI objects.
+        """
+        self._templates.set_clipboard(reader)
+
+    @property
+    def debounce_seconds(self) -> float:
+        return _ms_to_seconds(self.debounce_ms)
+
+    @property
+    def merge_presses_enabled(self) -> bool:
+        return self.merge_presses.lower() in _TRUTHY
+
+    @property
+    def dedup_window_seconds(self) -> float:
+        return _ms_to_seconds(self.dedup_window_ms)
+
+    def _select_transport(self) -> None:
+        if self._explicit_pool is not None:
+            return
+        try:
+            self.pool = get_default_transport(self.transport)
+        except ImportError:
+            # The optional backend isn't installed: keep sending over HTTP/1.1
+            self.pool = get_default_pool()
+
+    def _compile_requests(self) -> None:
+        # The primary server id is the fallback of every profile without one
+        credentials = (self.discord_token, self.discord_user_id, self.latest_server_id)
+        previous = self._prepared if credentials == self._prepared_credentials else {}
+
+        profiles = self.all_profiles()
+        self._templates.compile(profile.message for profile in profiles)
+
+        # Static messages are sent as prepared here; templated ones start from
+        # this request and only swap in the rendered body
+        self._prepared_credentials = credentials
+        self._prepared = {
+            profile: previous.get(profile) or self._prepare_profile(profile)
+            for profile in profiles
+        }
+
+    def _prepare_profile(self, profile: ShortcutProfile) -> Tuple[PreparedMessageRequest, ...]:
+        template = self._templates.get(profile.message)
+        # Rendering a template here would use up a {counter} value
+        message = template.render() if template.is_static else profile.message
+        return tuple(self._prepare(message, target) for target in self.targets_for(profile))
+
+    def _prepare(self, message: str, target: SendTarget) -> PreparedMessageRequest:
+        return prepare_message_request(
             message=message,
             discord_token=self.discord_token,
             discord_user_id=self.discord_user_id,
-            server_id=self.latest_server_id,
-            channel_id=self.latest_channel_id,
+            server_id=target.server_id,
+            channel_id=target.channel_id,
+            host=self.api_host,
+            port=self.api_port,
         )
 
+    def send_message(
+        self,
+        message: str,
+        trace: Optional[SendTrace] = None,
+        profile: Optional[ShortcutProfile] = None,
+        suffix: str = "",
+    ) -> Future:
+        """
+        Queues a send on the shared send engine and returns its future.
+        The message goes to the channel of `profile` (the primary profile by default).
+        Template placeholders in the message are filled in now; `suffix` (e.g.
+        the " (x3)" of merged presses) is added as is after them.
+        Identical sends still waiting in the queue are merged into one.
+        A send the full queue has no room for stays in the outbox and the
+        future fails with SendDeferred.
+        The send is timed into `metrics`, starting from `trace` if given.
+
+        If the profile lists several channels, the message is sent to each of
+        them side by side and the returned future resolves to a FanoutReport
+        (see `gather_fanout`).
+        """
+        trace = trace or SendTrace()
+        with self.lock:
+            profile = profile or self.primary_profile
+            requests = self.prepared_requests_for(profile)
+            targets = self.targets_for(profile)
+            template = self._templates.get(profile.message)
+            if message != profile.message or not template.is_static or suffix:
+                if message != profile.message:
+                    template = self._templates.get(message)
+                rendered = template.render() + suffix
+                requests = tuple(request.with_message(rendered) for request in requests)
+
+        if len(requests) == 1:
+            return self._submit(requests[0], trace)
+
+        # Channels already waiting on their rate-limit bucket go last, so they
+        # don't hold a sender while the others could go out
+        limiter = get_default_limiter()
+        order = sorted(range(len(requests)), key=lambda i: limiter.delay_for(requests[i].route))
+        traces = [trace] + [trace.copy() for _ in order[1:]]
+        futures: Dict[int, Future] = {}
+        for i, target_trace in zip(order, traces):
+            futures[i] = self._submit(requests[i], target_trace)
+        return gather_fanout(targets, [futures[i] for i in range(len(requests))])
+
+    def _submit(self, request: PreparedMessageRequest, trace: SendTrace) -> Future:
+        if self._recent_payloads.seen((request.path, request.body)):
+            # Same payload to the same channel within the dedup window
+            self.metrics.record_dropped()
+            future: Future = Future()
+            future.cancel()
+            return future
+
+        try:
+            entry_id: Optional[int] = self.outbox.append(request)
+        except sqlite3.Error:
+            # Sending matters more than journaling it
+            entry_id = None
+
+        pool = self.pool
+        metrics = self.metrics
+
+        def _job() -> PooledResponse:
+            trace.mark(MARK_STARTED)
+            try:
+                resp = send_prepared_request(request, pool=pool, trace=trace)
+            except Exception as e:
+                metrics.record(trace, error=e)
+                if entry_id is not None and is_retryable(e):
+                    self._retry_later(entry_id, e)
+                    raise SendDeferred(
+                        f"{e}\n\nThe message was kept and will be sent when possible."
+                    ) from e
+                self._finish_entry(entry_id, error=str(e))
+                raise
+            self._finish_entry(entry_id)
+            metrics.record(trace)
+            return resp
+
+        trace.mark(MARK_ENQUEUED)
+        result: Future = Future()
+        try:
+            queued, merged = self.engine.submit_or_merge(_job, merge_key=request)
+        except QueueFullError as e:
+            self._keep_dropped(entry_id, e, result)
+            return result
+        if merged:
+            # The queued job sends (and journals) the same request
+            self._finish_entry(entry_id)
+        queued.add_done_callback(lambda done: self._forward(done, result, entry_id))
+        return result
+
+    def _forward(self, queued: Future, result: Future, entry_id: Optional[int]) -> None:
+        if queued.cancelled():
+            # Dropped by the engine (queue full) before it was attempted
+            self._keep_dropped(entry_id, QueueFullError("Send queue is full"), result)
+            return
+        error = queued.exception()
+        if error is not None:
+            result.set_exception(error)
+        else:
+            result.set_result(queued.result())
+
+    def _keep_dropped(self, entry_id: Optional[int], error: Exception, result: Future) -> None:
+        self.metrics.record_dropped()
+        if entry_id is None:
+            # Not journaled, so nothing will send it later
+            result.cancel()
+            return
+        # Left pending: the replayer sends it once the queue has room
+        self._retry_later(entry_id, error)
+        deferred = SendDeferred(f"{error}\n\nThe message was kept and will be sent when possible.")
+        deferred.__cause__ = error
+        result.set_exception(deferred)
+
+    def _finish_entry(self, entry_id: Optional[int], error: Optional[str] = None) -> None:
+        if entry_id is None:
+            return
+        try:
+            self.outbox.mark_done(entry_id, error=error)
+        except sqlite3.Error:
+            return
+        replayer = self._replayer
+        if replayer is not None:
+            replayer.note_done()
+
+    def _retry_later(self, entry_id: int, error: Exception) -> None:
+        try:
+            self.outbox.retry_later(entry_id, str(error))
+        except sqlite3.Error:
+            return
+        replayer = self._replayer
+        if replayer is not None:
+            replayer.wake()
+
     def get_env_vars(self) -> Dict[str, str]:
-        return {
+        env_vars = {
             self._keys.discord_token: self.discord_token,
             self._keys.discord_user_id: self.discord_user_id,
             self._keys.latest_server_id: self.latest_server_id,
             self._keys.latest_channel_id: self.latest_channel_id,
             self._keys.latest_shortcut: self.latest_shortcut,
             self._keys.latest_message: self.latest_message,
+            self._keys.metrics_export_path: self.metrics_export_path,
+            self._keys.debounce_ms: self.debounce_ms,
+            self._keys.merge_presses: self.merge_presses,
+            self._keys.dedup_window_ms: self.dedup_window_ms,
+            self._keys.transport: self.transport,
         }
+        for index, profile in enumerate(self.profiles, start=1):
+            for field in PROFILE_FIELDS:
+                env_vars[profile_env_key(index, field)] = getattr(profile, field)
+        return env_vars
 
     def save_to_env(
         self,
@@ -80,29 +615,102 @@ class DMS_Manager:
         channel_id: Optional[str] = None,
         latest_shortcut: Optional[str] = None,
         latest_message: Optional[str] = None,
+        metrics_export_path: Optional[str] = None,
+        debounce_ms: Optional[str] = None,
+        merge_presses: Optional[str] = None,
+        dedup_window_ms: Optional[str] = None,
+        transport: Optional[str] = None,
     ) -> None:
-        # Update in-memory first
-        if discord_token is not None:
-            self.discord_token = discord_token
-        if discord_user_id is not None:
-            self.discord_user_id = discord_user_id
-        if server_id is not None:
-            self.latest_server_id = server_id
-        if channel_id is not None:
-            self.latest_channel_id = channel_id
-        if latest_shortcut is not None:
-            self.latest_shortcut = latest_shortcut
-        if latest_message is not None:
-            self.latest_message = latest_message
-
-        os.makedirs(os.path.dirname(self.env_path), exist_ok=True)
-
-        # Persist
+        """
+        Applies the given fields in memory and schedules writing the .env file.
+        Returns without touching the disk; see `flush`.
+        """
+        with self.lock:
+            if discord_token is not None:
+                self.discord_token = discord_token
+            if discord_user_id is not None:
+                self.discord_user_id = discord_user_id
+            if server_id is not None:
+                self.latest_server_id = server_id
+            if channel_id is not None:
+                self.latest_channel_id = channel_id
+            if latest_shortcut is not None:
+                self.latest_shortcut = latest_shortcut
+            if latest_message is not None:
+                self.latest_message = latest_message
+            if metrics_export_path is not None:
+                self.metrics_export_path = metrics_export_path
+            if debounce_ms is not None:
+                self.debounce_ms = debounce_ms
+            if merge_presses is not None:
+                self.merge_presses = merge_presses
+            if dedup_window_ms is not None:
+                self.dedup_window_ms = dedup_window_ms
+            if transport is not None:
+                self.transport = transport
+
+            self._commit()
+
+    def save_profile(self, profile: ShortcutProfile, index: Optional[int] = None) -> None:
+        """
+        Replaces the profile at `index` of `profiles`, or appends it if None.
+        """
+        with self.lock:
+            if index is None:
+                self.profiles.append(profile)
+            else:
+                self.profiles[index] = profile
+            self._commit()
+
+    def remove_profile(self, index: int) -> None:
+        with self.lock:
+            del self.profiles[index]
+            self._commit()
+
+    def flush(self) -> None:
+        """
+        Blocks until pending edits are written to the .env file, or the write
+        failed (see `on_persist_error` and `unsaved_changes`).
+        """
+        self._persister.flush()
+
+    @property
+    def unsaved_changes(self) -> bool:
+        return self._persister.pending
+
+    def _persist_failed(self, error: OSError) -> None:
+        handler = self.on_persist_error
+        if handler is not None:
+            handler(error)
+        else:
+            print(f"DMS: failed to save {self.env_path}: {error}", file=sys.stderr, flush=True)
+
+    def _commit(self) -> None:
+        # The caller holds `lock`
         env_vars = self.get_env_vars()
-        with open(self.env_path, "w", encoding="utf-8") as f:
-            for key, value in env_vars.items():
-                escaped = (value or "").replace('"', '\\"')
-                f.write(f'{key}="{escaped}"\n')
+        # Normalize the same way a reload would, without re-reading the file
+        self._apply_values(env_vars)
+        self._persister.schedule(self.get_env_vars())
 
-        # Reload from file to normalize and ensure consistency
-        self.reload_from_env()
+    def _warm_connections(self) -> int:
+        # As many as the widest fan-out sends at once. Read every round:
+        # the profiles and the transport may change while warming.
+        count = max(len(self.targets_for(profile)) for profile in self.all_profiles())
+        return self.pool.warm(
+            self.api_host,
+            KEEP_WARM_PATH,
+            KEEP_WARM_HEADERS,
+            port=self.api_port,
+            count=min(count, self.engine.concurrency),
+        )
+
+    def _record_warmed(self, warmed: int, elapsed_us: int) -> None:
+        if warmed:
+            self.metrics.record_value(SPAN_KEEP_WARM, elapsed_us)
+
+    def _record_persisted(self, elapsed_us: int) -> None:
+        # Our own write is not an external change
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.mark_known()
+        self.metrics.record_value(SPAN_CONFIG_PERSIST, elapsed_us)
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+def format_env(env_vars: Dict[str, str]) -> str:
+    lines = []
+    for key, value in env_vars.items():
+        escaped = (value or "").replace('"', '\\"')
+        lines.append(f'{key}="{escaped}"\n')
+    return "".join(lines)
+
+
+def write_atomic(path: str, text: str) -> None:
+    """
+    Replaces `path` with `text` so readers (and a crash) see either the old or
+    the new content: write a temp file next to it, fsync, then rename over it.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable. Directories can't be opened on Windows,
+    # where os.replace is already durable once it returns.
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class EnvPersister:
+    """
+    Write-behind persistence for the .env file.
+
+    `schedule` only stores a snapshot of the config and returns; a background
+    timer writes it `delay` seconds later. Snapshots scheduled before that
+    replace each other, so a burst of edits costs a single write.
+    A failed write is reported to `on_error`, on the thread that tried it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        delay: float = 0.2,
+        on_written: Optional[Callable[[int], None]] = None,
+        on_error: Optional[Callable[[OSError], None]] = None,
+    ) -> None:
+        self.path = path
+        self.delay = delay
+        self._on_written = on_written
+        self._on_error = on_error
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: Optional[Dict[str, str]] = None
+        self._timer: Optional[threading.Timer] = None
+
+        self.writes = 0
+        self.coalesced = 0
+        self.last_error: Optional[OSError] = None
+
+    @property
+    def pending(self) -> bool:
+        return self._pending is not None
+
+    def schedule(self, env_vars: Dict[str, str]) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = dict(env_vars)
+
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """
+        Writes the pending snapshot now, if any. Safe to call from any thread.
+        """
+        with self._write_lock:
+            with self._lock:
+                env_vars, self._pending = self._pending, None
+                timer, self._timer = self._timer, None
+            if timer is not None:
+                timer.cancel()
+            if env_vars is None:
+                return
+
+            start = time.perf_counter_ns()
+            try:
+                write_atomic(self.path, format_env(env_vars))
+            except OSError as e:
+                # Keep the snapshot (unless a newer one arrived) so the next
+                # edit or flush retries it
+                self.last_error = e
+                with self._lock:
+                    if self._pending is None:
+                        self._pending = env_vars
+                if self._on_error is not None:
+                    self._on_error(e)
+                return
+
+            self.writes += 1
+            self.last_error = None
+            if self._on_written is not None:
+                self._on_written((time.perf_counter_ns() - start) // 1000)
@@ -0,0 +1,152 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Optional, Tuple
+
+# (inode, size, mtime in ns): changes on every write, including atomic replaces
+FileSignature = Tuple[int, int, int]
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+
+_INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def file_signature(path: str) -> Optional[FileSignature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class _Inotify:
+    """
+    Minimal ctypes binding watching one directory for changes to one file name.
+    The directory is watched (not the file) so atomic replaces are seen too.
+    """
+
+    def __init__(self, path: str) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._name = os.path.basename(path).encode()
+
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), _INOTIFY_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, os.strerror(errno))
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Waits up to `timeout` seconds. Returns True if the watched file was touched.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+
+        touched = False
+        while True:
+            try:
+                buf = os.read(self._fd, 4096)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buf):
+                _, _, _, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+                start = offset + _EVENT_HEADER.size
+                if buf[start : start + name_len].rstrip(b"\0") == self._name:
+                    touched = True
+                offset = start + name_len
+        return touched
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class EnvFileWatcher:
+    """
+    Calls `on_change` from a background thread whenever the watched file
+    changes on disk. Uses inotify on Linux and polls the file's
+    inode/size/mtime elsewhere (or if inotify is unavailable).
+
+    Changes the process made itself can be skipped by calling `mark_known`
+    right after writing the file.
+    """
+
+    def __init__(
+        self, path: str, on_change: Callable[[], None], interval: float = 1.0
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self._on_change = on_change
+        self._known = file_signature(path)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._inotify: Optional[_Inotify] = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(path)
+            except (OSError, AttributeError):
+                self._inotify = None
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def start(self) -> "EnvFileWatcher":
+        self._thread = threading.Thread(target=self._run, name="dms-env-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        # The thread notices within `interval` seconds and closes inotify itself
+        self._stop.set()
+
+    def mark_known(self) -> None:
+        self._known = file_signature(self.path)
+
+    def check(self) -> bool:
+        """
+        Calls `on_change` if the file differs from the last known version.
+        """
+        signature = file_signature(self.path)
+        if signature == self._known:
+            return False
+        self._known = signature
+        if signature is None:
+            # Deleted: keep the in-memory config until it is written again
+            return False
+        self._on_change()
+        return True
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                if self._inotify is not None:
+                    if not self._inotify.wait(self.interval):
+                        continue
+                elif self._stop.wait(self.interval):
+                    break
+                try:
+                    self.check()
+                except Exception:
+                    # A bad edit must not stop the watcher; the next one retries
+                    pass
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
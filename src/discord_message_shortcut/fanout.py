@@ -0,0 +1,141 @@
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from discord_message_shortcut.outbox import SendDeferred
+
+# A profile's channel field may list several targets separated by commas,
+# each either `<channel id>` or `<server id>/<channel id>`
+TARGET_SEPARATOR = ","
+SERVER_SEPARATOR = "/"
+
+
+@dataclass(frozen=True)
+class SendTarget:
+    server_id: str
+    channel_id: str
+
+
+def parse_targets(channel_field: str, default_server_id: str) -> List[SendTarget]:
+    """
+    Splits a channel field into its targets, in order and without duplicates.
+    Targets without a server use `default_server_id`.
+    """
+    targets: List[SendTarget] = []
+    for item in channel_field.split(TARGET_SEPARATOR):
+        item = item.strip()
+        if not item:
+            continue
+        server_id, _, channel_id = item.rpartition(SERVER_SEPARATOR)
+        target = SendTarget(server_id.strip() or default_server_id, channel_id.strip())
+        if target.channel_id and target not in targets:
+            targets.append(target)
+    return targets
+
+
+@dataclass(frozen=True)
+class TargetResult:
+    target: SendTarget
+    status: Optional[int]
+    error: Optional[str]
+    deferred: bool = False
+    dropped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.dropped
+
+
+@dataclass(frozen=True)
+class FanoutReport:
+    """
+    The outcome of one message sent to several channels.
+    """
+
+    results: Tuple[TargetResult, ...]
+    elapsed: float
+
+    @property
+    def sent(self) -> int:
+        return sum(1 for r in self.results if r.ok)
+
+    @property
+    def deferred(self) -> int:
+        return sum(1 for r in self.results if r.deferred)
+
+    @property
+    def failed(self) -> List[TargetResult]:
+        return [r for r in self.results if r.error is not None and not r.deferred]
+
+    def summary_text(self) -> str:
+        lines = [f"Sent to {self.sent}/{len(self.results)} channels in {self.elapsed * 1000:.0f} ms"]
+        for r in self.results:
+            if r.ok:
+                continue
+            what = "dropped" if r.dropped else r.error
+            if r.deferred:
+                what = f"will retry ({r.error.splitlines()[0]})"
+            lines.append(f"#{r.target.channel_id}: {what}")
+        return "\n".join(lines)
+
+
+class FanoutError(Exception):
+    """
+    Raised (through the fan-out future) when some targets failed for good.
+    """
+
+    def __init__(self, report: FanoutReport) -> None:
+        self.report = report
+        super().__init__(report.summary_text())
+
+
+def gather_fanout(targets: Sequence[SendTarget], futures: Sequence[Future]) -> Future:
+    """
+    Combines the futures of a fan-out into one, resolved once every target
+    is done: with the FanoutReport if every send went out (or was dropped as
+    a duplicate), else with FanoutError, or SendDeferred if the failures are
+    all kept for a retry.
+    """
+    start = time.perf_counter()
+    combined: Future = Future()
+    combined.set_running_or_notify_cancel()
+
+    lock = threading.Lock()
+    remaining = len(futures)
+
+    def _done(_: Future) -> None:
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            if remaining:
+                return
+        report = FanoutReport(
+            tuple(_result(t, f) for t, f in zip(targets, futures)),
+            time.perf_counter() - start,
+        )
+        if report.failed:
+            combined.set_exception(FanoutError(report))
+        elif report.deferred:
+            combined.set_exception(SendDeferred(report.summary_text()))
+        else:
+            combined.set_result(report)
+
+    if not futures:
+        combined.set_result(FanoutReport((), 0.0))
+    for future in futures:
+        future.add_done_callback(_done)
+    return combined
+
+
+def _result(target: SendTarget, future: Future) -> TargetResult:
+    if future.cancelled():
+        return TargetResult(target, None, None, dropped=True)
+    error = future.exception()
+    if error is None:
+        return TargetResult(target, getattr(future.result(), "status", None), None)
+    status = getattr(error, "status", None)
+    if isinstance(error, SendDeferred):
+        status = getattr(error.__cause__, "status", None)
+    return TargetResult(target, status, str(error), deferred=isinstance(error, SendDeferred))
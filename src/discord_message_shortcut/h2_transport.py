@@ -0,0 +1,428 @@
+import socket
+import ssl
+import threading
+import time
+from http import HTTPStatus
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+import h2.config
+import h2.connection
+import h2.errors
+import h2.events
+import h2.exceptions
+
+from discord_message_shortcut.connection_pool import (
+    EncodedHeaders,
+    PooledResponse,
+    ResponseLost,
+)
+from discord_message_shortcut.metrics import (
+    MARK_CONNECTED,
+    MARK_FIRST_BYTE,
+    MARK_WRITTEN,
+    SendTrace,
+)
+
+_Key = Tuple[str, int]
+
+# Headers HTTP/2 forbids (RFC 9113 8.2.2); `host` becomes :authority
+_CONNECTION_HEADERS = {b"host", b"connection", b"keep-alive", b"transfer-encoding", b"upgrade"}
+
+
+class _RefusedStream(ConnectionResetError):
+    """
+    The server reset a stream without processing it (REFUSED_STREAM).
+    """
+
+
+class _Stream:
+    __slots__ = ("stream_id", "done", "status", "headers", "body", "error", "trace")
+
+    def __init__(self, trace: Optional[SendTrace]) -> None:
+        self.stream_id = 0
+        self.done = threading.Event()
+        self.status = 0
+        self.headers: Dict[str, str] = {}
+        self.body: List[bytes] = []
+        self.error: Optional[BaseException] = None
+        self.trace = trace
+
+
+class _H2Connection:
+    """
+    One HTTP/2 connection: requests are streams written under a lock, and a
+    reader thread routes response frames to the stream waiting for them.
+    """
+
+    def __init__(
+        self,
+        key: _Key,
+        timeout: float,
+        secure: bool,
+        ssl_context: Optional[ssl.SSLContext],
+        session: Optional[ssl.SSLSession] = None,
+    ) -> None:
+        host, port = key
+        sock = socket.create_connection((host, port), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if secure:
+            sock = ssl_context.wrap_socket(sock, server_hostname=host, session=session)
+            if sock.selected_alpn_protocol() != "h2":
+                sock.close()
+                raise ConnectionError(
+                    f"{host} did not negotiate HTTP/2 (does the SSL context offer ALPN h2?)"
+                )
+        # The reader blocks in recv; timeouts are per request instead
+        sock.settimeout(None)
+
+        self.timeout = timeout
+        self.authority = host if port in (80, 443) else f"{host}:{port}"
+        self.scheme = "https" if secure else "http"
+        self.alive = True
+        self.resumed = secure and sock.session_reused
+        # This connection's TLS session, once the first response came in
+        self.session: Optional[ssl.SSLSession] = None
+
+        self._sock = sock
+        self._lock = threading.Lock()
+        self._window_open = threading.Condition(self._lock)
+        self._streams: Dict[int, _Stream] = {}
+
+        self._conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=True, header_encoding=None)
+        )
+        self._conn.initiate_connection()
+        self._sock.sendall(self._conn.data_to_send())
+
+        self._reader = threading.Thread(target=self._read, name="dms-h2-reader", daemon=True)
+        self._reader.start()
+
+    def open_stream(
+        self,
+        method: str,
+        path: str,
+        body: bytes,
+        headers: List[Tuple[bytes, bytes]],
+        trace: Optional[SendTrace],
+    ) -> _Stream:
+        stream = _Stream(trace)
+        request_headers = [
+            (b":method", method.encode("ascii")),
+            (b":scheme", self.scheme.encode("ascii")),
+            (b":authority", self.authority.encode("ascii")),
+            (b":path", path.encode("ascii")),
+        ] + headers
+
+        deadline = time.monotonic() + self.timeout
+        with self._lock:
+            # Respect the server's limit on concurrent streams
+            while self.alive and (
+                self._conn.open_outbound_streams
+                >= self._conn.remote_settings.max_concurrent_streams
+            ):
+                self._wait_locked(deadline, "for a free HTTP/2 stream")
+            if not self.alive:
+                raise ConnectionResetError("HTTP/2 connection closed")
+
+            stream_id = stream.stream_id = self._conn.get_next_available_stream_id()
+            self._streams[stream_id] = stream
+            self._conn.send_headers(stream_id, request_headers, end_stream=not body)
+
+            sent = 0
+            while sent < len(body):
+                window = min(
+                    self._conn.local_flow_control_window(stream_id),
+                    self._conn.max_outbound_frame_size,
+                )
+                if window <= 0:
+                    self._sock.sendall(self._conn.data_to_send())
+                    try:
+                        self._wait_locked(deadline, "for the server's flow-control window")
+                    except TimeoutError:
+                        # The request is incomplete, so the server can't act on it
+                        self._streams.pop(stream_id, None)
+                        self._conn.reset_stream(stream_id, h2.errors.ErrorCodes.CANCEL)
+                        self._sock.sendall(self._conn.data_to_send())
+                        raise
+                    if not self.alive:
+                        raise ConnectionResetError("HTTP/2 connection closed")
+                    continue
+                chunk = body[sent : sent + window]
+                sent += len(chunk)
+                self._conn.send_data(stream_id, chunk, end_stream=sent == len(body))
+
+            self._sock.sendall(self._conn.data_to_send())
+        return stream
+
+    def _wait_locked(self, deadline: float, what: str) -> None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self._window_open.wait(remaining):
+            raise TimeoutError(f"Waited {self.timeout} s {what}")
+
+    def cancel(self, stream: _Stream) -> None:
+        """
+        Forgets a stream nobody waits for anymore and resets it on the server.
+        """
+        with self._lock:
+            if self._streams.pop(stream.stream_id, None) is None or not self.alive:
+                return
+            try:
+                self._conn.reset_stream(stream.stream_id, h2.errors.ErrorCodes.CANCEL)
+                self._sock.sendall(self._conn.data_to_send())
+            except (OSError, h2.exceptions.ProtocolError):
+                pass
+            # Frees a slot for streams waiting on max_concurrent_streams
+            self._window_open.notify_all()
+
+    def close(self) -> None:
+        with self._lock:
+            if self.alive:
+                try:
+                    self._conn.close_connection()
+                    self._sock.sendall(self._conn.data_to_send())
+                except (OSError, h2.exceptions.ProtocolError):
+                    pass
+        self._fail_all(ConnectionAbortedError("HTTP/2 connection closed"))
+        try:
+            # Wakes up the reader
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        # The TLS layer keeps the raw descriptor: closing it while the reader
+        # may still use it could make it write to whatever reuses the number
+        if threading.current_thread() is not self._reader:
+            self._reader.join(1.0)
+        with self._lock:
+            self._sock.close()
+
+    # -------------------------
+    # Reader
+    # -------------------------
+
+    def _read(self) -> None:
+        error: BaseException = ConnectionResetError("HTTP/2 connection closed by the server")
+        try:
+            while True:
+                data = self._sock.recv(65536)
+                if not data:
+                    break
+                with self._lock:
+                    events = self._conn.receive_data(data)
+                    finished = self._handle(events)
+                    if finished and self.session is None and isinstance(self._sock, ssl.SSLSocket):
+                        self.session = self._sock.session
+                    outgoing = self._conn.data_to_send()
+                    if outgoing:
+                        self._sock.sendall(outgoing)
+                    self._window_open.notify_all()
+                for stream in finished:
+                    stream.done.set()
+                if not self.alive:
+                    break
+        except (OSError, ValueError, h2.exceptions.ProtocolError) as e:
+            # ValueError: the TLS socket was shut down under us
+            error = e
+        self._fail_all(error)
+
+    def _handle(self, events) -> List[_Stream]:
+        finished: List[_Stream] = []
+        for event in events:
+            if isinstance(event, h2.events.ResponseReceived):
+                stream = self._streams.get(event.stream_id)
+                if stream is None:
+                    continue
+                if stream.trace is not None:
+                    stream.trace.mark(MARK_FIRST_BYTE)
+                for name, value in event.headers:
+                    if name == b":status":
+                        stream.status = int(value)
+                    else:
+                        stream.headers[name.decode("latin-1")] = value.decode("latin-1")
+                if stream.trace is not None:
+                    stream.trace.status = stream.status
+            elif isinstance(event, h2.events.DataReceived):
+                stream = self._streams.get(event.stream_id)
+                if stream is not None:
+                    stream.body.append(event.data)
+                self._conn.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                stream = self._streams.pop(event.stream_id, None)
+                if stream is not None:
+                    finished.append(stream)
+            elif isinstance(event, h2.events.StreamReset):
+                stream = self._streams.pop(event.stream_id, None)
+                if stream is not None:
+                    error = (
+                        _RefusedStream
+                        if event.error_code == h2.errors.ErrorCodes.REFUSED_STREAM
+                        else ConnectionResetError
+                    )
+                    stream.error = error(
+                        f"HTTP/2 stream reset by the server (error {event.error_code})"
+                    )
+                    finished.append(stream)
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                # GOAWAY: streams above the last one processed won't be answered
+                self.alive = False
+        return finished
+
+    def _fail_all(self, error: BaseException) -> None:
+        with self._lock:
+            self.alive = False
+            streams, self._streams = list(self._streams.values()), {}
+            self._window_open.notify_all()
+        for stream in streams:
+            stream.error = error
+            stream.done.set()
+
+
+class H2Transport:
+    """
+    Sends requests as streams of a single HTTP/2 connection per host, so
+    concurrent sends are multiplexed instead of each needing its own
+    connection (and TLS handshake). Reconnections resume the host's last TLS
+    session when the server allows it. Needs the optional `h2` package.
+
+    A given `ssl_context` is used as is, so it must offer HTTP/2 through ALPN
+    (`set_alpn_protocols(["h2"])`); by default one is created that does.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        secure: bool = True,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.secure = secure
+        if secure and ssl_context is None:
+            # One for every connection: TLS sessions only resume within a context
+            ssl_context = ssl.create_default_context()
+            ssl_context.set_alpn_protocols(["h2"])
+        self.ssl_context = ssl_context
+
+        self._lock = threading.Lock()
+        self._connections: Dict[_Key, _H2Connection] = {}
+        self._sessions: Dict[_Key, ssl.SSLSession] = {}
+
+        self.handshakes = 0
+        self.resumed_handshakes = 0
+
+    def request(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        body: Optional[Union[bytes, str]] = None,
+        headers: Optional[Union[Mapping[str, str], EncodedHeaders]] = None,
+        port: int = 443,
+        trace: Optional[SendTrace] = None,
+    ) -> PooledResponse:
+        """
+        Sends a request on the host's HTTP/2 connection and waits for the
+        whole response. A connection found closed is replaced once.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        encoded = _h2_headers(headers)
+        key = (host, port)
+
+        conn, reused = self._connection(key)
+        if trace is not None:
+            trace.mark(MARK_CONNECTED)
+        try:
+            stream = conn.open_stream(method, path, body or b"", encoded, trace)
+        except (ConnectionError, h2.exceptions.ProtocolError):
+            self._discard(key, conn)
+            if not reused:
+                raise
+            # Closed by the server while idle: retry on a fresh connection
+            conn, _ = self._connection(key)
+            stream = conn.open_stream(method, path, body or b"", encoded, trace)
+        if trace is not None:
+            trace.mark(MARK_WRITTEN)
+
+        if not stream.done.wait(self.timeout):
+            conn.cancel(stream)
+            raise ResponseLost(f"No HTTP/2 response from {host} within {self.timeout} s")
+        if stream.error is not None:
+            if not conn.alive:
+                self._discard(key, conn)
+            # else only this stream was reset: the others carry on
+            if isinstance(stream.error, _RefusedStream):
+                # Never processed (RFC 9113 8.7): safe to send again
+                raise stream.error
+            raise ResponseLost(f"No response to the request sent to {host}: {stream.error}")
+        if conn.session is not None:
+            self._sessions[key] = conn.session
+
+        try:
+            reason = HTTPStatus(stream.status).phrase
+        except ValueError:
+            reason = ""
+        return PooledResponse(
+            status=stream.status,
+            reason=reason,
+            headers=stream.headers,
+            body=b"".join(stream.body),
+        )
+
+    def warm(
+        self,
+        host: str,
+        path: str,
+        headers: Optional[Mapping[str, str]] = None,
+        port: int = 443,
+        count: int = 1,
+    ) -> int:
+        """
+        Opens (or keeps open) the host's connection with a cheap request.
+        One connection carries every send, so `count` is not used.
+        Returns:
+            int: 1 if the connection is warm, 0 if the request failed.
+        """
+        try:
+            self.request("GET", host, path, None, headers, port=port)
+        except Exception:
+            return 0
+        return 1
+
+    def close_all(self) -> None:
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            conn.close()
+
+    def _connection(self, key: _Key) -> Tuple[_H2Connection, bool]:
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is not None and conn.alive:
+                return conn, True
+            # Connect under the lock: concurrent first requests share one connection
+            conn = self._connections[key] = _H2Connection(
+                key, self.timeout, self.secure, self.ssl_context, self._sessions.get(key)
+            )
+            if self.secure:
+                self.handshakes += 1
+                self.resumed_handshakes += conn.resumed
+            return conn, False
+
+    def _discard(self, key: _Key, conn: _H2Connection) -> None:
+        with self._lock:
+            if self._connections.get(key) is conn:
+                del self._connections[key]
+        conn.close()
+
+
+def _h2_headers(
+    headers: Optional[Union[Mapping[str, str], EncodedHeaders]],
+) -> List[Tuple[bytes, bytes]]:
+    if headers is None:
+        return []
+    if isinstance(headers, Mapping):
+        pairs = [(k.lower().encode("ascii"), v.encode("latin-1")) for k, v in headers.items()]
+    else:
+        pairs = [(k.lower(), v) for k, v in headers]
+    return [(k, v) for k, v in pairs if k not in _CONNECTION_HEADERS]
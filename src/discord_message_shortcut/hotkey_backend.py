@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+
+# What a backend passes to hooks: `event_type` ("down"/"up"), `scan_code`
+# and `name`, like keyboard.KeyboardEvent.
+KeyEventCallback = Callable[[Any], None]
+
+
+class HotkeyBackend(Protocol):
+    """
+    Where keyboard events come from. Hotkeys only ever see scan codes: key
+    names are resolved to them once, when binding.
+    """
+
+    def hook(self, callback: KeyEventCallback) -> Any:
+        """
+        Calls `callback` with every key event until unhooked. Returns a handle.
+        """
+        ...
+
+    def unhook(self, handle: Any) -> None: ...
+
+    def scan_codes(self, name: str) -> Tuple[int, ...]:
+        """
+        The scan codes of the keys called `name`, empty if there is none.
+        """
+        ...
+
+
+class KeyboardBackend:
+    """
+    System-wide events from the `keyboard` package.
+    """
+
+    def __init__(self) -> None:
+        import keyboard
+
+        self._keyboard = keyboard
+
+    def hook(self, callback: KeyEventCallback) -> Any:
+        return self._keyboard.hook(callback)
+
+    def unhook(self, handle: Any) -> None:
+        self._keyboard.unhook(handle)
+
+    def scan_codes(self, name: str) -> Tuple[int, ...]:
+        return tuple(self._keyboard.key_to_scan_codes(name, error_if_missing=False))
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticEvent:
+    event_type: str
+    scan_code: int
+    name: str
+
+
+def _set1_scan_codes() -> Dict[str, Tuple[int, ...]]:
+    # PC scan code set 1 (what Linux reports) on a US layout
+    codes: Dict[str, Tuple[int, ...]] = {}
+    for row, first in (("1234567890-=", 2), ("qwertyuiop[]", 16), ("asdfghjkl;'`", 30)):
+        for offset, char in enumerate(row):
+            codes[char] = (first + offset,)
+    for offset, char in enumerate("zxcvbnm,./"):
+        codes[char] = (44 + offset,)
+    for n in range(1, 11):
+        codes[f"f{n}"] = (58 + n,)
+    codes.update(
+        {
+            "\\": (43,),
+            "+": (78,),
+            "plus": (78,),
+            "º": (41,),
+            "esc": (1,),
+            "backspace": (14,),
+            "tab": (15,),
+            "enter": (28,),
+            "space": (57,),
+            "caps lock": (58,),
+            "f11": (87,),
+            "f12": (88,),
+            "left ctrl": (29,),
+            "right ctrl": (97,),
+            "ctrl": (29, 97),
+            "left shift": (42,),
+            "right shift": (54,),
+            "shift": (42, 54),
+            "left alt": (56,),
+            "right alt": (100,),
+            "alt gr": (100,),
+            "alt": (56, 100),
+            "left windows": (125,),
+            "right windows": (126,),
+            "windows": (125, 126),
+        }
+    )
+    return codes
+
+
+class SyntheticBackend:
+    """
+    An in-process event source with fixed scan codes: keystrokes are fed by
+    the caller and delivered synchronously, on the caller's thread. Needs no
+    keyboard, display or privileges, so hotkey handling can be driven and
+    timed anywhere.
+    """
+
+    def __init__(self, scan_codes: Optional[Dict[str, Tuple[int, ...]]] = None) -> None:
+        self._codes = scan_codes if scan_codes is not None else _set1_scan_codes()
+        self._hooks: List[KeyEventCallback] = []
+
+    def hook(self, callback: KeyEventCallback) -> Any:
+        self._hooks.append(callback)
+        return callback
+
+    def unhook(self, handle: Any) -> None:
+        self._hooks.remove(handle)
+
+    def scan_codes(self, name: str) -> Tuple[int, ...]:
+        return self._codes.get(name.strip().lower(), ())
+
+    def event(self, event_type: str, name: str) -> SyntheticEvent:
+        """
+        Builds the event of key `name` going "down" or "up".
+        Raises:
+            ValueError: If there is no such key.
+        """
+        codes = self.scan_codes(name)
+        if not codes:
+            raise ValueError(f"Unknown key: {name!r}")
+        return SyntheticEvent(event_type, codes[0], name)
+
+    def combo_events(self, shortcut: str) -> List[SyntheticEvent]:
+        """
+        The events of pressing a shortcut such as "ctrl+k": every key goes
+        down in order, then up in reverse order.
+        """
+        names = [part.strip().lower() for part in shortcut.split("+")]
+        return [self.event("down", name) for name in names] + [
+            self.event("up", name) for name in reversed(names)
+        ]
+
+    def feed(self, events: Iterable[SyntheticEvent]) -> int:
+        """
+        Delivers `events` to every hook, in order. Returns how many were fed.
+        """
+        count = 0
+        hooks = list(self._hooks)
+        for event in events:
+            for callback in hooks:
+                callback(event)
+            count += 1
+        return count
+
+    def tap(self, shortcut: str) -> None:
+        self.feed(self.combo_events(shortcut))
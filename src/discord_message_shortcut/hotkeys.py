@@ -0,0 +1,226 @@
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+from discord_message_shortcut.hotkey_backend import HotkeyBackend
+
+# Modifier keys tracked as a bitmask while the hook sees them go down/up
+MODIFIER_BITS: Dict[str, int] = {"ctrl": 1, "shift": 2, "alt": 4, "windows": 8}
+
+# Dispatch table keys pack a scan code and a modifier bitmask in one int:
+# scan_code << MODIFIER_MASK_BITS | mask
+MODIFIER_MASK_BITS = 4
+
+_ALIASES: Dict[str, str] = {
+    "control": "ctrl",
+    "left ctrl": "ctrl",
+    "right ctrl": "ctrl",
+    "left shift": "shift",
+    "right shift": "shift",
+    "left alt": "alt",
+    "right alt": "alt",
+    "alt gr": "alt",
+    "win": "windows",
+    "left windows": "windows",
+    "right windows": "windows",
+    "cmd": "windows",
+    "command": "windows",
+    "super": "windows",
+    "plus": "+",
+}
+
+# (modifier bitmask, key name)
+HotkeyCombo = Tuple[int, str]
+Callback = Callable[[], None]
+
+
+def canonical_key_name(name: str) -> str:
+    name = name.strip().lower()
+    return _ALIASES.get(name, name)
+
+
+def parse_hotkey(shortcut: str) -> HotkeyCombo:
+    """
+    Parses a shortcut such as "ctrl+shift+k" into its dispatch key.
+    The + key itself is "plus", or a trailing "+" as in "ctrl++".
+    Raises:
+        ValueError: If the shortcut is empty, a sequence, has an empty key
+            name, or has a non-modifier before its last key.
+    """
+    if "," in shortcut:
+        raise ValueError(f"Hotkey sequences are not supported: {shortcut!r}")
+
+    if not shortcut.strip():
+        raise ValueError("Empty hotkey")
+    names = shortcut.split("+")
+    if len(names) > 1 and not (names[-2].strip() or names[-1].strip()):
+        # "ctrl++" (or a bare "+"): the last key is + itself
+        names[-2:] = ["+"]
+    parts = [canonical_key_name(p) for p in names]
+    if not all(parts):
+        raise ValueError(f"Empty key name in hotkey {shortcut!r} (write the + key as \"plus\")")
+
+    mask = 0
+    for part in parts[:-1]:
+        bit = MODIFIER_BITS.get(part)
+        if bit is None:
+            raise ValueError(f"Only modifiers may precede the key in {shortcut!r}")
+        mask |= bit
+    return mask, parts[-1]
+
+
+def dispatch_key(scan_code: int, mask: int) -> int:
+    return scan_code << MODIFIER_MASK_BITS | mask
+
+
+def modifier_scan_codes(backend: HotkeyBackend) -> Dict[int, int]:
+    """
+    Maps the scan code of every modifier key (either side) to its bit.
+    """
+    names = list(MODIFIER_BITS) + [a for a, name in _ALIASES.items() if name in MODIFIER_BITS]
+    codes: Dict[int, int] = {}
+    for name in names:
+        for code in backend.scan_codes(name):
+            codes[code] = MODIFIER_BITS[canonical_key_name(name)]
+    return codes
+
+
+class HotkeyDispatcher:
+    """
+    Dispatches the events of a single keyboard hook through a precomputed
+    table from scan code and modifier bitmask to callback. Key names are
+    never looked at: an event of a key that is neither bound nor a modifier
+    is rejected with one set lookup, and the work done per keystroke does
+    not depend on how many hotkeys are bound.
+    """
+
+    def __init__(self) -> None:
+        # (scan codes worth looking at, dispatch table, modifier bit by scan code)
+        self._state: Tuple[FrozenSet[int], Dict[int, Callback], Dict[int, int]] = (
+            frozenset(),
+            {},
+            {},
+        )
+        self._mask = 0
+
+    def replace_table(self, table: Dict[int, Callback], modifiers: Dict[int, int]) -> None:
+        """
+        Swaps in a new dispatch table, keyed by `dispatch_key`.
+        """
+        relevant = frozenset(key >> MODIFIER_MASK_BITS for key in table) | frozenset(modifiers)
+        # handle_event reads self._state once per event, so it sees either
+        # the old table or the new one, never a mix of both.
+        self._state = (relevant, table, modifiers)
+
+    def handle_event(self, event) -> None:
+        relevant, table, modifiers = self._state
+        code = event.scan_code
+        if code not in relevant:
+            return
+
+        bit = modifiers.get(code, 0)
+        if event.event_type == "up":
+            self._mask &= ~bit
+            return
+
+        callback = table.get(code << MODIFIER_MASK_BITS | self._mask)
+        self._mask |= bit
+        if callback is not None:
+            callback()
+
+
+class HotkeyRegistry:
+    """
+    Keeps the keyboard hook installed and the callbacks of the bound hotkeys,
+    and applies new binding sets as a diff against the current one.
+
+    Each binding has a hashable `target` describing what it does. Bindings
+    whose combination and target did not change keep their callback (and so
+    any debounce state), only added or changed ones are created, and the
+    result is swapped into the dispatcher in one step. The hook itself is
+    installed once and stays in place until `close()`.
+    """
+
+    def __init__(self, backend: HotkeyBackend) -> None:
+        self.backend = backend
+        self._handle: Optional[Any] = None
+        self._dispatcher = HotkeyDispatcher()
+        self._bindings: Dict[HotkeyCombo, Tuple[Hashable, Callback]] = {}
+        # Resolved on first use: the backend may only be usable once needed
+        self._modifiers: Optional[Dict[int, int]] = None
+
+    @property
+    def dispatcher(self) -> HotkeyDispatcher:
+        return self._dispatcher
+
+    def __len__(self) -> int:
+        return len(self._bindings)
+
+    def apply(
+        self,
+        bindings: Iterable[Tuple[str, Hashable]],
+        make_callback: Callable[[Hashable], Callback],
+    ) -> Tuple[int, int]:
+        """
+        Binds exactly `bindings`, given as (shortcut, target) pairs.
+        Returns:
+            Tuple[int, int]: How many bindings were added and removed.
+        Raises:
+            ValueError: If a shortcut is invalid, names an unknown key or two
+                shortcuts collide. The current bindings are left untouched
+                in that case.
+        """
+        new: Dict[HotkeyCombo, Tuple[Hashable, Callback]] = {}
+        keys: Dict[int, HotkeyCombo] = {}
+        added = 0
+        for shortcut, target in bindings:
+            combo = parse_hotkey(shortcut)
+            if combo in new:
+                raise ValueError(f"Hotkey {shortcut!r} is bound more than once")
+            mask, name = combo
+            codes = self.backend.scan_codes(name)
+            if not codes:
+                raise ValueError(f"Unknown key {name!r} in hotkey {shortcut!r}")
+            for code in codes:
+                # e.g. two names for the same physical key
+                if keys.setdefault(dispatch_key(code, mask), combo) != combo:
+                    raise ValueError(f"Hotkey {shortcut!r} is bound more than once")
+
+            current = self._bindings.get(combo)
+            if current is not None and current[0] == target:
+                new[combo] = current
+            else:
+                new[combo] = (target, make_callback(target))
+                added += 1
+
+        removed = sum(
+            1
+            for combo, (target, _) in self._bindings.items()
+            if combo not in new or new[combo][0] != target
+        )
+
+        if self._modifiers is None:
+            self._modifiers = modifier_scan_codes(self.backend)
+        if new and self._handle is None:
+            self._handle = self.backend.hook(self._dispatcher.handle_event)
+
+        self._bindings = new
+        self._dispatcher.replace_table(
+            {key: new[combo][1] for key, combo in keys.items()}, self._modifiers
+        )
+        return added, removed
+
+    def clear(self) -> None:
+        """
+        Unbinds everything but keeps the hook, so binding again is a table swap.
+        """
+        self._bindings = {}
+        # Modifiers stay tracked while the hook is installed
+        self._dispatcher.replace_table({}, self._modifiers or {})
+
+    def close(self) -> None:
+        """
+        Unbinds everything and removes the keyboard hook.
+        """
+        self.clear()
+        if self._handle is not None:
+            handle, self._handle = self._handle, None
+            self.backend.unhook(handle)
@@ -0,0 +1,133 @@
+from typing import Dict, Optional, Tuple
+
+from PySide6 import QtCore, QtGui
+
+# Tray badge color per status
+BADGE_COLORS: Dict[str, Tuple[int, int, int]] = {
+    "active": (10, 122, 10),  # green
+    "ready": (179, 107, 0),  # amber
+    "missing": (176, 0, 32),  # red
+}
+
+# Menu status dot colors
+DOT_OK = (10, 122, 10)  # green
+DOT_NOT_OK = (176, 0, 32)  # red
+
+TRAY_SIZE = 64
+DOT_SIZE = 14
+
+
+class IconCache:
+    """
+    Renders the tray and menu icons once per (state, device pixel ratio).
+
+    The base icon is read from disk on first use only, and every badge state
+    and status dot is painted at the screen's pixel density, so refreshing
+    the tray or the menu is a dict lookup.
+    """
+
+    def __init__(self, icon_path: Optional[str] = None) -> None:
+        self.icon_path = icon_path
+        self._source: Optional[QtGui.QPixmap] = None
+        self._bases: Dict[float, QtGui.QPixmap] = {}
+        self._tray: Dict[Tuple[str, float], QtGui.QIcon] = {}
+        self._dots: Dict[Tuple[bool, float], QtGui.QIcon] = {}
+
+    def prerender(self, dpr: float = 1.0) -> None:
+        for state in BADGE_COLORS:
+            self.tray_icon(state, dpr)
+        for ok in (True, False):
+            self.status_icon(ok, dpr)
+
+    def tray_icon(self, state: str, dpr: float = 1.0) -> QtGui.QIcon:
+        key = (state, dpr)
+        icon = self._tray.get(key)
+        if icon is None:
+            icon = self._tray[key] = QtGui.QIcon(
+                self._pixmap_with_badge(self._base(dpr), QtGui.QColor(*BADGE_COLORS[state]), dpr)
+            )
+        return icon
+
+    def status_icon(self, ok: bool, dpr: float = 1.0) -> QtGui.QIcon:
+        key = (ok, dpr)
+        icon = self._dots.get(key)
+        if icon is None:
+            icon = self._dots[key] = QtGui.QIcon(
+                self._status_dot(QtGui.QColor(*(DOT_OK if ok else DOT_NOT_OK)), dpr)
+            )
+        return icon
+
+    # -------------------------
+    # Rendering
+    # -------------------------
+
+    def _canvas(self, size: int, dpr: float) -> QtGui.QPixmap:
+        # Physical pixels for the screen, painted in logical coordinates
+        pm = QtGui.QPixmap(round(size * dpr), round(size * dpr))
+        pm.setDevicePixelRatio(dpr)
+        pm.fill(QtCore.Qt.GlobalColor.transparent)
+        return pm
+
+    def _base(self, dpr: float) -> QtGui.QPixmap:
+        base = self._bases.get(dpr)
+        if base is not None:
+            return base
+
+        if self._source is None and self.icon_path:
+            self._source = QtGui.QPixmap(self.icon_path)
+
+        if self._source is None or self._source.isNull():
+            base = self._default_base_pixmap(dpr)
+        else:
+            base = self._source.scaled(
+                round(TRAY_SIZE * dpr),
+                round(TRAY_SIZE * dpr),
+                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                QtCore.Qt.TransformationMode.SmoothTransformation,
+            )
+            base.setDevicePixelRatio(dpr)
+
+        self._bases[dpr] = base
+        return base
+
+    def _default_base_pixmap(self, dpr: float) -> QtGui.QPixmap:
+        pm = self._canvas(TRAY_SIZE, dpr)
+        p = QtGui.QPainter(pm)
+        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
+        p.setBrush(QtGui.QBrush(QtGui.QColor(60, 60, 60)))
+        p.setPen(QtCore.Qt.PenStyle.NoPen)
+        p.drawEllipse(4, 4, 56, 56)
+        p.setPen(QtGui.QPen(QtGui.QColor(255, 255, 255)))
+        f = QtGui.QFont("Segoe UI", 24, 700)
+        p.setFont(f)
+        p.drawText(QtCore.QRect(0, 0, TRAY_SIZE, TRAY_SIZE), QtCore.Qt.AlignmentFlag.AlignCenter, "D")
+        p.end()
+        return pm
+
+    def _pixmap_with_badge(
+        self, base: QtGui.QPixmap, badge_color: QtGui.QColor, dpr: float
+    ) -> QtGui.QPixmap:
+        pm = self._canvas(TRAY_SIZE, dpr)
+
+        p = QtGui.QPainter(pm)
+        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
+
+        # `base` is already at this size and density, so no rescale here
+        p.drawPixmap(0, 0, base)
+
+        p.setBrush(QtGui.QBrush(badge_color))
+        p.setPen(QtGui.QPen(QtGui.QColor(255, 255, 255), 2))
+        p.drawEllipse(44, 44, 16, 16)
+
+        p.end()
+        return pm
+
+    def _status_dot(self, color: QtGui.QColor, dpr: float) -> QtGui.QPixmap:
+        pix = self._canvas(DOT_SIZE, dpr)
+        p = QtGui.QPainter(pix)
+        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
+        p.setBrush(QtGui.QBrush(color))
+        p.setPen(QtCore.Qt.PenStyle.NoPen)
+        p.drawEllipse(1, 1, 12, 12)
+        p.end()
+        return pix
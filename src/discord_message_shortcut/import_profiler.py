@@ -0,0 +1,107 @@
+import importlib._bootstrap as _bootstrap
+import os
+import sys
+import threading
+import time
+from typing import List, Optional, TextIO, Tuple
+
+# Set to a file path (or "-" for stderr) to profile the imports of app_entry.
+IMPORT_PROFILE_ENV = "DMS_IMPORT_PROFILE"
+
+
+class ImportProfiler:
+    """
+    Times every module import, like `python -X importtime`, but from inside
+    the process so it also works for the PyInstaller build and spawned children.
+    """
+
+    def __init__(self) -> None:
+        # (module name, self time in us, cumulative time in us, nesting depth)
+        self.records: List[Tuple[str, int, int, int]] = []
+        self._local = threading.local()
+        self._original = None
+        self._started = 0
+
+    def install(self) -> None:
+        if self._original is not None:
+            return
+
+        original = _bootstrap._find_and_load
+        profiler = self
+
+        def _find_and_load(name, import_):
+            stack = profiler._stack()
+            stack.append(0)
+            start = time.perf_counter_ns()
+            try:
+                return original(name, import_)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                profiler.records.append(
+                    (name, (elapsed - children) // 1000, elapsed // 1000, len(stack))
+                )
+
+        # The interpreter looks this function up on every import statement,
+        # so replacing the module attribute hooks all of them.
+        self._original = original
+        self._started = time.perf_counter_ns()
+        _bootstrap._find_and_load = _find_and_load
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            _bootstrap._find_and_load = self._original
+            self._original = None
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter_ns() - self._started) / 1e6
+
+    def report(self, title: str = "") -> str:
+        """
+        Formats the records the way `-X importtime` prints them.
+        """
+        lines = []
+        if title:
+            lines.append(f"# {title}")
+        lines.append("import time: self [us] | cumulative | imported package")
+        for name, self_us, cumulative_us, depth in self.records:
+            lines.append(
+                f"import time: {self_us:>9} | {cumulative_us:>10} | {'  ' * depth}{name}"
+            )
+
+        total_us = sum(r[1] for r in self.records)
+        lines.append(f"# {len(self.records)} modules, {total_us / 1000:.1f} ms in imports")
+        return "\n".join(lines) + "\n"
+
+    def _stack(self) -> List[int]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+def profiler_from_env() -> Optional[ImportProfiler]:
+    """
+    Installs a profiler if IMPORT_PROFILE_ENV is set, otherwise returns None.
+    """
+    if not os.environ.get(IMPORT_PROFILE_ENV):
+        return None
+    profiler = ImportProfiler()
+    profiler.install()
+    return profiler
+
+
+def write_report(profiler: ImportProfiler, title: str) -> None:
+    target = os.environ.get(IMPORT_PROFILE_ENV, "-")
+    text = profiler.report(f"{title}: {profiler.elapsed_ms():.1f} ms")
+
+    if target == "-":
+        stream: Optional[TextIO] = sys.stderr
+        if stream is not None:
+            stream.write(text)
+        return
+
+    with open(target, "a", encoding="utf-8") as f:
+        f.write(text)
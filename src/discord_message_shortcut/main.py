@@ -1,7 +1,13 @@
 import sys
 import os
+import time
 import multiprocessing
-from discord_message_shortcut.ui import REQUEST_RESTART_EXIT_CODE
+from multiprocessing.connection import Connection
+from typing import Optional
+from discord_message_shortcut.constants import REQUEST_RESTART_EXIT_CODE
+
+CHILD_READY_TIMEOUT = 30.0
+STANDBY_EXIT_TIMEOUT = 5.0
 
 
 def resource_path(relative_path: str) -> str:
@@ -13,35 +19,135 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(os.path.abspath("."), relative_path)
 
 
-def app_entry(autostart: bool = False) -> None:
+def app_entry(
+    autostart: bool = False,
+    control: Optional[Connection] = None,
+    standby: bool = False,
+    restart_requested_at: Optional[float] = None,
+) -> None:
+    from discord_message_shortcut.import_profiler import profiler_from_env, write_report
+
+    # Set DMS_IMPORT_PROFILE to get an `-X importtime` style startup report
+    profiler = profiler_from_env()
+
     from discord_message_shortcut.ui import DmsUI
     from discord_message_shortcut.dms_manager import DMS_Manager
     from discord_message_shortcut.main import resource_path
+    from discord_message_shortcut.metrics import SPAN_RESTART_TO_READY
+    from PySide6 import QtWidgets
 
     manager = DMS_Manager(app_name="DMS")
+
+    if standby:
+        # Park with imports done and config loaded until the active child
+        # exits for a restart, then take over immediately.
+        QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        try:
+            restart_requested_at = control.recv()
+        except EOFError:
+            return
+        if restart_requested_at is None:
+            return
+        manager.reload_from_env()
+        autostart = True
+
     ui = DmsUI(manager=manager, icon_path=resource_path("resources/dms_icon.png"))
     if autostart:
         ui.toggle_active()
+
+    ready_ms: Optional[float] = None
+    if restart_requested_at is not None:
+        ready_ms = (time.time() - restart_requested_at) * 1000
+        manager.metrics.record_value(SPAN_RESTART_TO_READY, int(ready_ms * 1000))
+    if control is not None:
+        control.send(ready_ms)
+
+    if profiler is not None:
+        profiler.uninstall()
+        write_report(profiler, "app_entry cold start")
+
     ui.run()
 
 
+class _Child:
+    """
+    A spawned app_entry process and the supervisor end of its control pipe.
+    """
+
+    def __init__(
+        self,
+        standby: bool = False,
+        autostart: bool = False,
+        restart_requested_at: Optional[float] = None,
+    ) -> None:
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=app_entry,
+            kwargs={
+                "autostart": autostart,
+                "control": child_conn,
+                "standby": standby,
+                "restart_requested_at": restart_requested_at,
+            },
+            daemon=standby,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self, timeout: float) -> Optional[float]:
+        """
+        Waits until the child has its UI up and returns its time-to-ready in ms.
+        """
+        try:
+            if self.conn.poll(timeout):
+                return self.conn.recv()
+        except (EOFError, OSError):
+            pass
+        return None
+
+    def take_over(self, restart_requested_at: float) -> bool:
+        if not self.process.is_alive():
+            return False
+        try:
+            self.conn.send(restart_requested_at)
+        except (BrokenPipeError, OSError):
+            return False
+        return True
+
+    def release(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=STANDBY_EXIT_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
 def main():
     multiprocessing.set_start_method("spawn", force=True)
-    keyboard_fix_request = False
 
-    while True:
-        p = multiprocessing.Process(
-            target=app_entry, kwargs={"autostart": keyboard_fix_request}
-        )
-        p.start()
-        p.join()
+    active = _Child()
+    # Only park a standby once the first UI is up, so they don't compete for CPU
+    active.wait_ready(CHILD_READY_TIMEOUT)
+    standby = _Child(standby=True)
 
-        if p.exitcode == REQUEST_RESTART_EXIT_CODE:
-            keyboard_fix_request = True
+    while True:
+        active.process.join()
 
-        if p.exitcode != REQUEST_RESTART_EXIT_CODE:
+        if active.process.exitcode != REQUEST_RESTART_EXIT_CODE:
+            standby.release()
             break
 
+        restart_requested_at = time.time()
+        if standby.take_over(restart_requested_at):
+            active = standby
+        else:
+            active = _Child(autostart=True, restart_requested_at=restart_requested_at)
+
+        active.wait_ready(CHILD_READY_TIMEOUT)
+        standby = _Child(standby=True)
+
 
 if __name__ == "__main__":
     # Careful: This code will add the application to Windows startup!
@@ -0,0 +1,317 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Histogram resolution: values are kept exactly up to 2**SUB_BUCKET_BITS
+# microseconds and with < 2**-(SUB_BUCKET_BITS - 1) relative error above that.
+SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+_SUB_BUCKET_HALF_BITS = SUB_BUCKET_BITS - 1
+
+# Trace marks, in the order a hotkey press goes through them.
+MARK_KEY_EVENT = "key_event"
+MARK_ENQUEUED = "enqueued"
+MARK_STARTED = "started"
+MARK_SCHEDULED = "scheduled"
+MARK_CONNECTED = "connected"
+MARK_WRITTEN = "written"
+MARK_FIRST_BYTE = "first_byte"
+MARK_COMPLETED = "completed"
+
+# Spans recorded into histograms: name -> (start mark, end mark).
+SPANS: Dict[str, Tuple[str, str]] = {
+    "enqueue": (MARK_KEY_EVENT, MARK_ENQUEUED),
+    "queue_wait": (MARK_ENQUEUED, MARK_STARTED),
+    "rate_limit_wait": (MARK_STARTED, MARK_SCHEDULED),
+    "connect": (MARK_SCHEDULED, MARK_CONNECTED),
+    "write": (MARK_CONNECTED, MARK_WRITTEN),
+    "first_byte": (MARK_WRITTEN, MARK_FIRST_BYTE),
+    "total": (MARK_KEY_EVENT, MARK_COMPLETED),
+}
+
+SUMMARY_PERCENTILES = (50.0, 95.0, 99.0)
+
+# Recorded by a child process that took over after a restart request
+SPAN_RESTART_TO_READY = "restart_to_ready"
+
+# Recorded by DMS_Manager for every write of the .env file
+SPAN_CONFIG_PERSIST = "config_persist"
+
+# Recorded by DMS_Manager for every keep-warm round while active
+SPAN_KEEP_WARM = "keep_warm"
+
+
+class LatencyHistogram:
+    """
+    An HDR-style log-linear histogram of latencies in microseconds.
+    Recording is O(1) and memory stays bounded regardless of sample count.
+    """
+
+    def __init__(self) -> None:
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+
+    def record(self, value_us: int) -> None:
+        value_us = max(0, int(value_us))
+        idx = _bucket_index(value_us)
+        self._counts[idx] = self._counts.get(idx, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        self.max_us = max(self.max_us, value_us)
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+
+    def percentile(self, pct: float) -> int:
+        """
+        Returns the highest value equivalent to the given percentile, in microseconds.
+        """
+        if self.count == 0:
+            return 0
+        rank = max(1, int(round(pct / 100.0 * self.count + 0.4999)))
+        seen = 0
+        for idx in sorted(self._counts):
+            seen += self._counts[idx]
+            if seen >= rank:
+                return min(_bucket_high(idx), self.max_us)
+        return self.max_us
+
+    def mean(self) -> float:
+        return self.total_us / self.count if self.count else 0.0
+
+    def buckets(self) -> List[Tuple[int, int]]:
+        """
+        Returns (upper bound in microseconds, count) pairs in ascending order.
+        """
+        return [(_bucket_high(idx), self._counts[idx]) for idx in sorted(self._counts)]
+
+
+def _bucket_index(value: int) -> int:
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return (shift << _SUB_BUCKET_HALF_BITS) + (value >> shift)
+
+
+def _bucket_high(idx: int) -> int:
+    if idx < _SUB_BUCKET_COUNT:
+        return idx
+    shift = (idx >> _SUB_BUCKET_HALF_BITS) - 1
+    sub = idx - (shift << _SUB_BUCKET_HALF_BITS)
+    return ((sub + 1) << shift) - 1
+
+
+class SendTrace:
+    """
+    Timestamps of one send as it moves from the key event to the response.
+    """
+
+    __slots__ = ("marks", "status")
+
+    def __init__(self, start_mark: str = MARK_KEY_EVENT) -> None:
+        self.marks: Dict[str, int] = {start_mark: time.perf_counter_ns()}
+        self.status: Optional[int] = None
+
+    def mark(self, name: str) -> None:
+        self.marks[name] = time.perf_counter_ns()
+
+    def copy(self) -> "SendTrace":
+        """
+        A trace with the same marks so far, e.g. for each send of a fan-out.
+        """
+        trace = SendTrace.__new__(SendTrace)
+        trace.marks = dict(self.marks)
+        trace.status = self.status
+        return trace
+
+    def span_us(self, start: str, end: str) -> Optional[int]:
+        if start not in self.marks or end not in self.marks:
+            return None
+        return (self.marks[end] - self.marks[start]) // 1000
+
+
+class SendMetrics:
+    """
+    Thread-safe latency histograms and outcome counters for message sends.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {
+            name: LatencyHistogram() for name in SPANS
+        }
+        self.success = 0
+        self.errors = 0
+        self.dropped = 0
+        self.statuses: Dict[int, int] = {}
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self.version = 0
+
+    def record(self, trace: SendTrace, error: Optional[BaseException] = None) -> None:
+        if MARK_COMPLETED not in trace.marks:
+            trace.mark(MARK_COMPLETED)
+
+        with self._lock:
+            for name, (start, end) in SPANS.items():
+                value = trace.span_us(start, end)
+                if value is not None:
+                    self.histograms[name].record(value)
+
+            if trace.status is not None:
+                self.statuses[trace.status] = self.statuses.get(trace.status, 0) + 1
+
+            if error is None:
+                self.success += 1
+            else:
+                self.errors += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+                self.last_error_at = time.time()
+            self.version += 1
+
+    def record_dropped(self) -> None:
+        with self._lock:
+            self.dropped += 1
+            self.version += 1
+
+    def record_value(self, name: str, value_us: int) -> None:
+        """
+        Records a latency that is not part of a send trace (e.g. restart time).
+        """
+        with self._lock:
+            self.histograms.setdefault(name, LatencyHistogram()).record(value_us)
+            self.version += 1
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            spans = {
+                name: _histogram_summary(hist)
+                for name, hist in self.histograms.items()
+                if hist.count
+            }
+            return {
+                "spans": spans,
+                "success": self.success,
+                "errors": self.errors,
+                "dropped": self.dropped,
+                "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+                "last_error": self.last_error,
+                "last_error_at": self.last_error_at,
+            }
+
+    def summary_text(self) -> str:
+        """
+        A short human readable summary of the end-to-end latency.
+        """
+        summary = self.summary()
+        total = summary["spans"].get("total")
+        if total is None:
+            line = "Send latency: no sends yet"
+        else:
+            line = (
+                f"Send latency: p50 {total['p50_ms']:.1f} ms"
+                f" | p95 {total['p95_ms']:.1f} ms"
+                f" | p99 {total['p99_ms']:.1f} ms"
+            )
+        restart = summary["spans"].get(SPAN_RESTART_TO_READY)
+        if restart is not None:
+            line += f"\nRestart to hotkey ready: {restart['max_ms']:.0f} ms"
+        persist = summary["spans"].get(SPAN_CONFIG_PERSIST)
+        if persist is not None:
+            line += f"\nConfig save: p95 {persist['p95_ms']:.1f} ms"
+        line += f"\nSent: {summary['success']}  Errors: {summary['errors']}"
+        line += f"  Dropped: {summary['dropped']}"
+        if summary["last_error"]:
+            line += f"\nLast error: {summary['last_error'][:120]}"
+        return line
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            lines: List[str] = []
+
+            # The send spans share one metric; every other value (restart,
+            # persist, keep-warm) is a metric of its own
+            lines.append("# TYPE dms_send_latency_seconds histogram")
+            for name in SPANS:
+                hist = self.histograms[name]
+                if hist.count:
+                    lines.extend(
+                        _prometheus_histogram("dms_send_latency_seconds", hist, f'span="{name}"')
+                    )
+            for name, hist in self.histograms.items():
+                if name in SPANS or not hist.count:
+                    continue
+                metric = f"dms_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                lines.extend(_prometheus_histogram(metric, hist))
+
+            lines.append("# TYPE dms_sends_total counter")
+            lines.append(f'dms_sends_total{{outcome="success"}} {self.success}')
+            lines.append(f'dms_sends_total{{outcome="error"}} {self.errors}')
+            lines.append(f'dms_sends_total{{outcome="dropped"}} {self.dropped}')
+
+            lines.append("# TYPE dms_responses_total counter")
+            for status, count in sorted(self.statuses.items()):
+                lines.append(f'dms_responses_total{{status="{status}"}} {count}')
+
+            if self.last_error_at is not None:
+                lines.append("# TYPE dms_last_error_timestamp_seconds gauge")
+                lines.append(f"dms_last_error_timestamp_seconds {self.last_error_at:.3f}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """
+        Writes the metrics to `path`, as Prometheus text if it ends with
+        `.prom` or `.txt` and as JSON otherwise.
+        """
+        if path.lower().endswith((".prom", ".txt")):
+            text = self.to_prometheus()
+        else:
+            text = self.to_json()
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+def _histogram_summary(hist: LatencyHistogram) -> Dict[str, float]:
+    summary: Dict[str, float] = {"count": hist.count, "mean_ms": hist.mean() / 1000}
+    for pct in SUMMARY_PERCENTILES:
+        summary[f"p{pct:g}_ms"] = hist.percentile(pct) / 1000
+    summary["max_ms"] = hist.max_us / 1000
+    return summary
+
+
+def _prometheus_histogram(metric: str, hist: LatencyHistogram, labels: str = "") -> Iterable[str]:
+    prefix = f"{labels}," if labels else ""
+    selector = f"{{{labels}}}" if labels else ""
+    cumulative = 0
+    for upper_us, count in hist.buckets():
+        cumulative += count
+        yield f'{metric}_bucket{{{prefix}le="{upper_us / 1e6:.6f}"}} {cumulative}'
+    yield f'{metric}_bucket{{{prefix}le="+Inf"}} {hist.count}'
+    yield f"{metric}_sum{selector} {hist.total_us / 1e6:.6f}"
+    yield f"{metric}_count{selector} {hist.count}"
+
+
+_default_metrics: Optional[SendMetrics] = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_default_metrics() -> SendMetrics:
+    """
+    Returns the process-wide metrics registry.
+    """
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = SendMetrics()
+        return _default_metrics
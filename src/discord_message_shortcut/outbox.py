@@ -0,0 +1,406 @@
+import http.client
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import IO, Callable, List, Optional, Set, Tuple
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+from discord_message_shortcut.connection_pool import ResponseLost
+from discord_message_shortcut.rate_limit import DiscordAPIError
+from discord_message_shortcut.send_message import PreparedMessageRequest
+
+OUTBOX_FILENAME = "outbox.sqlite3"
+# Held by the one process replaying an outbox, next to it
+REPLAY_LOCK_SUFFIX = ".replay-lock"
+# Other processes can't wake the replayer: how often it looks for entries
+# they scheduled, and how often a process waiting to replay checks the lock
+REPLAY_POLL_INTERVAL = 5.0
+
+# Retry backoff: BASE * 2**attempts seconds, capped, with +-20% jitter
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 300.0
+
+# A shortcut message is rarely meaningful hours later, so entries that could
+# not be delivered within this many seconds are given up on.
+MAX_ENTRY_AGE = 3600.0
+
+# How long the first (in-process) attempt owns a fresh entry before a
+# replayer may pick it up, e.g. because the process died mid-send. The
+# process that appended it never replays it while the attempt is running,
+# however long it takes.
+FIRST_ATTEMPT_LEASE = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    route TEXT NOT NULL,
+    path TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    done_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (done_at, next_attempt_at);
+"""
+
+
+class SendDeferred(Exception):
+    """
+    The send failed for a reason that may go away (network down, Discord
+    errors). The message stays in the outbox and is retried in the background.
+    """
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed send can be attempted again without risking a duplicate:
+    429/5xx answers, and errors raised before the request was written.
+    """
+    if isinstance(error, ResponseLost):
+        return False
+    if isinstance(error, DiscordAPIError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+def retry_delay(attempts: int) -> float:
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempts))
+    return delay * random.uniform(0.8, 1.2)
+
+
+@dataclass(frozen=True)
+class OutboxEntry:
+    id: int
+    request: PreparedMessageRequest
+    attempts: int
+    created_at: float
+
+
+class Outbox:
+    """
+    A durable journal of message sends in SQLite (WAL mode).
+
+    Every send is appended before it is attempted and marked done once it was
+    delivered or given up on, so sends interrupted by a network outage or a
+    restart are still in the journal to be replayed. Done entries are removed
+    by `compact`.
+
+    An appended entry belongs to its first attempt, and is not due, until it
+    is marked done or scheduled for a retry.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Appended entries whose first attempt is still queued or running
+        self._in_flight: Set[int] = set()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        created = not os.path.exists(path)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if created and hasattr(os, "chmod"):
+            # Entries carry the authorization header
+            os.chmod(path, 0o600)
+
+        # WAL + NORMAL: appends don't wait for fsync but survive a crash of
+        # the app (only an OS crash may lose the last ones).
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def append(self, request: PreparedMessageRequest) -> int:
+        now = self._clock()
+        headers = json.dumps(
+            [[k.decode("latin-1"), v.decode("latin-1")] for k, v in request.headers]
+        )
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (host, port, route, path, headers, body,"
+                " created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    request.host,
+                    request.port,
+                    request.route,
+                    request.path,
+                    headers,
+                    request.body,
+                    now,
+                    now + FIRST_ATTEMPT_LEASE,
+                ),
+            )
+            self._in_flight.add(cursor.lastrowid)
+            return cursor.lastrowid
+
+    def mark_done(self, entry_id: int, error: Optional[str] = None) -> None:
+        """
+        Marks an entry as delivered, or as given up on if `error` is set.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET done_at = ?, last_error = ? WHERE id = ?",
+                (self._clock(), error, entry_id),
+            )
+            self._in_flight.discard(entry_id)
+
+    def retry_later(self, entry_id: int, error: str) -> float:
+        """
+        Schedules another attempt with exponential backoff.
+        Returns:
+            float: The delay in seconds until the entry is due again.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT attempts FROM outbox WHERE id = ?", (entry_id,)
+            ).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            delay = retry_delay(attempts - 1)
+            self._db.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ?"
+                " WHERE id = ?",
+                (attempts, self._clock() + delay, error, entry_id),
+            )
+            self._in_flight.discard(entry_id)
+        return delay
+
+    def release_all(self) -> None:
+        """
+        Makes every pending entry due now. Called when a process starts
+        replaying, so sends a previous process left unfinished go out first.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET next_attempt_at = ? WHERE done_at IS NULL",
+                (self._clock(),),
+            )
+
+    def due(self, limit: int = 16) -> List[OutboxEntry]:
+        with self._lock:
+            skip, skipped = self._in_flight_locked()
+            rows = self._db.execute(
+                "SELECT id, host, port, route, path, headers, body, attempts, created_at"
+                " FROM outbox WHERE done_at IS NULL AND next_attempt_at <= ?" + skip +
+                " ORDER BY id LIMIT ?",
+                (self._clock(), *skipped, limit),
+            ).fetchall()
+
+        entries = []
+        for entry_id, host, port, route, path, headers, body, attempts, created_at in rows:
+            request = PreparedMessageRequest(
+                host=host,
+                port=port,
+                route=route,
+                path=path,
+                headers=tuple(
+                    (k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(headers)
+                ),
+                body=bytes(body),
+            )
+            entries.append(OutboxEntry(entry_id, request, attempts, created_at))
+        return entries
+
+    def next_due_in(self) -> Optional[float]:
+        """
+        Seconds until the next pending entry is due, or None if there is none.
+        """
+        with self._lock:
+            skip, skipped = self._in_flight_locked()
+            row = self._db.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE done_at IS NULL" + skip,
+                skipped,
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return max(0.0, row[0] - self._clock())
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE done_at IS NULL"
+            ).fetchone()[0]
+
+    def compact(self) -> int:
+        """
+        Deletes done entries and truncates the WAL. Returns how many were deleted.
+        """
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM outbox WHERE done_at IS NOT NULL").rowcount
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _in_flight_locked(self) -> Tuple[str, Tuple[int, ...]]:
+        # A condition excluding the entries owned by their first attempt
+        if not self._in_flight:
+            return "", ()
+        skipped = tuple(self._in_flight)
+        return f" AND id NOT IN ({', '.join('?' * len(skipped))})", skipped
+
+
+class ReplayLock:
+    """
+    An exclusive, non-blocking lock on a file. The OS releases it when the
+    process holding it exits, even if it crashed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: Optional[IO[bytes]] = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """
+        Takes the lock if no other process holds it. Returns whether it is held.
+        """
+        if self._file is not None:
+            return True
+        f = open(self.path, "a+b")
+        try:
+            if sys.platform == "win32":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        if self._file is not None:
+            # Closing the file drops the lock
+            self._file.close()
+            self._file = None
+
+
+class OutboxReplayer:
+    """
+    Background thread that resends due outbox entries with backoff, gives up
+    on entries older than MAX_ENTRY_AGE or failing permanently, and compacts
+    the journal once enough entries are done.
+
+    Only one process replays an outbox at a time (see ReplayLock): the others
+    leave their retries to it, and take over once it exits.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        send: Callable[[PreparedMessageRequest], object],
+        compact_every: int = 32,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.outbox = outbox
+        self._send = send
+        self.compact_every = compact_every
+        self._clock = clock
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._done_since_compact = 0
+        self._lock = ReplayLock(outbox.path + REPLAY_LOCK_SUFFIX)
+
+        self.replayed = 0
+        self.given_up = 0
+
+    def start(self) -> "OutboxReplayer":
+        self._thread = threading.Thread(target=self._run, name="dms-outbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def note_done(self) -> None:
+        """
+        Counts an entry finished outside the replayer towards compaction.
+        """
+        self._done_since_compact += 1
+        if self._done_since_compact >= self.compact_every:
+            self.wake()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                if not self._owns_outbox():
+                    self._wake.wait(REPLAY_POLL_INTERVAL)
+                    self._wake.clear()
+                    continue
+
+                self.replay_due()
+
+                if self._done_since_compact >= self.compact_every:
+                    self._done_since_compact = 0
+                    self.outbox.compact()
+
+                timeout = self.outbox.next_due_in()
+                self._wake.wait(
+                    REPLAY_POLL_INTERVAL if timeout is None else min(timeout, REPLAY_POLL_INTERVAL)
+                )
+                self._wake.clear()
+        finally:
+            self._lock.release()
+
+    def _owns_outbox(self) -> bool:
+        if self._lock.held:
+            return True
+        try:
+            if not self._lock.acquire():
+                return False
+        except OSError:
+            return False
+        # Sends a previous owner left unfinished go out first
+        self.outbox.release_all()
+        return True
+
+    def replay_due(self) -> None:
+        for entry in self.outbox.due():
+            if self._stop.is_set():
+                return
+
+            if self._clock() - entry.created_at > MAX_ENTRY_AGE:
+                self.outbox.mark_done(entry.id, error="expired")
+                self.given_up += 1
+                self._done_since_compact += 1
+                continue
+
+            try:
+                self._send(entry.request)
+            except Exception as e:
+                if is_retryable(e):
+                    self.outbox.retry_later(entry.id, str(e))
+                else:
+                    self.outbox.mark_done(entry.id, error=str(e))
+                    self.given_up += 1
+                    self._done_since_compact += 1
+                continue
+
+            self.outbox.mark_done(entry.id)
+            self.replayed += 1
+            self._done_since_compact += 1
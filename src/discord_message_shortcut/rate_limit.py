@@ -0,0 +1,224 @@
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+# The top-level resource of a route. Discord's bucket hash is shared by all
+# of them, but each one (e.g. each channel) has its own budget in that bucket.
+_MAJOR_PARAMETER = re.compile(r"/(?:channels|guilds|webhooks)/[^/]+")
+
+_BucketKey = Tuple[str, str]
+
+
+class DiscordAPIError(Exception):
+    """
+    Raised when the Discord API answers a request with an error status.
+    """
+
+    def __init__(self, status: int, body: bytes) -> None:
+        self.status = status
+        self.body = body
+        text = body.decode("utf-8", errors="replace").strip()
+        super().__init__(f"Discord API returned HTTP {status}: {text[:200]}")
+
+
+@dataclass
+class RateLimitBucket:
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: float = 0.0
+
+
+def message_route(channel_id: str) -> str:
+    """
+    Returns the rate-limit route key for sending messages to a channel.
+    Discord limits message creation per channel, so the channel is part of the key.
+    """
+    return f"POST /channels/{channel_id}/messages"
+
+
+class RateLimiter:
+    """
+    Tracks Discord rate-limit buckets per route from the X-RateLimit headers
+    and schedules requests so that a bucket is never sent past its limit.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+        # Routes are mapped to the bucket hash Discord reports for them, so
+        # routes sharing a bucket also share its remaining budget. Buckets are
+        # keyed on (hash, major parameter): the hash alone would make every
+        # channel share one budget.
+        self._route_buckets: Dict[str, str] = {}
+        self._buckets: Dict[_BucketKey, RateLimitBucket] = {}
+        self._global_reset_at = 0.0
+
+    def acquire(self, route: str) -> float:
+        """
+        Blocks until a request on `route` may be sent and reserves one slot
+        of its bucket.
+        Args:
+            route (str): The route key, see `message_route`.
+        Returns:
+            float: The total time spent waiting, in seconds.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                delay = self._delay_locked(route)
+                if delay <= 0:
+                    bucket = self._bucket_locked(route)
+                    if bucket.remaining is not None:
+                        bucket.remaining -= 1
+                    return waited
+            self._sleep(delay)
+            waited += delay
+
+    def delay_for(self, route: str) -> float:
+        """
+        Returns how long a request on `route` would have to wait right now.
+        """
+        with self._lock:
+            return max(0.0, self._delay_locked(route))
+
+    def update(
+        self, route: str, status: int, headers: Mapping[str, str], body: bytes = b""
+    ) -> Optional[float]:
+        """
+        Updates the bucket of `route` from a response.
+        Args:
+            route (str): The route key the request was sent on.
+            status (int): The HTTP status of the response.
+            headers (Mapping[str, str]): The response headers, lower-cased.
+            body (bytes): The response body, used for 429 details.
+        Returns:
+            float | None: The retry delay in seconds if the response was a 429.
+        """
+        now = self._clock()
+        bucket_id = headers.get("x-ratelimit-bucket")
+
+        with self._lock:
+            if bucket_id:
+                previous = self._route_buckets.get(route)
+                self._route_buckets[route] = bucket_id
+                if previous is None:
+                    major = _major_parameter(route)
+                    pending = self._buckets.pop((route, major), None)
+                    if pending is not None:
+                        self._buckets.setdefault((bucket_id, major), pending)
+
+            bucket = self._bucket_locked(route)
+
+            limit = _parse_int(headers.get("x-ratelimit-limit"))
+            if limit is not None:
+                bucket.limit = limit
+
+            remaining = _parse_int(headers.get("x-ratelimit-remaining"))
+            reset_after = _parse_float(headers.get("x-ratelimit-reset-after"))
+            if remaining is not None:
+                bucket.remaining = remaining
+            if reset_after is not None:
+                bucket.reset_at = now + reset_after
+
+            if status != 429:
+                return None
+
+            retry_after, is_global = _parse_429(headers, body)
+            if retry_after is None:
+                retry_after = reset_after if reset_after is not None else 1.0
+
+            if is_global:
+                self._global_reset_at = max(self._global_reset_at, now + retry_after)
+            else:
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+            return retry_after
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _bucket_locked(self, route: str) -> RateLimitBucket:
+        key = (self._route_buckets.get(route, route), _major_parameter(route))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = RateLimitBucket()
+        return bucket
+
+    def _delay_locked(self, route: str) -> float:
+        now = self._clock()
+        if now < self._global_reset_at:
+            return self._global_reset_at - now
+
+        bucket = self._bucket_locked(route)
+        if bucket.remaining is None or bucket.remaining > 0:
+            return 0.0
+        if now < bucket.reset_at:
+            return bucket.reset_at - now
+
+        # The window has rolled over: refill, but keep one slot until the
+        # next response tells us the real numbers.
+        bucket.remaining = bucket.limit if bucket.limit is not None else 1
+        return 0.0
+
+
+def _major_parameter(route: str) -> str:
+    match = _MAJOR_PARAMETER.search(route)
+    return match.group(0) if match else ""
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_429(
+    headers: Mapping[str, str], body: bytes
+) -> Tuple[Optional[float], bool]:
+    retry_after = _parse_float(headers.get("retry-after"))
+    is_global = headers.get("x-ratelimit-global", "").lower() == "true"
+    is_global = is_global or headers.get("x-ratelimit-scope", "") == "global"
+
+    try:
+        data = json.loads(body) if body else {}
+    except ValueError:
+        data = {}
+    if isinstance(data, dict):
+        if data.get("retry_after") is not None:
+            retry_after = _parse_float(str(data["retry_after"]))
+        is_global = is_global or bool(data.get("global"))
+
+    return retry_after, is_global
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_limiter() -> RateLimiter:
+    """
+    Returns the process-wide rate limiter shared by every sender.
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
@@ -0,0 +1,301 @@
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+# What to do with a new job when the queue is already full.
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST)
+
+
+class QueueFullError(Exception):
+    """
+    Raised by a blocking submit when the queue stayed full for too long.
+    """
+
+
+@dataclass(frozen=True)
+class SendEngineStats:
+    queue_depth: int
+    max_queue_depth: int
+    in_flight: int
+    submitted: int
+    completed: int
+    failed: int
+    dropped: int
+    merged: int
+
+
+@dataclass
+class _Job:
+    fn: Callable[[], Any]
+    future: Future
+    merge_key: Optional[Hashable]
+
+
+class SendEngine:
+    """
+    A single long-lived asyncio loop on one worker thread that drains a
+    bounded job queue with a fixed number of concurrent senders.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 16,
+        # As many as the pool keeps warm per host, so a fan-out to several
+        # channels runs side by side on reused connections
+        concurrency: int = 4,
+        overflow: str = OVERFLOW_DROP_NEWEST,
+        block_timeout: float = 1.0,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow!r}")
+        if max_queue < 1 or concurrency < 1:
+            raise ValueError("max_queue and concurrency must be at least 1")
+
+        self.max_queue = max_queue
+        self.concurrency = concurrency
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._pending: Deque[_Job] = deque()
+        self._by_key: Dict[Hashable, _Job] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+
+        self._max_depth = 0
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._dropped = 0
+        self._merged = 0
+
+    # -------------------------
+    # Public
+    # -------------------------
+
+    def submit(
+        self, fn: Callable[[], Any], merge_key: Optional[Hashable] = None
+    ) -> Future:
+        """
+        Queues a blocking job and returns a future for its result.
+        Args:
+            fn (Callable[[], Any]): The job to run on a sender thread.
+            merge_key (Hashable | None): Jobs with the same key that are still
+                queued are merged into one and share the same future.
+        Returns:
+            Future: Resolved with the job result, or cancelled if dropped.
+        """
+        return self.submit_or_merge(fn, merge_key)[0]
+
+    def submit_or_merge(
+        self, fn: Callable[[], Any], merge_key: Optional[Hashable] = None
+    ) -> Tuple[Future, bool]:
+        """
+        Like `submit`, but also tells whether the job was merged into one
+        still queued, in which case `fn` will never run.
+        Returns:
+            Tuple[Future, bool]: The job's future and whether it was merged.
+        """
+        self._ensure_started()
+
+        evicted: Optional[_Job] = None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("SendEngine has been shut down")
+
+            self._submitted += 1
+
+            if merge_key is not None and merge_key in self._by_key:
+                self._merged += 1
+                return self._by_key[merge_key].future, True
+
+            if len(self._pending) >= self.max_queue:
+                if self.overflow == OVERFLOW_DROP_NEWEST:
+                    self._dropped += 1
+                    future: Future = Future()
+                    future.cancel()
+                    return future, False
+                if self.overflow == OVERFLOW_DROP_OLDEST:
+                    evicted = self._pending.popleft()
+                    self._forget(evicted)
+                    self._dropped += 1
+                else:
+                    if not self._not_full.wait_for(
+                        lambda: len(self._pending) < self.max_queue or self._closed,
+                        timeout=self.block_timeout,
+                    ):
+                        self._dropped += 1
+                        raise QueueFullError("Send queue is full")
+                    if self._closed:
+                        raise RuntimeError("SendEngine has been shut down")
+
+            job = _Job(fn=fn, future=Future(), merge_key=merge_key)
+            self._pending.append(job)
+            if merge_key is not None:
+                self._by_key[merge_key] = job
+            self._max_depth = max(self._max_depth, len(self._pending))
+
+        if evicted is not None:
+            evicted.future.cancel()
+
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+        return job.future, False
+
+    def call_later(self, delay: float, fn: Callable[[], Any]) -> None:
+        """
+        Runs `fn` on a sender thread after `delay` seconds, using the engine
+        loop as the timer instead of a thread per timer.
+        """
+        self._ensure_started()
+        loop = self._loop
+
+        def _fire() -> None:
+            loop.run_in_executor(self._executor, fn)
+
+        loop.call_soon_threadsafe(loop.call_later, delay, _fire)
+
+    def stats(self) -> SendEngineStats:
+        with self._lock:
+            return SendEngineStats(
+                queue_depth=len(self._pending),
+                max_queue_depth=self._max_depth,
+                in_flight=self._in_flight,
+                submitted=self._submitted,
+                completed=self._completed,
+                failed=self._failed,
+                dropped=self._dropped,
+                merged=self._merged,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the loop. Jobs still queued are cancelled.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._pending)
+            self._pending.clear()
+            self._by_key.clear()
+            self._not_full.notify_all()
+
+        for job in pending:
+            job.future.cancel()
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if wait and self._thread is not None:
+                self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            ready = threading.Event()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="dms-sender"
+            )
+            self._thread = threading.Thread(
+                target=self._run_loop, args=(ready,), name="dms-send-engine", daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+
+        workers = [loop.create_task(self._worker()) for _ in range(self.concurrency)]
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            for task in workers:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*workers, return_exceptions=True))
+            loop.close()
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = self._take()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if not job.future.set_running_or_notify_cancel():
+                with self._lock:
+                    self._in_flight -= 1
+                continue
+
+            try:
+                result = await loop.run_in_executor(self._executor, job.fn)
+            except Exception as e:
+                job.future.set_exception(e)
+                self._finish(failed=True)
+            else:
+                job.future.set_result(result)
+                self._finish(failed=False)
+
+    def _take(self) -> Optional[_Job]:
+        with self._lock:
+            if not self._pending:
+                return None
+            job = self._pending.popleft()
+            self._forget(job)
+            self._in_flight += 1
+            self._not_full.notify()
+            return job
+
+    def _finish(self, failed: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def _forget(self, job: _Job) -> None:
+        if job.merge_key is not None and self._by_key.get(job.merge_key) is job:
+            del self._by_key[job.merge_key]
+
+
+_default_engine: Optional[SendEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_engine() -> SendEngine:
+    """
+    Returns the process-wide send engine shared by every sender.
+    """
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = SendEngine()
+        return _default_engine
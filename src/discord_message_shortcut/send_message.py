@@ -1,49 +1,192 @@
 import json
-from http.client import HTTPSConnection
-from typing import NoReturn
+from dataclasses import dataclass
+from json.encoder import encode_basestring_ascii
+from typing import NoReturn, Optional, Tuple
 
-import keyboard
-from rich import print as pprint
-from rich.panel import Panel
+from discord_message_shortcut.connection_pool import (
+    PooledResponse,
+    encode_headers,
+    get_default_pool,
+)
+from discord_message_shortcut.metrics import MARK_SCHEDULED, SendTrace
+from discord_message_shortcut.rate_limit import (
+    DiscordAPIError,
+    RateLimiter,
+    get_default_limiter,
+    message_route,
+)
+from discord_message_shortcut.transport import Transport
 
+DISCORD_API_HOST = "discordapp.com"
+DISCORD_API_PORT = 443
 
-def send_discord_message(
+# How many times a send is retried after a 429 the limiter could not predict
+# (e.g. limits shared with the official client on the same account).
+MAX_RATE_LIMIT_RETRIES = 2
+
+
+@dataclass(frozen=True)
+class PreparedMessageRequest:
+    """
+    A message send compiled down to wire-ready bytes, so that repeating it
+    does no string formatting or JSON serialization.
+    """
+
+    host: str
+    port: int
+    route: str
+    path: str
+    headers: Tuple[Tuple[bytes, bytes], ...]
+    body: bytes
+
+    def with_message(self, message: str) -> "PreparedMessageRequest":
+        """
+        The same request carrying another message; only the body and its
+        content-length are encoded again.
+        """
+        # Same bytes as json.dumps({"content": message}), minus the dict walk
+        body = b'{"content": ' + encode_basestring_ascii(message).encode("ascii") + b"}"
+        length = str(len(body)).encode("latin-1")
+        headers = tuple(
+            (name, length if name == b"content-length" else value)
+            for name, value in self.headers
+        )
+        return PreparedMessageRequest(self.host, self.port, self.route, self.path, headers, body)
+
+
+def prepare_message_request(
     message: str,
     discord_token: str,
     discord_user_id: str,
     server_id: str,
     channel_id: str,
-) -> None:
+    host: str = DISCORD_API_HOST,
+    port: int = DISCORD_API_PORT,
+) -> PreparedMessageRequest:
     """
-    Sends a message to a specified Discord channel using the Discord API.
+    Builds the request that sends `message` to a Discord channel.
     Args:
         message (str): The message content to send.
         discord_token (str): The Discord authorization token.
         discord_user_id (str): The Discord user ID.
         server_id (str): The ID of the Discord server (guild).
         channel_id (str): The ID of the Discord channel.
+        host (str): The API host to connect to.
+        port (int): The API port to connect to.
+    Returns:
+        PreparedMessageRequest: The compiled request.
     """
-    conn = HTTPSConnection("discordapp.com", 443)
+    body = json.dumps({"content": message}).encode("utf-8")
 
     headers = {
         "content-type": "application/json",
         "authorization": discord_token,
         "user-id": discord_user_id,
-        "host": "discordapp.com",
+        "host": host,
         "referrer": f"https://discord.com/channels/{server_id}/{channel_id}",
+        "content-length": str(len(body)),
     }
 
-    payload = json.dumps({"content": message})
-
-    conn.request(
-        "POST",
-        f"/api/v6/channels/{channel_id}/messages",
-        payload,
-        headers,
+    return PreparedMessageRequest(
+        host=host,
+        port=port,
+        route=message_route(channel_id),
+        path=f"/api/v6/channels/{channel_id}/messages",
+        headers=encode_headers(headers),
+        body=body,
     )
 
-    conn.getresponse()
-    conn.close()
+
+def send_prepared_request(
+    request: PreparedMessageRequest,
+    pool: Optional[Transport] = None,
+    limiter: Optional[RateLimiter] = None,
+    trace: Optional[SendTrace] = None,
+) -> PooledResponse:
+    """
+    Sends a prepared message request, respecting the Discord rate limits.
+    Args:
+        request (PreparedMessageRequest): The compiled request to send.
+        pool (Transport | None): The transport (e.g. keep-alive pool) to send
+            through. Defaults to the process-wide HTTP/1.1 pool.
+        limiter (RateLimiter | None): The rate limiter that schedules the send.
+            Defaults to the process-wide limiter.
+        trace (SendTrace | None): Receives the timing marks of the send.
+    Returns:
+        PooledResponse: The response of the API.
+    Raises:
+        DiscordAPIError: If the API answered with an error status.
+    """
+    pool = pool or get_default_pool()
+    limiter = limiter or get_default_limiter()
+
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        # Waits for the bucket to refill instead of running into a 429
+        limiter.acquire(request.route)
+        if trace is not None:
+            trace.mark(MARK_SCHEDULED)
+
+        resp = pool.request(
+            "POST",
+            request.host,
+            request.path,
+            request.body,
+            request.headers,
+            port=request.port,
+            trace=trace,
+        )
+
+        limiter.update(request.route, resp.status, resp.headers, resp.body)
+        if resp.status != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+            break
+
+    if resp.status >= 400:
+        raise DiscordAPIError(resp.status, resp.body)
+    return resp
+
+
+def send_discord_message(
+    message: str,
+    discord_token: str,
+    discord_user_id: str,
+    server_id: str,
+    channel_id: str,
+    pool: Optional[Transport] = None,
+    host: str = DISCORD_API_HOST,
+    port: int = DISCORD_API_PORT,
+    limiter: Optional[RateLimiter] = None,
+    trace: Optional[SendTrace] = None,
+) -> PooledResponse:
+    """
+    Sends a message to a specified Discord channel using the Discord API.
+    Args:
+        message (str): The message content to send.
+        discord_token (str): The Discord authorization token.
+        discord_user_id (str): The Discord user ID.
+        server_id (str): The ID of the Discord server (guild).
+        channel_id (str): The ID of the Discord channel.
+        pool (Transport | None): The transport (e.g. keep-alive pool) to send
+            through. Defaults to the process-wide HTTP/1.1 pool.
+        host (str): The API host to connect to.
+        port (int): The API port to connect to.
+        limiter (RateLimiter | None): The rate limiter that schedules the send.
+            Defaults to the process-wide limiter.
+        trace (SendTrace | None): Receives the timing marks of the send.
+    Returns:
+        PooledResponse: The response of the API.
+    Raises:
+        DiscordAPIError: If the API answered with an error status.
+    """
+    request = prepare_message_request(
+        message=message,
+        discord_token=discord_token,
+        discord_user_id=discord_user_id,
+        server_id=server_id,
+        channel_id=channel_id,
+        host=host,
+        port=port,
+    )
+    return send_prepared_request(request, pool=pool, limiter=limiter, trace=trace)
 
 
 # ==============================================================
@@ -69,6 +212,11 @@ def main(
         server_id (str): The ID of the Discord server (guild).
         channel_id (str): The ID of the Discord channel.
     """
+    # Only this example loop needs these; the tray app never imports them.
+    import keyboard
+    from rich import print as pprint
+    from rich.panel import Panel
+
     panel = Panel.fit(
         f"[bold green]Discord Auto Message[/bold green]\n\n"
         f"[white]Press '{trigger_key}' to send the message:[/white]\n\n"
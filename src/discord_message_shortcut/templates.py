@@ -0,0 +1,141 @@
+import itertools
+import random
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# A placeholder is `{name}` or `{name:argument}`; `{{` and `}}` are literal braces
+_TOKEN = re.compile(r"\{\{|\}\}|\{([a-z]+)(?::([^{}]*))?\}")
+
+DEFAULT_TIME_FORMAT = "%H:%M"
+DEFAULT_DATE_FORMAT = "%Y-%m-%d"
+
+Producer = Callable[[], str]
+# Returns the current clipboard text; must be safe to call from any thread
+ClipboardReader = Callable[[], str]
+
+
+def _no_clipboard() -> str:
+    return ""
+
+
+class CompiledTemplate:
+    """
+    A message template parsed once into literal segments and placeholder slots.
+
+    Supported placeholders:
+        {time} / {time:%H:%M:%S}   local time (strftime format, default %H:%M)
+        {date} / {date:%d/%m}      local date (strftime format, default %Y-%m-%d)
+        {counter}                  1, 2, 3... per template, counting renders
+        {clipboard}                the clipboard text
+        {random:a|b|c}             one of the options, picked per render
+    Unknown placeholders and stray braces are kept as typed, so plain messages
+    containing braces are sent unchanged.
+    """
+
+    def __init__(self, text: str, clipboard: ClipboardReader = _no_clipboard) -> None:
+        self.text = text
+        self._static = text
+        self._clipboard = clipboard
+        self._counter = itertools.count(1)
+
+        # Literal text between placeholders, with a None hole per placeholder
+        self._parts: List[Optional[str]] = []
+        self._slots: List[Tuple[int, Producer]] = []
+        self._compile(text)
+
+    @property
+    def is_static(self) -> bool:
+        return not self._slots
+
+    def render(self) -> str:
+        if not self._slots:
+            return self._static
+        parts = self._parts.copy()
+        for index, produce in self._slots:
+            parts[index] = produce()
+        return "".join(parts)
+
+    def set_clipboard(self, clipboard: ClipboardReader) -> None:
+        self._clipboard = clipboard
+
+    # -------------------------
+    # Compilation
+    # -------------------------
+
+    def _compile(self, text: str) -> None:
+        literal: List[str] = []
+        position = 0
+
+        for match in _TOKEN.finditer(text):
+            literal.append(text[position : match.start()])
+            position = match.end()
+
+            token = match.group(0)
+            if token in ("{{", "}}"):
+                literal.append(token[0])
+                continue
+
+            produce = self._producer(match.group(1), match.group(2))
+            if produce is None:
+                literal.append(token)
+                continue
+
+            self._parts.append("".join(literal))
+            literal = []
+            self._slots.append((len(self._parts), produce))
+            self._parts.append(None)
+
+        literal.append(text[position:])
+        self._parts.append("".join(literal))
+
+        if not self._slots:
+            # Nothing to fill in: render returns the text with escapes resolved
+            self._static = self._parts[0] or ""
+
+    def _producer(self, name: str, argument: Optional[str]) -> Optional[Producer]:
+        if name == "time":
+            fmt = argument or DEFAULT_TIME_FORMAT
+            return lambda: time.strftime(fmt)
+        if name == "date":
+            fmt = argument or DEFAULT_DATE_FORMAT
+            return lambda: time.strftime(fmt)
+        if name == "counter" and argument is None:
+            counter = self._counter
+            return lambda: str(next(counter))
+        if name == "clipboard" and argument is None:
+            return lambda: self._clipboard()
+        if name == "random" and argument:
+            options = tuple(argument.split("|"))
+            return lambda: random.choice(options)
+        return None
+
+
+class TemplateCache:
+    """
+    Compiled templates by text. Recompiling keeps the templates whose text is
+    unchanged, so their counters survive config reloads and edits.
+    """
+
+    def __init__(self, clipboard: ClipboardReader = _no_clipboard) -> None:
+        self._clipboard = clipboard
+        self._templates: Dict[str, CompiledTemplate] = {}
+
+    def get(self, text: str) -> CompiledTemplate:
+        template = self._templates.get(text)
+        if template is None:
+            # Not part of the config (e.g. a merged burst): compiled for this use only
+            template = CompiledTemplate(text, self._clipboard)
+        return template
+
+    def compile(self, texts: Iterable[str]) -> None:
+        previous = self._templates
+        self._templates = {
+            text: previous.get(text) or CompiledTemplate(text, self._clipboard)
+            for text in texts
+        }
+
+    def set_clipboard(self, clipboard: ClipboardReader) -> None:
+        self._clipboard = clipboard
+        for template in self._templates.values():
+            template.set_clipboard(clipboard)
@@ -0,0 +1,97 @@
+import ssl
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Protocol, Union
+
+from discord_message_shortcut.connection_pool import (
+    ConnectionPool,
+    EncodedHeaders,
+    PooledResponse,
+    get_default_pool,
+)
+from discord_message_shortcut.metrics import SendTrace
+
+TRANSPORT_HTTP1 = "http1"
+TRANSPORT_H2 = "h2"
+
+DEFAULT_TRANSPORT = TRANSPORT_HTTP1
+
+
+class Transport(Protocol):
+    """
+    What the senders need from an HTTP client. ConnectionPool (http.client,
+    one request in flight per connection) is the default implementation.
+    """
+
+    def request(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        body: Optional[Union[bytes, str]] = None,
+        headers: Optional[Union[Mapping[str, str], EncodedHeaders]] = None,
+        port: int = 443,
+        trace: Optional[SendTrace] = None,
+    ) -> PooledResponse: ...
+
+    def warm(
+        self,
+        host: str,
+        path: str,
+        headers: Optional[Mapping[str, str]] = None,
+        port: int = 443,
+        count: int = 1,
+    ) -> int: ...
+
+    def close_all(self) -> None: ...
+
+
+def _h2_transport(secure: bool, ssl_context: Optional[ssl.SSLContext]) -> Transport:
+    # Optional dependency: only imported when selected
+    from discord_message_shortcut.h2_transport import H2Transport
+
+    return H2Transport(secure=secure, ssl_context=ssl_context)
+
+
+TRANSPORTS: Dict[str, Callable[[bool, Optional[ssl.SSLContext]], Transport]] = {
+    TRANSPORT_HTTP1: lambda secure, ssl_context: ConnectionPool(
+        secure=secure, ssl_context=ssl_context
+    ),
+    TRANSPORT_H2: _h2_transport,
+}
+
+
+def transport_names() -> List[str]:
+    return list(TRANSPORTS)
+
+
+def make_transport(
+    name: str, secure: bool = True, ssl_context: Optional[ssl.SSLContext] = None
+) -> Transport:
+    """
+    Creates a transport by name.
+    Raises:
+        ValueError: If the name is unknown.
+        ImportError: If the transport's optional dependency is missing.
+    """
+    factory = TRANSPORTS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown transport {name!r}, expected one of {transport_names()}")
+    return factory(secure, ssl_context)
+
+
+_default_transports: Dict[str, Transport] = {}
+_default_transports_lock = threading.Lock()
+
+
+def get_default_transport(name: str = DEFAULT_TRANSPORT) -> Transport:
+    """
+    Returns the process-wide transport of that name, shared by every sender.
+    The http1 one is the default connection pool.
+    """
+    if name == TRANSPORT_HTTP1:
+        return get_default_pool()
+    with _default_transports_lock:
+        transport = _default_transports.get(name)
+        if transport is None:
+            transport = _default_transports[name] = make_transport(name)
+        return transport
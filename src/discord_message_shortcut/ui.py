@@ -7,19 +7,32 @@ from discord_message_shortcut.fixes.fix_lock_screen import (
     SessionNotificationWindow,
 )
 import os
-import threading
 import subprocess
+import threading
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Optional, List, Dict
-from discord_message_shortcut.discord_token_scraper import get_discord_token
-
-import keyboard
+from typing import Callable, Hashable, Optional, List, Dict, Set, Tuple
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from discord_message_shortcut.dms_manager import DMS_Manager
+from discord_message_shortcut.coalescer import HotkeyCoalescer
+from discord_message_shortcut.constants import REQUEST_RESTART_EXIT_CODE
+from discord_message_shortcut.dms_manager import (
+    DMS_Manager,
+    PROFILES_FIELD,
+    ShortcutProfile,
+)
+from discord_message_shortcut.hotkey_backend import HotkeyBackend, KeyboardBackend
+from discord_message_shortcut.hotkeys import HotkeyRegistry, parse_hotkey
+from discord_message_shortcut.icons import IconCache
+from discord_message_shortcut.metrics import SendTrace
+from discord_message_shortcut.outbox import SendDeferred
+
+METRICS_REFRESH_MS = 1000
+METRICS_EXPORT_MS = 10000
 
-REQUEST_RESTART_EXIT_CODE = 9988
+# Fields whose change requires rebinding the hotkeys
+HOTKEY_FIELDS = ("latest_shortcut", "debounce_ms", "merge_presses", PROFILES_FIELD)
 
 
 @dataclass(frozen=True)
@@ -29,6 +42,77 @@ class FieldSpec:
     required: bool
 
 
+# Fields of a ShortcutProfile, edited together in a ProfileDialog
+PROFILE_FIELD_SPECS: List[FieldSpec] = [
+    FieldSpec("shortcut", "Shortcut", True),
+    FieldSpec("channel_id", "Channel Id", True),
+    FieldSpec("server_id", "Server Id", False),
+    FieldSpec("message", "Message", True),
+]
+
+
+def _shorten(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+class ProfileDialog(QtWidgets.QDialog):
+    def __init__(
+        self, parent: Optional[QtWidgets.QWidget], profile: Optional[ShortcutProfile]
+    ) -> None:
+        super().__init__(parent)
+
+        self.setWindowTitle("DMS Profile")
+        self.setWindowFlag(QtCore.Qt.WindowType.WindowStaysOnTopHint, True)
+
+        layout = QtWidgets.QFormLayout(self)
+
+        self._edits: Dict[str, QtWidgets.QLineEdit] = {}
+        for spec in PROFILE_FIELD_SPECS:
+            edit = QtWidgets.QLineEdit(getattr(profile, spec.key) if profile else "")
+            edit.setMinimumWidth(320)
+            if not spec.required:
+                edit.setPlaceholderText("Optional (defaults to the main one)")
+            layout.addRow(spec.label, edit)
+            self._edits[spec.key] = edit
+
+        buttons = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Ok
+            | QtWidgets.QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self._accept_if_valid)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def profile(self) -> ShortcutProfile:
+        return ShortcutProfile(
+            **{key: edit.text().strip() for key, edit in self._edits.items()}
+        )
+
+    def _accept_if_valid(self) -> None:
+        profile = self.profile()
+
+        missing = [
+            spec.label
+            for spec in PROFILE_FIELD_SPECS
+            if spec.required and not getattr(profile, spec.key)
+        ]
+        if missing:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "DMS",
+                "Missing required fields:\n\n" + "\n".join(f"- {m}" for m in missing),
+            )
+            return
+
+        try:
+            parse_hotkey(profile.shortcut)
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, "DMS", str(e))
+            return
+
+        self.accept()
+
+
 class SettingsDialog(QtWidgets.QDialog):
     def __init__(self, parent: Optional[QtWidgets.QWidget], ui: "DmsUI") -> None:
         super().__init__(parent)
@@ -76,11 +160,38 @@ class SettingsDialog(QtWidgets.QDialog):
             self._rows[spec.key] = {"status": status, "value": value}
             row += 1
 
+        layout.addSpacing(6)
+        profiles_title = QtWidgets.QLabel("Profiles")
+        profiles_title.setStyleSheet("font-size: 16px; font-weight: 700;")
+        layout.addWidget(profiles_title)
+
+        # Rebuilt by refresh() whenever the list of profiles changes
+        self._profiles_grid = QtWidgets.QGridLayout()
+        layout.addLayout(self._profiles_grid)
+        self._shown_profiles: Optional[List[ShortcutProfile]] = None
+
+        add_profile_btn = QtWidgets.QPushButton("Add Profile")
+        add_profile_btn.clicked.connect(lambda: self.ui.edit_profile(None))
+        layout.addWidget(add_profile_btn)
+
         layout.addSpacing(6)
         self.status_line = QtWidgets.QLabel("")
         self.status_line.setStyleSheet("font-weight: 700;")
         layout.addWidget(self.status_line)
 
+        self.metrics_line = QtWidgets.QLabel("")
+        self.metrics_line.setStyleSheet("color: #555555;")
+        self.metrics_line.setTextInteractionFlags(
+            QtCore.Qt.TextInteractionFlag.TextSelectableByMouse
+        )
+        layout.addWidget(self.metrics_line)
+
+        # Latency numbers change with every send, not with config
+        self._metrics_timer = QtCore.QTimer(self)
+        self._metrics_timer.setInterval(METRICS_REFRESH_MS)
+        self._metrics_timer.timeout.connect(self.refresh_metrics)
+        self._metrics_timer.start()
+
         btns = QtWidgets.QHBoxLayout()
         layout.addLayout(btns)
 
@@ -88,10 +199,17 @@ class SettingsDialog(QtWidgets.QDialog):
         self.toggle_btn.clicked.connect(self.ui.toggle_active)
         btns.addWidget(self.toggle_btn)
 
-        btn_token = QtWidgets.QPushButton("Obtain Discord Token")
-        btn_token.setToolTip("Show a fake Discord token (demo only)")
-        btn_token.clicked.connect(self.ui.obtain_discord_token)
-        layout.addWidget(btn_token)
+        self.token_btn = QtWidgets.QPushButton("Obtain Discord Token")
+        self.token_btn.setToolTip("Show a fake Discord token (demo only)")
+        self.token_btn.clicked.connect(self.ui.obtain_discord_token)
+        layout.addWidget(self.token_btn)
+
+        # Progress of a token acquisition running in the background
+        self.token_line = QtWidgets.QLabel("")
+        self.token_line.setStyleSheet("color: #555555;")
+        self.token_line.setVisible(False)
+        layout.addWidget(self.token_line)
+        self.ui.tokenProgress.connect(self._on_token_progress)
 
         btns.addStretch(1)
 
@@ -123,6 +241,9 @@ class SettingsDialog(QtWidgets.QDialog):
             if ready:
                 status_lbl.setText("READY")
                 status_lbl.setStyleSheet("color: #0a7a0a; font-weight: 700;")  # green
+            elif not spec.required:
+                status_lbl.setText("OPTIONAL")
+                status_lbl.setStyleSheet("color: #777777; font-weight: 700;")  # grey
             else:
                 status_lbl.setText("NOT SET")
                 status_lbl.setStyleSheet("color: #b00020; font-weight: 700;")  # red
@@ -134,6 +255,8 @@ class SettingsDialog(QtWidgets.QDialog):
                 shown = shown[:87] + "..."
             value_lbl.setText(shown)
 
+        self._refresh_profiles()
+
         # Bottom status line with color
         if self.ui.active:
             self.status_line.setText("Status: Active")
@@ -148,12 +271,78 @@ class SettingsDialog(QtWidgets.QDialog):
                     "color: #b00020; font-weight: 800;"
                 )  # red
 
+        self.refresh_metrics()
+
+    def _refresh_profiles(self) -> None:
+        profiles = list(self.ui.manager.profiles)
+        if profiles == self._shown_profiles:
+            return
+        self._shown_profiles = profiles
+
+        while self._profiles_grid.count():
+            widget = self._profiles_grid.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+
+        if not profiles:
+            empty = QtWidgets.QLabel("No extra profiles.")
+            empty.setStyleSheet("color: #777777;")
+            self._profiles_grid.addWidget(empty, 0, 0)
+            return
+
+        for row, profile in enumerate(profiles):
+            shortcut = QtWidgets.QLabel(profile.shortcut)
+            shortcut.setStyleSheet("font-weight: 700;")
+            target = QtWidgets.QLabel(
+                f"#{profile.channel_id}: {_shorten(profile.message, 60)}"
+            )
+
+            edit_btn = QtWidgets.QPushButton("Edit")
+            edit_btn.clicked.connect(lambda _, i=row: self.ui.edit_profile(i))
+            remove_btn = QtWidgets.QPushButton("Remove")
+            remove_btn.clicked.connect(lambda _, i=row: self.ui.remove_profile(i))
+
+            self._profiles_grid.addWidget(shortcut, row, 0)
+            self._profiles_grid.addWidget(target, row, 1)
+            self._profiles_grid.addWidget(edit_btn, row, 2)
+            self._profiles_grid.addWidget(remove_btn, row, 3)
+
+    def _on_token_progress(self, text: str) -> None:
+        running = self.ui.token_acquisition_running()
+        self.token_btn.setEnabled(not running)
+        self.token_line.setText(text)
+        self.token_line.setVisible(running)
+
+    def refresh_metrics(self) -> None:
+        if self.isVisible():
+            text = self.ui.manager.metrics.summary_text()
+            pending = self.ui.manager.outbox.pending_count()
+            if pending:
+                text += f"\nWaiting in outbox: {pending}"
+            self.metrics_line.setText(text)
+
 
 class DmsUI(QtCore.QObject):
     configChanged = QtCore.Signal()
+    # Names of the fields that changed, emitted before configChanged
+    fieldsChanged = QtCore.Signal(list)
+    sendFailed = QtCore.Signal(str)
+    # A send failed but stays in the outbox for a retry
+    sendDeferred = QtCore.Signal(str)
+    # The .env file could not be written (from the persister's timer thread)
+    persistFailed = QtCore.Signal(str)
+    # Token acquisition runs on a worker thread and reports back through these
+    tokenProgress = QtCore.Signal(str)
+    tokenObtained = QtCore.Signal(str)
+    tokenFailed = QtCore.Signal(str)
+    # Parsed .env contents after an external edit, from the watcher thread
+    _envFileChanged = QtCore.Signal(object)
 
     def __init__(
-        self, manager: Optional[DMS_Manager] = None, icon_path: Optional[str] = None
+        self,
+        manager: Optional[DMS_Manager] = None,
+        icon_path: Optional[str] = None,
+        hotkey_backend: Optional[HotkeyBackend] = None,
     ) -> None:
         super().__init__()
         self.manager = manager or DMS_Manager()
@@ -170,22 +359,105 @@ class DmsUI(QtCore.QObject):
             FieldSpec("latest_channel_id", "Channel Id", True),
             FieldSpec("latest_shortcut", "Shortcut", True),
             FieldSpec("latest_message", "Message", True),
+            FieldSpec("metrics_export_path", "Metrics Export Path", False),
+            FieldSpec("debounce_ms", "Debounce (ms)", False),
+            FieldSpec("merge_presses", "Merge Presses (on/off)", False),
+            FieldSpec("dedup_window_ms", "Dedup Window (ms)", False),
+            FieldSpec("transport", "Transport (http1/h2)", False),
         ]
 
+        # Debounces hotkey presses between the keyboard hook and the sender
+        self._coalescer = self._make_coalescer()
+
+        # One keyboard hook for all profiles, dispatched through a scan code
+        # table that is updated by diff whenever the bindings change
+        if hotkey_backend is None:
+            try:
+                hotkey_backend = KeyboardBackend()
+            except ImportError:
+                pass
+        self._hotkeys: Optional[HotkeyRegistry] = (
+            HotkeyRegistry(hotkey_backend) if hotkey_backend is not None else None
+        )
+
         self._app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
         self._app.setQuitOnLastWindowClosed(False)
 
+        # Every tray/menu icon is painted here once, refreshes only look them up
+        self._icons = IconCache(icon_path)
+        self._icons.prerender(self._app.devicePixelRatio())
+
         self._tray = QtWidgets.QSystemTrayIcon()
         self._tray.setToolTip("DMS - Discord Message Shortcut")
 
         self._menu = QtWidgets.QMenu()
+        self._tray_state: Optional[str] = None
 
-        # Whenever config changes, refresh everything (menu icons, tray badge, settings colors)
+        # Whenever config changes, refresh what depends on it (menu entries,
+        # tray badge, settings colors). fieldsChanged tells which fields did.
+        self._changed_fields: Set[str] = set()
         self.configChanged.connect(self._refresh_everything)
+        # Connections to Discord are kept warm exactly while active
+        self.configChanged.connect(self._sync_warming)
+
+        # Sends finish on engine threads; errors are shown on the GUI thread
+        self.sendFailed.connect(self._on_send_failed)
+        self.sendDeferred.connect(self._on_send_deferred)
+        self.persistFailed.connect(self._on_persist_failed)
+        self.manager.on_persist_error = lambda e: self.persistFailed.emit(
+            f"Settings could not be saved; they will be retried with the next change:\n\n{e}"
+        )
 
-        self._session_filter = WindowsSessionEventFilter(self._on_session_lost)
-        self._app.installNativeEventFilter(self._session_filter)
-        self._session_window = SessionNotificationWindow(self._app)
+        # Resend whatever a previous run (or a network outage) left behind
+        self.manager.start_replay()
+
+        # Let scripts and other tools trigger sends (see control.py)
+        try:
+            self.manager.start_control()
+        except OSError:
+            # Hotkeys don't need it; only external triggers are unavailable
+            pass
+
+        # {clipboard} is filled in on the send path, off the GUI thread, so it
+        # reads a copy kept up to date here rather than the clipboard itself
+        clipboard = self._app.clipboard()
+        self._clipboard_text = clipboard.text()
+        clipboard.dataChanged.connect(self._on_clipboard_changed)
+        self.manager.set_clipboard_reader(lambda: self._clipboard_text)
+
+        self._token_thread: Optional[threading.Thread] = None
+        self.tokenObtained.connect(self._on_token_obtained)
+        self.tokenFailed.connect(self._on_token_failed)
+
+        # Per-field reactions to config changes, wherever they come from
+        self._field_subscribers: Dict[str, List[Callable[[], None]]] = {}
+        self.fieldsChanged.connect(self._notify_field_subscribers)
+        self.fieldsChanged.connect(self._collect_changed_fields)
+        for key in ("debounce_ms", "merge_presses"):
+            self.subscribe_field(key, self._rebuild_coalescer)
+        for key in HOTKEY_FIELDS:
+            self.subscribe_field(key, self._rebind_if_active)
+
+        # Pick up edits made to the .env file outside DMS
+        self._envFileChanged.connect(self._on_env_file_changed)
+        self.manager.start_watching(self._envFileChanged.emit)
+
+        # Periodically mirror the send metrics to the configured export file
+        self._exported_metrics_version = -1
+        self._metrics_export_error: Optional[str] = None
+        self._metrics_export_timer = QtCore.QTimer(self)
+        self._metrics_export_timer.setInterval(METRICS_EXPORT_MS)
+        self._metrics_export_timer.timeout.connect(self._export_metrics)
+        self._metrics_export_timer.start()
+
+        # The session lock fix relies on WTS notifications, which only exist
+        # on Windows. Elsewhere (e.g. benchmarks on Linux) it is skipped.
+        self._session_filter: Optional[WindowsSessionEventFilter] = None
+        self._session_window: Optional[SessionNotificationWindow] = None
+        if sys.platform == "win32":
+            self._session_filter = WindowsSessionEventFilter(self._on_session_lost)
+            self._app.installNativeEventFilter(self._session_filter)
+            self._session_window = SessionNotificationWindow(self._app)
 
         self._build_menu()
         self._tray.setContextMenu(self._menu)
@@ -208,7 +480,7 @@ class DmsUI(QtCore.QObject):
 
         self.active = False
         self._keyboard_dead = True
-        self._unbind_hotkey()
+        self._unbind_hotkey(remove_hook=True)
 
         self.configChanged.emit()
 
@@ -257,15 +529,56 @@ class DmsUI(QtCore.QObject):
             self._settings.refresh()
 
     def obtain_discord_token(self) -> None:
+        """
+        Starts acquiring a token in the background. The login can take minutes,
+        so the GUI thread only gets progress and the result through signals.
+        """
+        if self.token_acquisition_running():
+            return
+
+        self._token_thread = threading.Thread(
+            target=self._acquire_token, name="dms-token", daemon=True
+        )
+        self._token_thread.start()
+        self.tokenProgress.emit("Obtaining Discord token...")
+
+    def token_acquisition_running(self) -> bool:
+        return self._token_thread is not None and self._token_thread.is_alive()
+
+    def _acquire_token(self) -> None:
         try:
-            token = get_discord_token()
+            # selenium is heavy and only needed here, so it is imported on first use
+            from discord_message_shortcut.discord_token_scraper import get_discord_token
+
+            token = get_discord_token(
+                progress=self.tokenProgress.emit,
+                # Browser profile and token cache live next to the .env file
+                data_dir=os.path.dirname(os.path.abspath(self.manager.env_path)),
+                stale_token=self.manager.discord_token or None,
+            )
         except Exception as e:
-            self._error("DMS", f"Failed to obtain Discord token:\n\n{e}")
+            self.tokenFailed.emit(f"Failed to obtain Discord token:\n\n{e}")
             return
 
         if not token:
-            self._error("DMS", "Received empty Discord token.")
+            self.tokenFailed.emit("Received empty Discord token.")
             return
+        self.tokenObtained.emit(token)
+
+    def _finish_token_acquisition(self) -> None:
+        if self._token_thread is not None:
+            self._token_thread.join()
+            self._token_thread = None
+        self.tokenProgress.emit("")
+
+    @QtCore.Slot(str)
+    def _on_token_failed(self, text: str) -> None:
+        self._finish_token_acquisition()
+        self._error("DMS", text)
+
+    @QtCore.Slot(str)
+    def _on_token_obtained(self, token: str) -> None:
+        self._finish_token_acquisition()
 
         parent = (
             self._settings if (self._settings and self._settings.isVisible()) else None
@@ -346,8 +659,10 @@ class DmsUI(QtCore.QObject):
             self._error("DMS", f"Failed to open env folder:\n\n{e}")
 
     def _build_menu(self) -> None:
-        self._menu.clear()
-
+        """
+        Builds the menu once. Later config changes update the existing actions
+        in place through _update_menu.
+        """
         # Settings
         settings_action = QtGui.QAction("Open Settings...", self._menu)
         settings_action.triggered.connect(self.open_settings)
@@ -357,11 +672,16 @@ class DmsUI(QtCore.QObject):
 
         # General info submenu (click-to-edit)
         general = self._menu.addMenu("General info")
+        self._field_actions: Dict[str, QtGui.QAction] = {}
+        self._field_ready: Dict[str, bool] = {}
         for spec in self.fields:
             action = QtGui.QAction(self._field_menu_text(spec), self._menu)
-            action.setIcon(self._status_icon(self._is_ready(spec.key)))
+            ready = self._is_ready(spec.key)
+            action.setIcon(self._status_icon(ready))
             action.triggered.connect(lambda _, s=spec: self.edit_field(s))
             general.addAction(action)
+            self._field_actions[spec.key] = action
+            self._field_ready[spec.key] = ready
 
         general.addSeparator()
 
@@ -369,18 +689,18 @@ class DmsUI(QtCore.QObject):
         env_action.triggered.connect(self._open_env_location)
         general.addAction(env_action)
 
+        # Extra profiles submenu (click-to-edit)
+        self._profiles_menu = self._menu.addMenu("Profiles")
+        self._build_profiles_menu()
+
         self._menu.addSeparator()
 
         # Status action
-        status_action = QtGui.QAction(self._status_label(), self._menu)
-        status_action.setIcon(
-            self._status_icon(
-                ok=self.active if self.active else self.config_ready(),
-                missing=(not self.config_ready()) and (not self.active),
-            )
-        )
-        status_action.triggered.connect(self.toggle_active)
-        self._menu.addAction(status_action)
+        self._status_action = QtGui.QAction(self._status_label(), self._menu)
+        self._status_state = self._status_state_key()
+        self._status_action.setIcon(self._status_state_icon(self._status_state))
+        self._status_action.triggered.connect(self.toggle_active)
+        self._menu.addAction(self._status_action)
 
         self._menu.addSeparator()
 
@@ -388,6 +708,60 @@ class DmsUI(QtCore.QObject):
         exit_action.triggered.connect(self.exit_app)
         self._menu.addAction(exit_action)
 
+    def _build_profiles_menu(self) -> None:
+        self._profiles_menu.clear()
+
+        for index, profile in enumerate(self.manager.profiles):
+            action = QtGui.QAction(
+                f"{profile.shortcut}: {_shorten(profile.message, 40)}", self._profiles_menu
+            )
+            action.triggered.connect(lambda _, i=index: self.edit_profile(i))
+            self._profiles_menu.addAction(action)
+
+        if self.manager.profiles:
+            self._profiles_menu.addSeparator()
+
+        add_profile_action = QtGui.QAction("Add profile...", self._profiles_menu)
+        add_profile_action.triggered.connect(lambda: self.edit_profile(None))
+        self._profiles_menu.addAction(add_profile_action)
+
+    def _update_menu(self, changed: Optional[Set[str]]) -> None:
+        """
+        Updates the actions of the fields in `changed` (all of them if None)
+        and the status action. Unchanged text and icons are not touched.
+        """
+        for spec in self.fields:
+            if changed is not None and spec.key not in changed:
+                continue
+            action = self._field_actions[spec.key]
+            text = self._field_menu_text(spec)
+            if action.text() != text:
+                action.setText(text)
+            ready = self._is_ready(spec.key)
+            if self._field_ready[spec.key] != ready:
+                self._field_ready[spec.key] = ready
+                action.setIcon(self._status_icon(ready))
+
+        if changed is None or PROFILES_FIELD in changed:
+            self._build_profiles_menu()
+
+        # Activation and readiness of other fields both move the status
+        text = self._status_label()
+        if self._status_action.text() != text:
+            self._status_action.setText(text)
+        state = self._status_state_key()
+        if state != self._status_state:
+            self._status_state = state
+            self._status_action.setIcon(self._status_state_icon(state))
+
+    def _status_state_key(self) -> str:
+        if self.active:
+            return "active"
+        return "ready" if self.config_ready() else "missing"
+
+    def _status_state_icon(self, state: str) -> QtGui.QIcon:
+        return self._status_icon(ok=state != "missing", missing=state == "missing")
+
     def _field_menu_text(self, spec: FieldSpec) -> str:
         if spec.key == "latest_shortcut":
             return f"{spec.label}: {self.manager.latest_shortcut}"
@@ -429,15 +803,11 @@ class DmsUI(QtCore.QObject):
             return
 
         value = value.strip()
-        old_shortcut = (self.manager.latest_shortcut or "").strip()
-
         self._persist_field(spec.key, value)
+        self._apply_field_changes([spec.key])
 
-        # Rebind hotkey only if shortcut changed and we are active
-        if self.active and spec.key == "latest_shortcut":
-            new_shortcut = (self.manager.latest_shortcut or "").strip()
-            if new_shortcut != old_shortcut:
-                self._bind_hotkey()
+    def _apply_field_changes(self, changed: List[str]) -> None:
+        self.fieldsChanged.emit(changed)
 
         # If config becomes invalid while active -> deactivate
         if self.active and not self.config_ready():
@@ -448,6 +818,40 @@ class DmsUI(QtCore.QObject):
         # One single refresh trigger (updates READY colors immediately)
         self.configChanged.emit()
 
+    def subscribe_field(self, key: str, callback: Callable[[], None]) -> None:
+        """
+        Calls `callback` on the GUI thread whenever the field `key` changes,
+        either from the UI or from an external edit of the .env file.
+        All extra profiles are reported as the single field PROFILES_FIELD.
+        """
+        self._field_subscribers.setdefault(key, []).append(callback)
+
+    def _collect_changed_fields(self, changed: List[str]) -> None:
+        self._changed_fields.update(changed)
+
+    def _notify_field_subscribers(self, changed: List[str]) -> None:
+        called = set()
+        for key in changed:
+            for callback in self._field_subscribers.get(key, ()):
+                # Bound methods compare equal, so each runs once per change set
+                if callback not in called:
+                    called.add(callback)
+                    callback()
+
+    @QtCore.Slot(object)
+    def _on_env_file_changed(self, data: Dict[str, Optional[str]]) -> None:
+        changed = self.manager.apply_external(data)
+        if changed:
+            self._apply_field_changes(changed)
+
+    def _rebuild_coalescer(self) -> None:
+        self._coalescer = self._make_coalescer()
+
+    def _rebind_if_active(self) -> None:
+        # Rebinding only touches the hotkeys whose shortcut or target changed
+        if self.active:
+            self._bind_hotkey()
+
     def _persist_field(self, key: str, value: str) -> None:
         if key == "discord_token":
             self.manager.save_to_env(discord_token=value)
@@ -461,16 +865,46 @@ class DmsUI(QtCore.QObject):
             self.manager.save_to_env(latest_shortcut=value)
         elif key == "latest_message":
             self.manager.save_to_env(latest_message=value)
+        elif key == "metrics_export_path":
+            self.manager.save_to_env(metrics_export_path=value)
+        elif key == "debounce_ms":
+            self.manager.save_to_env(debounce_ms=value)
+        elif key == "merge_presses":
+            self.manager.save_to_env(merge_presses=value)
+        elif key == "dedup_window_ms":
+            self.manager.save_to_env(dedup_window_ms=value)
+        elif key == "transport":
+            self.manager.save_to_env(transport=value)
+
+    def edit_profile(self, index: Optional[int]) -> None:
+        """
+        Opens the profile editor for `manager.profiles[index]`, or for a new
+        profile if `index` is None.
+        """
+        parent = (
+            self._settings
+            if (self._settings is not None and self._settings.isVisible())
+            else None
+        )
+        current = self.manager.profiles[index] if index is not None else None
 
-        # Reload first, then signal refresh so READY/NOT SET reflects the new value immediately
-        self.manager.reload_from_env()
+        dlg = ProfileDialog(parent, current)
+        if dlg.exec() != QtWidgets.QDialog.DialogCode.Accepted:
+            return
+
+        self.manager.save_profile(dlg.profile(), index)
+        self._apply_field_changes([PROFILES_FIELD])
+
+    def remove_profile(self, index: int) -> None:
+        self.manager.remove_profile(index)
+        self._apply_field_changes([PROFILES_FIELD])
 
     # -------------------------
     # Active / Inactive
     # -------------------------
 
     def toggle_active(self) -> None:
-        if keyboard is None:
+        if self._hotkeys is None:
             self._error(
                 "DMS",
                 "Global hotkey backend not available.\n\nInstall:\n  pip install keyboard\n\n"
@@ -503,41 +937,130 @@ class DmsUI(QtCore.QObject):
         self.configChanged.emit()
 
     def _bind_hotkey(self) -> None:
-        if keyboard is None:
+        if self._hotkeys is None:
             return
 
-        self._unbind_hotkey()
-
         shortcut = (self.manager.latest_shortcut or "").strip()
         if not shortcut:
+            self._unbind_hotkey()
             self.active = False
             self._error("DMS", "Shortcut is empty.")
             return
 
-        def _callback() -> None:
-            threading.Thread(
-                target=self._send_current_message_safely, daemon=True
-            ).start()
-
         try:
-            keyboard.add_hotkey(shortcut, _callback)
+            self._hotkeys.apply(self._hotkey_bindings(shortcut), self._hotkey_callback)
         except Exception as e:
+            self._unbind_hotkey()
             self.active = False
             self._error("DMS", f"Failed to register hotkey '{shortcut}':\n\n{e}")
 
-    def _unbind_hotkey(self) -> None:
-        if keyboard is None:
+    def _hotkey_bindings(self, shortcut: str) -> List[Tuple[str, Hashable]]:
+        # Targets carry everything their callback depends on, so a binding
+        # is recreated exactly when its profile or debounce settings change.
+        tuning = (self.manager.debounce_seconds, self.manager.merge_presses_enabled)
+        bindings: List[Tuple[str, Hashable]] = [(shortcut, None)]
+        for profile in self.manager.profiles:
+            if profile.shortcut and profile.channel_id:
+                bindings.append((profile.shortcut, (profile, tuning)))
+        return bindings
+
+    def _hotkey_callback(self, target: Hashable) -> Callable[[], None]:
+        if target is None:
+            return self._send_current_message_safely
+
+        profile, _ = target
+        coalescer = self._make_coalescer(profile)
+        return lambda: coalescer.press(profile.message, SendTrace())
+
+    def _unbind_hotkey(self, remove_hook: bool = False) -> None:
+        """
+        Unbinds every hotkey. The keyboard hook itself is kept (so activating
+        again is a table swap) unless `remove_hook` is set.
+        """
+        if self._hotkeys is None:
             return
         try:
-            keyboard.clear_all_hotkeys()
+            if remove_hook:
+                self._hotkeys.close()
+            else:
+                self._hotkeys.clear()
         except Exception:
             pass
 
+    def _make_coalescer(self, profile: Optional[ShortcutProfile] = None) -> HotkeyCoalescer:
+        send = self._submit_send
+        if profile is not None:
+            send = lambda message, trace, suffix: self._submit_send(  # noqa: E731
+                message, trace, suffix, profile
+            )
+        return HotkeyCoalescer(
+            send=send,
+            window=self.manager.debounce_seconds,
+            merge=self.manager.merge_presses_enabled,
+            schedule=self.manager.engine.call_later,
+        )
+
     def _send_current_message_safely(self) -> None:
+        # Runs on the keyboard hook thread: only enqueue, never block here.
+        self._coalescer.press(self.manager.latest_message, SendTrace())
+
+    def _submit_send(
+        self,
+        message: str,
+        trace: SendTrace,
+        suffix: str = "",
+        profile: Optional[ShortcutProfile] = None,
+    ) -> None:
         try:
-            self.manager.send_message(self.manager.latest_message)
+            future = self.manager.send_message(message, trace, profile, suffix)
         except Exception as e:
-            self._error("DMS", f"Failed to send message:\n\n{e}")
+            self.sendFailed.emit(f"Failed to send message:\n\n{e}")
+            return
+        future.add_done_callback(self._on_send_done)
+
+    def _on_send_done(self, future: Future) -> None:
+        if future.cancelled():
+            return
+        e = future.exception()
+        if isinstance(e, SendDeferred):
+            self.sendDeferred.emit(f"Message not sent yet:\n\n{e}")
+        elif e is not None:
+            self.sendFailed.emit(f"Failed to send message:\n\n{e}")
+
+    @QtCore.Slot(str)
+    def _on_send_failed(self, text: str) -> None:
+        self._error("DMS", text)
+
+    @QtCore.Slot()
+    def _on_clipboard_changed(self) -> None:
+        self._clipboard_text = self._app.clipboard().text()
+
+    @QtCore.Slot(str)
+    def _on_send_deferred(self, text: str) -> None:
+        # Nothing was lost, so no blocking dialog
+        self._tray.showMessage("DMS", text, QtWidgets.QSystemTrayIcon.MessageIcon.Warning)
+
+    def _on_persist_failed(self, text: str) -> None:
+        # The edits are still in memory and are written with the next one
+        self._tray.showMessage("DMS", text, QtWidgets.QSystemTrayIcon.MessageIcon.Warning)
+
+    def _export_metrics(self) -> None:
+        path = (self.manager.metrics_export_path or "").strip()
+        metrics = self.manager.metrics
+        if not path or metrics.version == self._exported_metrics_version:
+            return
+
+        try:
+            metrics.export(path)
+        except OSError as e:
+            # Report each failing path once instead of every interval
+            if self._metrics_export_error != path:
+                self._metrics_export_error = path
+                self._error("DMS", f"Failed to export metrics to {path}:\n\n{e}")
+            return
+
+        self._metrics_export_error = None
+        self._exported_metrics_version = metrics.version
 
     # -------------------------
     # Validation / status
@@ -561,108 +1084,45 @@ class DmsUI(QtCore.QObject):
     # -------------------------
 
     def _refresh_tray_icon(self) -> None:
-        base = (
-            self._load_base_pixmap(self.icon_path)
-            if self.icon_path
-            else self._default_base_pixmap()
-        )
-
-        if self.active:
-            badge = QtGui.QColor(10, 122, 10)  # green
-        else:
-            badge = (
-                QtGui.QColor(176, 0, 32)
-                if not self.config_ready()
-                else QtGui.QColor(179, 107, 0)
-            )  # red/amber
-
-        icon = self._pixmap_with_badge(base, badge)
-        self._tray.setIcon(QtGui.QIcon(icon))
+        # The badge only depends on the status, so skip repainting it otherwise
+        state = self._status_state_key()
+        if state == self._tray_state:
+            return
+        self._tray_state = state
+        self._tray.setIcon(self._icons.tray_icon(state, self._app.devicePixelRatio()))
 
     def _status_icon(self, ok: bool, missing: bool = False) -> QtGui.QIcon:
-        if missing:
-            color = QtGui.QColor(176, 0, 32)
-        else:
-            color = QtGui.QColor(10, 122, 10) if ok else QtGui.QColor(176, 0, 32)
-        pix = QtGui.QPixmap(14, 14)
-        pix.fill(QtCore.Qt.GlobalColor.transparent)
-        p = QtGui.QPainter(pix)
-        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
-        p.setBrush(QtGui.QBrush(color))
-        p.setPen(QtCore.Qt.PenStyle.NoPen)
-        p.drawEllipse(1, 1, 12, 12)
-        p.end()
-        return QtGui.QIcon(pix)
-
-    def _load_base_pixmap(self, path: str) -> QtGui.QPixmap:
-        pm = QtGui.QPixmap(path)
-        if pm.isNull():
-            return self._default_base_pixmap()
-        return pm.scaled(
-            64,
-            64,
-            QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-            QtCore.Qt.TransformationMode.SmoothTransformation,
-        )
-
-    def _default_base_pixmap(self) -> QtGui.QPixmap:
-        pm = QtGui.QPixmap(64, 64)
-        pm.fill(QtCore.Qt.GlobalColor.transparent)
-        p = QtGui.QPainter(pm)
-        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
-        p.setBrush(QtGui.QBrush(QtGui.QColor(60, 60, 60)))
-        p.setPen(QtCore.Qt.PenStyle.NoPen)
-        p.drawEllipse(4, 4, 56, 56)
-        p.setPen(QtGui.QPen(QtGui.QColor(255, 255, 255)))
-        f = QtGui.QFont("Segoe UI", 24, 700)
-        p.setFont(f)
-        p.drawText(pm.rect(), QtCore.Qt.AlignmentFlag.AlignCenter, "D")
-        p.end()
-        return pm
-
-    def _pixmap_with_badge(
-        self, base: QtGui.QPixmap, badge_color: QtGui.QColor
-    ) -> QtGui.QPixmap:
-        pm = QtGui.QPixmap(64, 64)
-        pm.fill(QtCore.Qt.GlobalColor.transparent)
-
-        p = QtGui.QPainter(pm)
-        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
-
-        p.drawPixmap(
-            0,
-            0,
-            base.scaled(
-                64,
-                64,
-                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-                QtCore.Qt.TransformationMode.SmoothTransformation,
-            ),
-        )
-
-        p.setBrush(QtGui.QBrush(badge_color))
-        p.setPen(QtGui.QPen(QtGui.QColor(255, 255, 255), 2))
-        p.drawEllipse(44, 44, 16, 16)
-
-        p.end()
-        return pm
+        return self._icons.status_icon(ok and not missing, self._app.devicePixelRatio())
 
     # -------------------------
     # Refresh / Exit
     # -------------------------
 
     def _refresh_everything(self) -> None:
-        self._build_menu()
-        self._tray.setContextMenu(
-            self._menu
-        )  # helps Windows apply updates consistently
+        changed, self._changed_fields = self._changed_fields, set()
+        self._update_menu(changed)
         self._refresh_tray_icon()
         self._refresh_settings()
-        QtWidgets.QApplication.processEvents()
+
+    def _sync_warming(self) -> None:
+        if self.active:
+            self.manager.start_warming()
+        else:
+            self.manager.stop_warming()
 
     def exit_app(self) -> None:
         self.active = False
-        self._unbind_hotkey()
+        self._unbind_hotkey(remove_hook=True)
+        self.manager.engine.shutdown(wait=False)
+        self.manager.stop_watching()
+        self.manager.stop_replay()
+        self.manager.stop_warming()
+        self.manager.stop_control()
+        self.manager.flush()
+        if self.manager.unsaved_changes:
+            # There is no next change to retry with
+            self._error("DMS", f"Settings could not be saved to {self.manager.env_path}.")
+        self._export_metrics()
         self._tray.hide()
         self._app.quit()
 
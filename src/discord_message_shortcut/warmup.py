@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Callable, Optional
+
+# Unauthenticated and cheap: it only returns the gateway's websocket URL
+KEEP_WARM_PATH = "/api/v6/gateway"
+KEEP_WARM_HEADERS = {"accept": "application/json"}
+
+# Below both the pool's idle timeout and the API's keep-alive timeout
+KEEP_WARM_INTERVAL = 30.0
+
+
+class ConnectionWarmer:
+    """
+    Background thread that warms the connections to the API right away, then
+    again every `interval` seconds, so neither side closes them for being
+    idle and the next press finds them open and handshaken.
+    """
+
+    def __init__(
+        self,
+        warm: Callable[[], int],
+        interval: float = KEEP_WARM_INTERVAL,
+        on_warmed: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """
+        Args:
+            warm (Callable[[], int]): Warms the connections and returns how
+                many are warm.
+            interval (float): Seconds between two rounds.
+            on_warmed (Callable[[int, int], None] | None): Called after each
+                round with the number of warm connections and its duration in
+                microseconds.
+        """
+        self.interval = interval
+        self._warm = warm
+        self._on_warmed = on_warmed
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ConnectionWarmer":
+        self._thread = threading.Thread(target=self._run, name="dms-warmer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.perf_counter_ns()
+            try:
+                warmed = self._warm()
+            except Exception:
+                # Best effort: a failed round just leaves the sends to connect
+                warmed = 0
+            if self._on_warmed is not None:
+                self._on_warmed(warmed, (time.perf_counter_ns() - started) // 1000)
+            self._stop.wait(self.interval)